@@ -1,18 +1,40 @@
 from fastapi import APIRouter, Depends
+from app.core.config import settings
 from app.core.security import require_ai_key
 from app.schemas import TrayInferRequest, TrayInferResponse, CctvInferRequest, CctvInferResponse
 from app.services.engine import InferenceEngine
+from app.services.tray_batcher import TrayBatcher
 
 router = APIRouter(dependencies=[Depends(require_ai_key)])
 engine = InferenceEngine()
+tray_batcher = TrayBatcher(
+    engine,
+    max_batch=settings.TRAY_BATCH_MAX_SIZE,
+    max_wait_ms=settings.TRAY_BATCH_MAX_WAIT_MS,
+)
 
 @router.get("/health")
 def health():
-    return {"ok": True}
+    # 모델 컴포넌트별 로딩 상태/소요 시간 (lazy 컴포넌트는 deferred)
+    # prototype: 현재 ACTIVE prototype_set_id / 로드 시각 / 갱신 상태
+    # embedding: EMB_PREPROCESS=cv2 요청 시 pil 대비 parity 확인 결과 (실제 사용 mode 포함)
+    return {
+        "ok": True,
+        "startup": engine.startup.report(),
+        "prototype": engine.prototype_watcher.status(),
+        "embedding": {"preprocess": engine.emb_preprocess, "parity": engine.emb_preprocess_parity},
+    }
+
+@router.get("/cctv/live/metrics")
+def cctv_live_metrics():
+    # lazy import (live 모듈은 worker/main 전용)
+    from app.cctv_live import read_live_metrics
+
+    return read_live_metrics()
 
 @router.post("/infer/tray", response_model=TrayInferResponse)
 def infer_tray(body: TrayInferRequest):
-    return TrayInferResponse(**engine.infer_tray(body.model_dump()))
+    return TrayInferResponse(**tray_batcher.infer_tray(body.model_dump()))
 
 @router.post("/infer/cctv", response_model=CctvInferResponse)
 def infer_cctv(body: CctvInferRequest):
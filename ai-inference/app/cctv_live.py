@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Any
+
+from app.core.config import settings
+from app.services.cctv_batch import process_frames_batch
+from app.services.cctv_stream import ClipWriter, FrameRing, clip_filename
+from app.services.central_client import CentralClient, CentralClientError, get_central_client
+from app.services.model_registry import FrameTensorCache
+from app.services.rtsp import RtspReader
+
+live_logger = logging.getLogger("cctv.live")
+
+# 이벤트 타입별 클립 디렉토리 / 파일명 prefix (infer_cctv와 동일)
+_CLIP_NAMES = {
+    "VIOLENCE": ("violence_clips", "cctv_violence"),
+    "FALL": ("fall_clips", "cctv_fall_down"),
+    "WHEELCHAIR": ("auxiliary_clips", "cctv_auxiliary"),
+}
+
+
+# 카메라 간 batch predict 대상 (YOLO 기반)
+_BATCHED_EVENTS = ("FALL", "WHEELCHAIR")
+
+
+def _metrics_dir() -> str:
+    return os.path.join(settings.CACHE_DIR, "cctv_live")
+
+
+def _shard_of(store_code: str, device_code: str, shard_count: int) -> int:
+    # 프로세스 간 동일해야 하므로 hash() 대신 crc32
+    return zlib.crc32(f"{store_code}/{device_code}".encode("utf-8")) % max(1, shard_count)
+
+
+def _store_codes(client: CentralClient) -> list[str]:
+    if settings.CCTV_LIVE_STORE_CODES.strip():
+        return [s.strip() for s in settings.CCTV_LIVE_STORE_CODES.split(",") if s.strip()]
+    return [str(r.get("store_code")) for r in client.list_stores(timeout_s=5.0) if r.get("store_code")]
+
+
+def _discover_cameras(
+    client: CentralClient, shard_index: int, shard_count: int
+) -> dict[tuple[str, str], tuple[str, dict[str, Any]]]:
+    """담당 shard의 ACTIVE CCTV 카메라 -> {(store_code, device_code): (stream_uri, config_json)}"""
+    out: dict[tuple[str, str], tuple[str, dict[str, Any]]] = {}
+    for store_code in _store_codes(client):
+        for d in client.list_devices(store_code, type="CCTV", timeout_s=5.0):
+            device_code = str(d.get("device_code") or "")
+            uri = str(d.get("stream_uri") or "").strip()
+            if not device_code or not uri or d.get("status") != "ACTIVE":
+                continue
+            if _shard_of(store_code, device_code, shard_count) != shard_index:
+                continue
+            config = d.get("config_json")
+            out[(store_code, device_code)] = (uri, config if isinstance(config, dict) else {})
+    return out
+
+
+class CameraSession:
+    """카메라 1대의 live 추론 상태.
+
+    - RtspReader가 최신 프레임만 유지 (추론이 밀리면 drop)
+    - begin -> handle(detector별 결과) -> end 순서로 _step_sessions가 구동
+    - detector는 engine 모델을 공유하고 상태(history/counter)만 카메라별로 fork
+    - 감지 시 ±clip_seconds 클립을 ring/feed로 기록, 인코딩/업로드/ingest는 engine.clip_exporter가 백그라운드 처리
+    """
+
+    def __init__(
+        self,
+        engine,
+        store_code: str,
+        device_code: str,
+        stream_uri: str,
+        config_json: dict[str, Any] | None = None,
+    ) -> None:
+        self.engine = engine
+        self.store_code = store_code
+        self.device_code = device_code
+        self.stream_uri = stream_uri
+        self.config_json = config_json or {}
+        self.fps = max(1, int(round(settings.CCTV_LIVE_SAMPLE_FPS)))
+        # 정지 장면이면 detector 생략 (device config_json["motion_gate"])
+        self.gate = engine.motion_gate_for(store_code, device_code, self.fps, config_json=self.config_json)
+
+        # 클립은 session ring에서 만들므로 detector 내부 frame_buffer는 사용하지 않음
+        violence = getattr(engine, "violence_classifier", None)
+        fall = getattr(engine, "fall_detector", None)
+        aux = getattr(engine, "auxiliary_detector", None)
+        self.detectors: dict[str, Any] = {}
+        if violence is not None:
+            backend = engine.violence_flow_backend_by_store.get(store_code)
+            self.detectors["VIOLENCE"] = violence.fork(flow_backend=backend)
+        if fall is not None:
+            self.detectors["FALL"] = fall.fork(buffer_len=0)
+        if aux is not None:
+            self.detectors["WHEELCHAIR"] = aux.fork(buffer_len=0)
+
+        self.clip_frames = engine.cctv_clip_seconds * self.fps
+        self.ring = FrameRing(self.clip_frames + 1, jpeg_quality=engine.cctv_ring_jpeg_quality)
+        self.clips: dict[str, tuple[ClipWriter, datetime, float]] = {}
+        self.last_event_at: dict[str, float] = {}
+        self.idx = 0
+        self.pending: list[tuple[int, Any]] = []
+        self.frame_ts = 0.0
+        self.t0 = 0.0
+
+        self.reader = RtspReader(
+            stream_uri,
+            name=f"{store_code}/{device_code}",
+            sample_fps=settings.CCTV_LIVE_SAMPLE_FPS,
+            backoff_min_s=settings.CCTV_RTSP_BACKOFF_MIN_S,
+            backoff_max_s=settings.CCTV_RTSP_BACKOFF_MAX_S,
+            transport=settings.CCTV_RTSP_TRANSPORT,
+        ).start()
+
+        # metrics
+        self.frames_processed = 0
+        self.events = 0
+        self.errors = 0
+        self.lag_ms = 0.0
+        self.infer_ms = 0.0
+        self.processed_fps = 0.0
+        self._window_start = time.monotonic()
+        self._window_frames = 0
+
+    @property
+    def key(self) -> str:
+        return f"{self.store_code}/{self.device_code}"
+
+    def close(self) -> None:
+        self.reader.stop()
+        for clip, _, _ in self.clips.values():
+            clip.close()
+        self.clips.clear()
+
+    def begin(self) -> bool:
+        """최신 프레임 1장을 가져와 ring/진행 중 클립에 반영. 처리할 프레임이 없으면 False.
+
+        detector에 넣을 프레임은 self.pending (움직임 게이트 통과분, 재개 시 워밍업 프레임 포함)
+        """
+        item = self.reader.read()
+        if item is None:
+            return False
+        _, frame, self.frame_ts = item
+        self.t0 = time.monotonic()
+
+        idx = self.idx
+        self.idx += 1
+        self.ring.append(idx, frame)
+
+        for event_type, clip_state in list(self.clips.items()):
+            clip = clip_state[0]
+            clip.feed(idx, frame)
+            if clip.done:
+                self._export(event_type, *self.clips.pop(event_type))
+
+        self.pending = self.gate.update(idx, frame)
+        return True
+
+    def handle(self, event_type: str, idx: int, frame, result: dict[str, Any] | Exception) -> None:
+        """프레임 idx의 detector 결과 처리 (batch 결과 라우팅 포함)."""
+        if isinstance(result, Exception):
+            self.errors += 1
+            live_logger.warning(f"[{self.key}] {event_type} 추론 실패: {result}")
+            return
+        if event_type == "VIOLENCE":
+            detected, confidence = bool(result.get("is_violence")), float(result.get("probability", 0.0))
+        elif event_type == "FALL":
+            detected, confidence = bool(result.get("is_fall")), 1.0
+        else:
+            detected, confidence = bool(result.get("detected")), 1.0
+        if detected:
+            self._on_detected(event_type, confidence, idx, frame)
+
+    def end(self) -> None:
+        done = time.monotonic()
+        self._observe(done, done - self.t0, done - self.frame_ts)
+        self.pending = []
+
+    def _on_detected(self, event_type: str, confidence: float, idx: int, frame) -> None:
+        if event_type in self.clips:
+            return
+        now_m = time.monotonic()
+        if now_m - self.last_event_at.get(event_type, -1e9) < settings.CCTV_LIVE_EVENT_COOLDOWN_S:
+            return
+        self.last_event_at[event_type] = now_m
+
+        now = datetime.now(timezone.utc)
+        subdir, prefix = _CLIP_NAMES[event_type]
+        filename = clip_filename(prefix, self.store_code, self.device_code, now)
+        h, w = frame.shape[:2]
+        clip = self.engine._start_event_clip(subdir, filename, self.fps, w, h, self.ring, idx)
+        self.clips[event_type] = (clip, now, confidence)
+        live_logger.info(f"[{self.key}] {event_type} 감지 (confidence={confidence:.2f})")
+
+    def _export(self, event_type: str, clip: ClipWriter, started_at: datetime, confidence: float) -> None:
+        clip.close()
+        self.events += 1
+        result = {
+            "confidence": confidence,
+            "local_clip_path": clip.path,
+            "clip_encoded": clip.encoded,
+            "extra_meta": {"source": "rtsp_live", "sample_fps": self.fps},
+        }
+        # 업로드/ingest는 clip_exporter에 예약만 하고 바로 반환
+        self.engine._process_cctv_event(
+            event_type=event_type,
+            inference_result=result,
+            now=started_at,
+            store_code=self.store_code,
+            device_code=self.device_code,
+            gcs_bucket=os.getenv("GCS_BUCKET_CCTV"),
+            blob_name=os.path.basename(clip.path),
+        )
+
+    def _observe(self, now: float, infer_s: float, lag_s: float) -> None:
+        # 지수이동평균 (alpha=0.2)
+        self.infer_ms += 0.2 * (infer_s * 1000.0 - self.infer_ms)
+        self.lag_ms += 0.2 * (lag_s * 1000.0 - self.lag_ms)
+        self.frames_processed += 1
+        self._window_frames += 1
+        if now - self._window_start >= 1.0:
+            self.processed_fps = self._window_frames / (now - self._window_start)
+            self._window_start, self._window_frames = now, 0
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            **self.reader.stats(),
+            "frames_processed": self.frames_processed,
+            "processed_fps": round(self.processed_fps, 2),
+            "lag_ms": round(self.lag_ms, 1),
+            "infer_ms": round(self.infer_ms, 1),
+            "events": self.events,
+            "errors": self.errors,
+            "ring_bytes": self.ring.nbytes,
+            "motion_gate": self.gate.stats(),
+        }
+
+
+def _step_sessions(sessions: list[CameraSession], yolo_batch: int) -> bool:
+    """새 프레임이 있는 카메라들을 한 번에 처리.
+
+    - 낙상/Auxiliary: 카메라들의 프레임을 모델별 predict 1회(최대 yolo_batch)로 묶고 결과를 카메라별 상태로 라우팅
+    - 폭력: 카메라별 optical flow 상태라 개별 처리
+    - 움직임 게이트에 걸린 카메라는 detector를 건너뜀 (ring/클립 기록은 계속)
+    """
+    ready = [s for s in sessions if s.begin()]
+    if not ready:
+        return False
+
+    # 같은 INPUT_SPEC의 YOLO끼리 카메라 프레임별 전처리 텐서 공유 (이번 step 한정)
+    n_frames = sum(len(s.pending) for s in ready)
+    cache = FrameTensorCache(max(1, n_frames) * len(_BATCHED_EVENTS))
+
+    for event_type in _BATCHED_EVENTS:
+        items = [(s, i, f) for s in ready if event_type in s.detectors for i, f in s.pending]
+        if not items:
+            continue
+        results = process_frames_batch(
+            [(s.detectors[event_type], f) for s, _, f in items],
+            yolo_batch,
+            cache=cache,
+            keys=[(s.key, i) for s, i, _ in items],
+        )
+        for (s, i, f), result in zip(items, results):
+            s.handle(event_type, i, f, result)
+
+    for s in ready:
+        detector = s.detectors.get("VIOLENCE")
+        if detector is not None:
+            for i, f in s.pending:
+                try:
+                    result = detector.process_frame(f)
+                except Exception as e:
+                    result = e
+                s.handle("VIOLENCE", i, f, result)
+        s.end()
+    return True
+
+
+def _write_metrics(engine, shard_index: int, sessions: dict[tuple[str, str], CameraSession]) -> None:
+    d = _metrics_dir()
+    os.makedirs(d, exist_ok=True)
+    data = {
+        "shard": shard_index,
+        "pid": os.getpid(),
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+        "cameras": {s.key: s.metrics() for s in sessions.values()},
+        "clip_export": engine.clip_exporter.snapshot(),
+    }
+    path = os.path.join(d, f"metrics_{shard_index}.json")
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def read_live_metrics() -> dict[str, Any]:
+    """모든 shard 프로세스의 metrics 파일 취합."""
+    d = _metrics_dir()
+    shards = []
+    if os.path.isdir(d):
+        for name in sorted(os.listdir(d)):
+            if not (name.startswith("metrics_") and name.endswith(".json")):
+                continue
+            try:
+                with open(os.path.join(d, name), encoding="utf-8") as f:
+                    shards.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    cameras = {k: v for s in shards for k, v in s.get("cameras", {}).items()}
+    clip_export = {str(s.get("shard")): s.get("clip_export", {}) for s in shards}
+    return {"shards": len(shards), "cameras": cameras, "clip_export": clip_export}
+
+
+def _sync_sessions(
+    engine,
+    client: CentralClient,
+    sessions: dict[tuple[str, str], CameraSession],
+    shard_index: int,
+    shard_count: int,
+) -> None:
+    try:
+        cameras = _discover_cameras(client, shard_index, shard_count)
+    except CentralClientError as e:
+        live_logger.warning(f"CCTV device 목록 조회 실패: {e}")
+        return
+
+    # stream_uri나 config_json이 바뀐 카메라는 세션 재생성
+    for key in list(sessions):
+        s = sessions[key]
+        if cameras.get(key) != (s.stream_uri, s.config_json):
+            sessions.pop(key).close()
+    for key, (uri, config) in cameras.items():
+        if key not in sessions:
+            sessions[key] = CameraSession(engine, key[0], key[1], uri, config_json=config)
+    live_logger.info(f"shard {shard_index}/{shard_count}: cameras={len(sessions)}")
+
+
+def run_cctv_live(
+    engine,
+    *,
+    shard_index: int = 0,
+    shard_count: int = 1,
+    stop: threading.Event | None = None,
+) -> None:
+    """RTSP live 추론 루프 (shard 1개).
+
+    - Central의 CCTV device(stream_uri) 중 담당 shard를 주기적으로 동기화
+    - 카메라별 reader 스레드가 디코딩, 이 루프가 카메라들의 최신 프레임을 모아 batch 추론
+    - 카메라별 fps/lag metrics를 CACHE_DIR/cctv_live/metrics_<shard>.json에 기록
+    """
+    stop = stop or threading.Event()
+    engine.ensure_cctv_models()
+    if not any(getattr(engine, a, None) is not None for a in ("violence_classifier", "fall_detector", "auxiliary_detector")):
+        live_logger.warning("CCTV 모델이 없어 live ingestion을 시작하지 않습니다.")
+        return
+
+    client = get_central_client()
+    sessions: dict[tuple[str, str], CameraSession] = {}
+    next_refresh = 0.0
+    next_metrics = 0.0
+
+    try:
+        while not stop.is_set():
+            now = time.monotonic()
+            if now >= next_refresh:
+                _sync_sessions(engine, client, sessions, shard_index, shard_count)
+                next_refresh = now + settings.CCTV_LIVE_REFRESH_S
+
+            progressed = _step_sessions(list(sessions.values()), engine.cctv_yolo_batch)
+
+            if now >= next_metrics:
+                try:
+                    _write_metrics(engine, shard_index, sessions)
+                except OSError as e:
+                    live_logger.warning(f"metrics 기록 실패: {e}")
+                next_metrics = now + settings.CCTV_LIVE_METRICS_INTERVAL_S
+
+            if not progressed:
+                stop.wait(0.005)
+    finally:
+        for s in sessions.values():
+            s.close()
+
+
+def _run_shard(shard_index: int, shard_count: int) -> None:
+    from app.services.engine import InferenceEngine
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    eng = InferenceEngine()
+    eng.startup_load()
+    run_cctv_live(eng, shard_index=shard_index, shard_count=shard_count)
+
+
+def main() -> None:
+    # 별도 프로세스로 live ingestion만 띄우는 용도
+    ap = argparse.ArgumentParser(description="CCTV RTSP live ingestion")
+    ap.add_argument("--procs", type=int, default=settings.CCTV_LIVE_PROCS, help="shard 프로세스 수 (>1이면 supervisor)")
+    ap.add_argument("--shard-index", type=int, default=settings.CCTV_LIVE_SHARD_INDEX)
+    ap.add_argument("--shard-count", type=int, default=settings.CCTV_LIVE_SHARD_COUNT)
+    args = ap.parse_args()
+
+    if args.procs <= 1:
+        _run_shard(args.shard_index, args.shard_count)
+        return
+
+    # 프로세스별 모델/CUDA context를 따로 갖도록 spawn, 죽은 shard는 재기동
+    ctx = mp.get_context("spawn")
+    procs: dict[int, mp.Process] = {}
+    while True:
+        for i in range(args.procs):
+            p = procs.get(i)
+            if p is None or not p.is_alive():
+                if p is not None:
+                    live_logger.warning(f"shard {i} exited (code={p.exitcode}), restarting")
+                p = ctx.Process(target=_run_shard, args=(i, args.procs), name=f"cctv-live-{i}", daemon=False)
+                p.start()
+                procs[i] = p
+        time.sleep(settings.CCTV_RTSP_BACKOFF_MIN_S * 5)
+
+
+if __name__ == "__main__":
+    main()
@@ -17,11 +17,17 @@ class Settings(BaseSettings):
 
     CENTRAL_BASE_URL: str | None = None
     CENTRAL_ADMIN_KEY: str | None = None
+    CENTRAL_HTTP2: int = 1                      # h2 패키지가 있으면 HTTP/2 사용
+    CENTRAL_HTTP_MAX_CONNECTIONS: int = 20
+    CENTRAL_HTTP_MAX_KEEPALIVE: int = 10
+    CENTRAL_HTTP_KEEPALIVE_S: float = 60.0
 
     PROTOTYPE_INDEX_PATH: str | None = None
     PROTOTYPE_INDEX_GCS_URI: str | None = None
 
     CACHE_DIR: str = "/opt/ai-inference/cache"
+    TRAY_SAVE_FRAME: int = 1                    # 1이면 CACHE_DIR/tray에 디버그용 원본 프레임 저장
+    TRAY_SAVE_FRAME_ASYNC: int = 1              # 1이면 저장을 백그라운드 스레드로 (추론 경로에서 디스크 I/O 제거)
 
     # Model artifacts
     YOLO_MODEL_PATH: str | None = None          # 예: /opt/models/yolo8s-seg.pt
@@ -38,9 +44,36 @@ class Settings(BaseSettings):
     UNKNOWN_DIST_TH: float = 0.35               # UNKNOWN 판단(예시는 임의, 데이터로 튜닝)
     OVERLAP_BLOCK_TH: float = 0.25              # 인스턴스 overlap 차단
 
+    # Tray micro-batching (동시 요청을 모아 YOLO/ResNet batch 추론)
+    TRAY_BATCH_MAX_SIZE: int = 8                # 1이면 batching 비활성
+    TRAY_BATCH_MAX_WAIT_MS: float = 5.0         # 첫 요청 후 추가 요청을 기다리는 최대 시간
+
     # Worker (Central Job polling)
     AI_WORKER_MODE: int = 0                     # 1이면 FastAPI startup에서 worker thread 기동
     WORKER_ID: str = "ai-worker-1"             # 중앙 Job claim에 사용
-    POLL_INTERVAL_S: float = 0.5                # job 없을 때 sleep
+    POLL_INTERVAL_S: float = 0.5                # job 없을 때 sleep (long-poll 미사용/오류 시)
+    WORKER_LONG_POLL_S: float = 0.0             # >0이면 long-poll claim 사용 (Central에 /claim/wait 필요), 0이면 기존 polling
+
+    # Worker pipeline (claim/다운로드/추론/complete 단계 분리)
+    AI_WORKER_PIPELINE: int = 0                 # 1이면 run_worker_pipeline 사용
+    WORKER_PREFETCH_THREADS: int = 2            # GCS 다운로드/디코드 동시성
+    WORKER_PREFETCH_QUEUE: int = 4              # 추론 대기 job 최대 개수 (backpressure)
+    WORKER_CLAIM_BATCH: int = 4                 # claim 1회당 최대 job 수 (queue 여유분까지만)
+    WORKER_COMPUTE_THREADS: int = 1             # 추론 스레드 수 (batcher 사용 시 >1이면 batch 형성)
+    WORKER_COMPLETE_THREADS: int = 2            # Central complete 비동기 전송 동시성
+
+    # CCTV live (RTSP) ingestion
+    CCTV_LIVE_MODE: int = 0                     # 1이면 FastAPI startup에서 live 스레드 기동 (운영은 별도 프로세스 권장)
+    CCTV_LIVE_STORE_CODES: str = ""             # 콤마 구분 store_code, 비우면 전체 store
+    CCTV_LIVE_PROCS: int = 1                    # python -m app.cctv_live 실행 시 shard 프로세스 수
+    CCTV_LIVE_SHARD_INDEX: int = 0              # 단일 shard 실행 시 담당 shard
+    CCTV_LIVE_SHARD_COUNT: int = 1
+    CCTV_LIVE_SAMPLE_FPS: float = 10.0          # 카메라별 추론 프레임레이트 (초과분은 drop)
+    CCTV_LIVE_REFRESH_S: float = 60.0           # Central device 목록 재조회 주기
+    CCTV_LIVE_EVENT_COOLDOWN_S: float = 30.0    # 같은 카메라/이벤트 타입 재발행 최소 간격
+    CCTV_LIVE_METRICS_INTERVAL_S: float = 5.0   # CACHE_DIR/cctv_live/metrics_<shard>.json 갱신 주기
+    CCTV_RTSP_TRANSPORT: str = "tcp"
+    CCTV_RTSP_BACKOFF_MIN_S: float = 1.0        # 재연결 backoff (지수 증가)
+    CCTV_RTSP_BACKOFF_MAX_S: float = 30.0
 
 settings = Settings()
@@ -2,7 +2,7 @@ import logging
 
 from fastapi import FastAPI
 
-from app.api import router, engine
+from app.api import router, engine, tray_batcher
 from app.core.config import settings
 
 # 로깅 설정 (uvicorn 스타일)
@@ -17,9 +17,23 @@ logging.getLogger("httpx").setLevel(logging.WARNING)
 def _start_worker_in_background() -> None:
     # lazy import to avoid cyclic imports
     import threading
-    from app.worker import run_worker_loop
+    from app.worker import run_worker_loop, run_worker_pipeline
 
-    t = threading.Thread(target=run_worker_loop, args=(engine,), name="central-job-worker", daemon=True)
+    target = run_worker_pipeline if settings.AI_WORKER_PIPELINE else run_worker_loop
+    t = threading.Thread(target=target, args=(engine,), kwargs={"batcher": tray_batcher}, name="central-job-worker", daemon=True)
+    t.start()
+
+def _start_cctv_live_in_background() -> None:
+    import threading
+    from app.cctv_live import run_cctv_live
+
+    t = threading.Thread(
+        target=run_cctv_live,
+        args=(engine,),
+        kwargs={"shard_index": settings.CCTV_LIVE_SHARD_INDEX, "shard_count": settings.CCTV_LIVE_SHARD_COUNT},
+        name="cctv-live",
+        daemon=True,
+    )
     t.start()
 
 def create_app() -> FastAPI:
@@ -31,6 +45,8 @@ def create_app() -> FastAPI:
         engine.startup_load()
         if settings.AI_WORKER_MODE:
             _start_worker_in_background()
+        if settings.CCTV_LIVE_MODE:
+            _start_cctv_live_in_background()
 
     return app
 
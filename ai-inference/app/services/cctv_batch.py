@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Hashable, Iterable, Iterator, TypeVar
+
+import numpy as np
+
+from app.services.model_registry import FrameTensorCache, input_spec_of, results_to_frame
+
+T = TypeVar("T")
+
+
+def iter_chunks(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """items를 최대 size개씩 묶어서 반환 (마지막 묶음은 짧을 수 있음)."""
+    size = max(1, int(size))
+    chunk: list[T] = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_frames_batch(
+    pairs: list[tuple[Any, np.ndarray]],
+    max_batch: int = 8,
+    cache: FrameTensorCache | None = None,
+    keys: list[Hashable] | None = None,
+) -> list[dict[str, Any] | Exception]:
+    """(detector, frame) 목록을 모델별 predict 1회(최대 max_batch)로 처리.
+
+    - detector: FallDownDetection / AuxiliaryTools (또는 fork()된 카메라별 인스턴스)
+    - 같은 model 객체를 공유하는 detector끼리 묶어서 predict_batch 호출
+      (predict_batch가 model_lock으로 직렬화 -> 다른 카메라 스레드에서 동시에 호출해도 안전)
+    - 결과는 입력 순서대로 각 detector.apply_result로 라우팅 (fall_counter 등 상태는 detector별)
+    - 같은 detector가 여러 번 나오면 입력 순서대로 상태가 갱신됨 (클립의 연속 프레임)
+    - cache/keys가 주어지면 detector.INPUT_SPEC 기준 전처리 텐서를 프레임별로 공유 (keys[i]: 프레임 식별자),
+      결과 좌표는 results_to_frame으로 원본 프레임 기준으로 변환
+    - 반환: 입력 순서의 결과 dict 또는 Exception
+    """
+    out: list[dict[str, Any] | Exception | None] = [None] * len(pairs)
+
+    groups: dict[int, list[int]] = {}
+    for i, (det, _) in enumerate(pairs):
+        groups.setdefault(id(det.model), []).append(i)
+
+    for idxs in groups.values():
+        for chunk in iter_chunks(idxs, max_batch):
+            det0 = pairs[chunk[0]][0]
+            spec = input_spec_of(det0)
+            try:
+                if cache is not None and keys is not None and spec is not None:
+                    inputs = cache.batch([(keys[i], pairs[i][1]) for i in chunk], spec)
+                    # 텐서 입력 결과는 letterbox 좌표 -> 원본 프레임 좌표로
+                    results = results_to_frame(det0.predict_batch(inputs), [pairs[i][1] for i in chunk], spec)
+                else:
+                    results = det0.predict_batch([pairs[i][1] for i in chunk])
+            except Exception as e:
+                for i in chunk:
+                    out[i] = e
+                continue
+            for i, res in zip(chunk, results):
+                det, frame = pairs[i]
+                try:
+                    out[i] = det.apply_result(frame, res)
+                except Exception as e:
+                    out[i] = e
+
+    return out  # type: ignore[return-value]
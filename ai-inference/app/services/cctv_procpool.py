@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from app.services.cctv_batch import iter_chunks, process_frames_batch
+from app.services.motion_gate import MotionGate
+
+proc_logger = logging.getLogger("cctv.procpool")
+
+# 워커 종류 -> 담당 이벤트 타입 (낙상/Auxiliary는 한 프로세스에서 전처리 텐서 공유)
+WORKER_EVENTS = {
+    "VIOLENCE": ("VIOLENCE",),
+    "YOLO": ("FALL", "WHEELCHAIR"),
+}
+_YOLO_FLAGS = {"FALL": "is_fall", "WHEELCHAIR": "detected"}
+_VIOLENCE_FRAME_INTERVAL = 3  # infer_cctv 스레드 모드와 동일
+
+
+# =========================
+# 워커 프로세스
+# =========================
+class _SlotFrames:
+    """cmd 큐의 ("frame", idx, slot)을 공유 메모리 view (idx, frame)으로 변환.
+
+    - 최근 hold개 프레임까지만 잡고 있다가 credit 반환 (YOLO batch는 batch 크기만큼 hold)
+    - 부모는 credit이 있어야 slot을 덮어쓰므로 view를 복사 없이 사용 가능
+    """
+
+    def __init__(self, cmd_q, slots: np.ndarray, credits, hold: int) -> None:
+        self.cmd_q = cmd_q
+        self.slots = slots
+        self.credits = credits
+        self.hold = max(1, hold)
+        self.ended = False
+        self._held = 0
+
+    def __iter__(self) -> Iterator[tuple[int, np.ndarray]]:
+        while True:
+            cmd = self.cmd_q.get()
+            if cmd[0] == "end":
+                self.ended = True
+                return
+            _, idx, slot = cmd
+            if self._held >= self.hold:
+                self.credits.release()
+                self._held -= 1
+            self._held += 1
+            yield idx, self.slots[slot]
+
+    def finish(self) -> None:
+        """조기 종료 시 남은 프레임을 버리고 credit 반환."""
+        for _ in range(self._held):
+            self.credits.release()
+        self._held = 0
+        while not self.ended:
+            cmd = self.cmd_q.get()
+            if cmd[0] == "end":
+                self.ended = True
+            else:
+                self.credits.release()
+
+
+def _load_worker_detectors(kind: str, config: dict[str, Any]) -> dict[str, Any]:
+    """프로세스당 1회 모델 로딩."""
+    detectors: dict[str, Any] = {}
+    if kind == "VIOLENCE":
+        from app.util.preprocessing.violence_classification import ViolenceClassification
+        detectors["VIOLENCE"] = ViolenceClassification(flow_backend=config.get("flow_backend", "farneback"))
+    else:
+        if "FALL" in config["events"]:
+            from app.util.preprocessing.fall_down_detection import FallDownDetection
+            detectors["FALL"] = FallDownDetection(buffer_len=0)
+        if "WHEELCHAIR" in config["events"]:
+            from app.util.preprocessing.auxiliary_tools import AuxiliaryTools
+            detectors["WHEELCHAIR"] = AuxiliaryTools(buffer_len=0)
+    return detectors
+
+
+def _scan_violence(base, frames: _SlotFrames, params: dict[str, Any], out_q) -> dict[str, Any]:
+    backend = params.get("flow_backend") or base.flow_backend
+    classifier = base if backend == base.flow_backend else base.fork(flow_backend=backend)
+    classifier._reset()
+
+    probabilities = []
+    event_idx = None
+    for i, frame in frames:
+        if i % _VIOLENCE_FRAME_INTERVAL != 0:
+            continue
+        result = classifier.process_frame(frame)
+        if result.get("ready"):
+            prob = result.get("probability", 0.0)
+            probabilities.append(prob)
+            if prob >= classifier.threshold and event_idx is None:
+                event_idx = i
+                out_q.put(("event", "VIOLENCE", i))
+
+    if not probabilities:
+        return {"VIOLENCE": None}
+    violence_count = sum(1 for p in probabilities if p >= classifier.threshold)
+    return {"VIOLENCE": {
+        "event_idx": event_idx,
+        "confidence": float(max(probabilities)),
+        "avg_probability": float(np.mean(probabilities)),
+        "violence_ratio": float(violence_count / len(probabilities)),
+    }}
+
+
+def _scan_yolo(detectors: dict[str, Any], frames: _SlotFrames, params: dict[str, Any], out_q) -> dict[str, Any]:
+    from app.services.model_registry import FrameTensorCache
+
+    active = {et: d.fork(buffer_len=0) for et, d in detectors.items() if et in params["events"]}
+    batch = params["yolo_batch"]
+    cache = FrameTensorCache(2 * batch * max(1, len(active))) if params.get("shared_preprocess") else None
+    found: dict[str, int] = {}
+
+    for chunk in iter_chunks(frames, batch):
+        pending = [et for et in active if et not in found]
+        if not pending:
+            break
+        pairs = [(active[et], f) for et in pending for _, f in chunk]
+        keys = [i for _ in pending for i, _ in chunk]
+        results = process_frames_batch(pairs, batch, cache=cache, keys=keys)
+        for n, et in enumerate(pending):
+            for (i, _), result in zip(chunk, results[n * len(chunk):(n + 1) * len(chunk)]):
+                if isinstance(result, Exception):
+                    raise result
+                if result.get(_YOLO_FLAGS[et]):
+                    found[et] = i
+                    out_q.put(("event", et, i))
+                    break
+
+    return {et: {"event_idx": found.get(et)} for et in active}
+
+
+def _worker_main(kind: str, config: dict[str, Any], cmd_q, out_q, credits) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    try:
+        detectors = _load_worker_detectors(kind, config)
+    except Exception as e:
+        out_q.put(("ready", kind, f"{type(e).__name__}: {e}"))
+        return
+    out_q.put(("ready", kind, None))
+
+    while True:
+        cmd = cmd_q.get()
+        if cmd is None:
+            return
+        _, shm_name, shape, params = cmd
+        shm = shared_memory.SharedMemory(name=shm_name)
+        slots = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        frames = _SlotFrames(cmd_q, slots, credits, hold=params["yolo_batch"] if kind == "YOLO" else 1)
+        try:
+            if kind == "VIOLENCE":
+                result: Any = _scan_violence(detectors["VIOLENCE"], frames, params, out_q)
+            else:
+                result = _scan_yolo(detectors, frames, params, out_q)
+        except Exception as e:
+            result = f"{type(e).__name__}: {e}"
+        finally:
+            frames.finish()
+            del frames, slots
+            shm.close()
+        out_q.put(("done", kind, result))
+
+
+# =========================
+# 부모 프로세스
+# =========================
+class _Worker:
+    def __init__(self, ctx, kind: str, config: dict[str, Any], out_q, n_slots: int) -> None:
+        self.kind = kind
+        self.cmd_q = ctx.Queue()
+        self.credits = ctx.Semaphore(n_slots)
+        self.proc = ctx.Process(
+            target=_worker_main,
+            args=(kind, config, self.cmd_q, out_q, self.credits),
+            name=f"cctv-{kind.lower()}",
+            daemon=True,
+        )
+
+    def acquire(self) -> bool:
+        while not self.credits.acquire(timeout=0.5):
+            if not self.proc.is_alive():
+                return False
+        return True
+
+
+class CctvProcessPool:
+    """CCTV detector를 별도 프로세스에서 실행 (GIL 회피).
+
+    - 워커: VIOLENCE 1개 + YOLO(낙상/Auxiliary) 1개, 모델은 프로세스 시작 시 1회 로딩
+    - 프레임은 요청마다 만든 shared_memory slot ring으로 전달 (pickle 없음), 큐에는 (idx, slot)만
+    - 워커별 semaphore credit으로 backpressure (slot은 모든 워커가 다 쓴 뒤에만 덮어씀)
+    - 감지 시점은 즉시 ("event") 알려서 부모가 ring/feed로 클립 기록, 요청 단위로 직렬 실행
+    """
+
+    def __init__(
+        self,
+        events: Iterable[str],
+        n_slots: int = 16,
+        yolo_batch: int = 8,
+        shared_preprocess: bool = True,
+        flow_backend: str = "farneback",
+    ) -> None:
+        self.events = tuple(events)
+        self.yolo_batch = max(1, yolo_batch)
+        self.n_slots = max(n_slots, self.yolo_batch + 2)
+        self.shared_preprocess = shared_preprocess
+        self.flow_backend = flow_backend
+        self._lock = threading.Lock()
+        self._ctx = mp.get_context("spawn")
+        self._out_q = self._ctx.Queue()
+        self.workers: dict[str, _Worker] = {}
+
+    def start(self, timeout_s: float = 600.0) -> "CctvProcessPool":
+        for kind, kind_events in WORKER_EVENTS.items():
+            events = [e for e in kind_events if e in self.events]
+            if not events:
+                continue
+            config = {"events": events, "flow_backend": self.flow_backend}
+            self.workers[kind] = _Worker(self._ctx, kind, config, self._out_q, self.n_slots)
+        for w in self.workers.values():
+            w.proc.start()
+
+        waiting = set(self.workers)
+        while waiting:
+            msg = self._out_q.get(timeout=timeout_s)
+            if msg[0] != "ready":
+                continue
+            waiting.discard(msg[1])
+            if msg[2] is not None:
+                proc_logger.warning(f"{msg[1]} 워커 모델 로딩 실패: {msg[2]}")
+                self.workers.pop(msg[1]).proc.join(timeout=5)
+        proc_logger.info(f"CCTV process pool 시작: {list(self.workers)} (slots={self.n_slots})")
+        return self
+
+    @property
+    def alive(self) -> bool:
+        return bool(self.workers) and all(w.proc.is_alive() for w in self.workers.values())
+
+    def close(self) -> None:
+        for w in self.workers.values():
+            w.cmd_q.put(None)
+        for w in self.workers.values():
+            w.proc.join(timeout=5)
+            if w.proc.is_alive():
+                w.proc.terminate()
+        self.workers.clear()
+
+    def run(
+        self,
+        frames: Iterable[np.ndarray],
+        first_shape: tuple[int, ...],
+        events: Iterable[str],
+        on_frame: Callable[[int, np.ndarray], None],
+        on_event: Callable[[str, int], None],
+        gate: MotionGate | None = None,
+        flow_backend: str | None = None,
+    ) -> dict[str, Any]:
+        """프레임을 워커들에 분배하고 이벤트 타입별 요약(또는 Exception) 반환.
+
+        - on_frame(idx, frame): 모든 디코딩 프레임 (ring 기록/클립 feed)
+        - on_event(event_type, idx): 워커가 감지한 시점 (부모 스레드에서 호출)
+        """
+        events = [e for e in events if e in self.events]
+        with self._lock:
+            workers = [w for k, w in self.workers.items() if any(e in events for e in WORKER_EVENTS[k])]
+            h, w_, c = first_shape
+            shape = (self.n_slots, h, w_, c)
+            shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+            try:
+                slots = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+                params = {
+                    "events": events,
+                    "yolo_batch": self.yolo_batch,
+                    "shared_preprocess": self.shared_preprocess,
+                    "flow_backend": flow_backend,
+                }
+                for wk in workers:
+                    wk.cmd_q.put(("begin", shm.name, shape, params))
+
+                seq = 0
+                alive = list(workers)
+                for idx, frame in enumerate(frames):
+                    on_frame(idx, frame)
+                    items = gate.update(idx, frame) if gate is not None else [(idx, frame)]
+                    for i, f in items:
+                        alive = [wk for wk in alive if wk.acquire()]
+                        if not alive:
+                            break
+                        slot = seq % self.n_slots
+                        seq += 1
+                        if f.shape != (h, w_, c):
+                            f = cv2.resize(f, (w_, h))
+                        slots[slot] = f
+                        for wk in alive:
+                            wk.cmd_q.put(("frame", i, slot))
+                    self._drain_events(on_event, {}, block=False)
+
+                for wk in workers:
+                    wk.cmd_q.put(("end",))
+                done: dict[str, Any] = {}
+                while len(done) < len(workers):
+                    if not self._drain_events(on_event, done, block=True):
+                        missing = [wk for wk in workers if wk.kind not in done and not wk.proc.is_alive()]
+                        for wk in missing:
+                            done[wk.kind] = RuntimeError(f"{wk.kind} 워커 프로세스 종료")
+            finally:
+                del slots
+                shm.close()
+                shm.unlink()
+
+        outcomes: dict[str, Any] = {}
+        for kind, result in done.items():
+            for et in WORKER_EVENTS[kind]:
+                if et not in events:
+                    continue
+                if isinstance(result, Exception):
+                    outcomes[et] = result
+                elif isinstance(result, str):
+                    outcomes[et] = RuntimeError(result)
+                else:
+                    outcomes[et] = result.get(et)
+        return outcomes
+
+    def _drain_events(self, on_event, done: dict[str, Any], block: bool) -> bool:
+        """out 큐 처리. block이면 최대 1초 대기, 받은 메시지가 없으면 False."""
+        got = False
+        while True:
+            try:
+                msg = self._out_q.get(timeout=1.0) if block and not got else self._out_q.get_nowait()
+            except queue.Empty:
+                return got
+            got = True
+            if msg[0] == "event":
+                on_event(msg[1], msg[2])
+            elif msg[0] == "done":
+                done[msg[1]] = msg[2]
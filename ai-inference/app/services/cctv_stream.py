@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import logging
+import queue
+import re
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from app.services.clip_exporter import ClipExporter
+from app.services.motion_gate import MotionGate
+
+cctv_logger = logging.getLogger("cctv")
+
+_END = object()
+
+
+class FrameRing:
+    """카메라별 최근 프레임 ring buffer (스레드 안전). 모든 detector와 클립 export가 공유.
+
+    - 클립 export에 필요한 pre-event 구간만 유지하므로 클립 길이와 무관하게 메모리가 bounded
+    - jpeg_quality > 0이면 프레임을 JPEG로 압축 보관 (원본 대비 1/10~1/20), 0이면 원본 그대로
+    - nbytes: 현재 보관 중인 프레임 메모리 (카메라당 1회만 계산됨)
+    """
+
+    def __init__(self, maxlen: int, jpeg_quality: int = 0) -> None:
+        self._buf: deque[tuple[int, np.ndarray]] = deque(maxlen=max(1, int(maxlen)))
+        self._lock = threading.Lock()
+        self.jpeg_quality = int(jpeg_quality)
+        self.nbytes = 0
+
+    @property
+    def maxlen(self) -> int:
+        return int(self._buf.maxlen or 0)
+
+    def append(self, idx: int, frame: np.ndarray) -> None:
+        if self.jpeg_quality > 0:
+            ok, enc = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+            if ok:
+                frame = enc
+        with self._lock:
+            if len(self._buf) == self._buf.maxlen:
+                self.nbytes -= self._buf[0][1].nbytes
+            self._buf.append((idx, frame))
+            self.nbytes += frame.nbytes
+
+    def range(self, start: int, end: int, decode: bool = True) -> list[tuple[int, np.ndarray]]:
+        """start <= idx < end 인 프레임 (남아 있는 것만).
+
+        decode=False면 JPEG 상태 그대로 반환 (ClipExporter가 인코딩 스레드에서 decode_ring_frame)
+        """
+        with self._lock:
+            items = [(i, f) for i, f in self._buf if start <= i < end]
+        if decode:
+            items = [(i, decode_ring_frame(f)) for i, f in items]
+        return items
+
+
+def decode_ring_frame(frame: np.ndarray) -> np.ndarray:
+    """FrameRing 보관 형식(원본 (H, W, 3) 또는 JPEG 1-D 버퍼) -> BGR 프레임"""
+    if frame.ndim == 1:
+        return cv2.imdecode(frame, cv2.IMREAD_COLOR)
+    return frame
+
+
+class ClipWriter:
+    """이벤트 클립을 스트리밍으로 기록.
+
+    - 시작 시 ring buffer에서 pre-event 프레임(+ ring에 남은 이후 프레임)을 기록
+    - 이후 도착하는 프레임을 end_idx까지 feed()로 바로 기록 (메모리에 쌓지 않음)
+    - sink(ClipExporter)가 있으면 인코딩은 export 스레드에서, 없으면 호출 스레드에서 바로 인코딩
+    - encoded: 인코딩 완료 시 path가 설정되는 Future
+    """
+
+    def __init__(
+        self,
+        path: str,
+        fps: int,
+        size: tuple[int, int],
+        ring: FrameRing,
+        event_idx: int,
+        pre_frames: int,
+        post_frames: int,
+        sink: ClipExporter | None = None,
+    ) -> None:
+        self.path = path
+        self.end_idx = event_idx + post_frames
+        self._last_idx = -1
+        if sink is not None:
+            self._out = sink.open(path, fps, size)
+            self.encoded: Future = self._out.encoded
+        else:
+            self._out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+            self.encoded = Future()
+        # ring에 이미 있는 감지 이후 프레임도 기록 (감지가 디코딩보다 늦게 도착하는 process 모드)
+        # export 스레드로 넘길 때는 JPEG 그대로 (decode도 인코딩 스레드에서)
+        for i, f in ring.range(max(0, event_idx - pre_frames), self.end_idx, decode=sink is None):
+            self._write(i, f)
+
+    @property
+    def done(self) -> bool:
+        return self._out is None or self._last_idx >= self.end_idx - 1
+
+    def _write(self, idx: int, frame: np.ndarray) -> None:
+        if idx <= self._last_idx or idx >= self.end_idx:
+            return
+        self._out.write(frame)
+        self._last_idx = idx
+
+    def feed(self, idx: int, frame: np.ndarray) -> None:
+        if self._out is None:
+            return
+        self._write(idx, frame)
+        if self.done:
+            self.close()
+
+    def close(self) -> None:
+        if self._out is None:
+            return
+        if isinstance(self._out, cv2.VideoWriter):
+            self._out.release()
+            self.encoded.set_result(self.path)
+        else:
+            self._out.close()
+        self._out = None
+
+
+class EventClips:
+    """fan_out producer가 모든 프레임을 기록하는 이벤트 클립 모음 (thread 모드, 요청 1건 단위).
+
+    - detector(consumer)는 start()로 클립을 등록만 하고, post-event 프레임은 producer가 append()에서 feed
+      -> 움직임 게이트로 detector에 보내지 않은 프레임도 클립에 빠짐없이 들어감
+    - ring 기록과 클립 시작/feed를 같은 lock에서 처리 (시작 시점의 ring 구간과 이후 feed 사이에 빠지는 프레임 없음)
+    - pending: 아직 post-event 구간이 남은 클립이 있으면 True (detector가 모두 끝나도 producer는 계속 디코딩)
+    """
+
+    def __init__(self, ring: FrameRing) -> None:
+        self.ring = ring
+        self._clips: list[ClipWriter] = []
+        self._lock = threading.Lock()
+
+    def append(self, idx: int, frame: np.ndarray) -> None:
+        with self._lock:
+            self.ring.append(idx, frame)
+            for clip in self._clips:
+                clip.feed(idx, frame)
+
+    def start(self, open_clip: Callable[[FrameRing], ClipWriter]) -> ClipWriter:
+        """open_clip(ring) -> ClipWriter 를 lock 안에서 만들고 등록."""
+        with self._lock:
+            clip = open_clip(self.ring)
+            self._clips.append(clip)
+            return clip
+
+    @property
+    def pending(self) -> bool:
+        with self._lock:
+            return any(not clip.done for clip in self._clips)
+
+    def close(self) -> None:
+        with self._lock:
+            for clip in self._clips:
+                clip.close()
+
+
+def clip_filename(prefix: str, store_code: str, device_code: str, now: datetime) -> str:
+    """이벤트 클립 파일/GCS blob 이름.
+
+    카메라(store, device) + ms 시각 + 임의 suffix를 넣어, 여러 카메라가 같은 초에 같은 이벤트를 내도
+    로컬 경로/blob이 겹치지 않음.
+    """
+    parts = [prefix, store_code, device_code, now.strftime("%Y%m%d_%H%M%S_%f")[:-3], uuid.uuid4().hex[:8]]
+    return "_".join(re.sub(r"[^A-Za-z0-9_-]", "-", str(p)) for p in parts if p) + ".mp4"
+
+
+def iter_video(path: str) -> tuple[Iterator[np.ndarray], int, int, int]:
+    """비디오를 프레임 단위로 디코딩하는 generator + (fps, width, height)."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        cap.release()
+        return iter(()), 30, 0, 0
+
+    fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    def _gen() -> Iterator[np.ndarray]:
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+        finally:
+            cap.release()
+
+    return _gen(), fps, width, height
+
+
+class _Consumer:
+    def __init__(self, name: str, fn: Callable[[Iterator[tuple[int, np.ndarray]]], Any], queue_size: int) -> None:
+        self.name = name
+        self.fn = fn
+        self.q: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        self.finished = threading.Event()
+        self.result: Any = None
+        self.error: Exception | None = None
+        self.thread = threading.Thread(target=self._run, name=f"cctv-{name.lower()}", daemon=True)
+
+    def _frames(self) -> Iterator[tuple[int, np.ndarray]]:
+        while True:
+            item = self.q.get()
+            if item is _END:
+                return
+            yield item
+
+    def _run(self) -> None:
+        try:
+            self.result = self.fn(self._frames())
+        except Exception as e:
+            self.error = e
+        finally:
+            # 조기 종료/실패해도 producer가 막히지 않도록 표시
+            self.finished.set()
+
+    def put(self, item: Any) -> None:
+        while not self.finished.is_set():
+            try:
+                self.q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+
+def fan_out(
+    frames: Iterable[np.ndarray],
+    consumers: list[tuple[str, Callable[[Iterator[tuple[int, np.ndarray]]], Any]]],
+    ring: FrameRing,
+    queue_size: int = 8,
+    gate: MotionGate | None = None,
+    clips: EventClips | None = None,
+) -> dict[str, Any]:
+    """프레임을 한 번만 디코딩해서 여러 detector에 (idx, frame)으로 분배.
+
+    - detector별 bounded queue -> 가장 느린 detector 속도에 맞춰 디코딩(backpressure)
+    - 모든 프레임은 ring에도 기록(클립 pre-event 용), clips가 있으면 clips.append로 ring 기록 + 진행 중인 클립 feed
+    - gate가 있으면 움직임 없는 구간은 detector에 보내지 않음 (재개 시 직전 프레임 워밍업, 클립 기록은 계속)
+    - detector가 모두 끝나도 clips.pending이면 post-event 구간까지 디코딩
+    - 반환: {name: 결과 또는 Exception}
+    """
+    workers = [_Consumer(name, fn, queue_size) for name, fn in consumers]
+    for w in workers:
+        w.thread.start()
+
+    try:
+        for idx, frame in enumerate(frames):
+            if clips is not None:
+                clips.append(idx, frame)
+            else:
+                ring.append(idx, frame)
+            alive = [w for w in workers if not w.finished.is_set()]
+            if not alive:
+                if clips is not None and clips.pending:
+                    continue
+                break
+            items = gate.update(idx, frame) if gate is not None else [(idx, frame)]
+            for item in items:
+                for w in alive:
+                    w.put(item)
+    finally:
+        for w in workers:
+            w.put(_END)
+        for w in workers:
+            w.thread.join()
+
+    return {w.name: (w.error if w.error is not None else w.result) for w in workers}
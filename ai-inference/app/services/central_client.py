@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 from typing import Any
 import httpx
 from app.core.config import settings
@@ -9,11 +10,92 @@ class CentralClientError(RuntimeError):
     pass
 
 
+_CLAIM_PATH = "/api/v1/inference/tray/jobs/claim"
+_CLAIM_WAIT_PATH = "/api/v1/inference/tray/jobs/claim/wait"
+
+
+def _is_unsupported_route(e: CentralClientError) -> bool:
+    """Central에 엔드포인트가 없는 경우(구버전 Central의 long-poll claim 등)."""
+    cause = e.__cause__
+    return isinstance(cause, httpx.HTTPStatusError) and cause.response.status_code in (404, 405)
+
+
+def _http2_available() -> bool:
+    # HTTP/2는 h2 패키지(httpx[http2])가 있을 때만 사용
+    try:
+        import h2  # noqa: F401
+    except Exception:
+        return False
+    return True
+
+
+def _client_kwargs() -> dict[str, Any]:
+    """sync/async 공통 커넥션 풀 설정 (keep-alive + 선택적 HTTP/2)."""
+    return {
+        "limits": httpx.Limits(
+            max_connections=settings.CENTRAL_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.CENTRAL_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.CENTRAL_HTTP_KEEPALIVE_S,
+        ),
+        "http2": bool(settings.CENTRAL_HTTP2) and _http2_available(),
+        "timeout": 10.0,
+    }
+
+
+def _parse_claimed_jobs(data: Any) -> list[dict[str, Any]]:
+    if not isinstance(data, dict):
+        return []
+    jobs = data.get("jobs")
+    if isinstance(jobs, list) and jobs:
+        return [j for j in jobs if isinstance(j, dict)]
+    job = data.get("job")
+    return [job] if isinstance(job, dict) else []
+
+
+def _parse_claimed_job(data: Any) -> dict[str, Any] | None:
+    # 표준: {"job": TrayJobOut | None}
+    if isinstance(data, dict) and "job" in data:
+        job = data.get("job")
+        return job if isinstance(job, dict) else None
+
+    # 하위호환: job dict를 바로 반환하는 구현
+    return data if isinstance(data, dict) else None
+
+
+def _cctv_event_payload(
+    *,
+    event_type: str,
+    confidence: float,
+    started_at: str,
+    ended_at: str,
+    clip_gcs_uri: str,
+    clip_start_at: str,
+    clip_end_at: str,
+    meta_json: dict[str, Any] | None,
+    status: str,
+) -> dict[str, Any]:
+    return {
+        "event_type": event_type,
+        "confidence": confidence,
+        "status": status,
+        "started_at": started_at,
+        "ended_at": ended_at,
+        "meta_json": meta_json,
+        "clip": {
+            "clip_gcs_uri": clip_gcs_uri,
+            "clip_start_at": clip_start_at,
+            "clip_end_at": clip_end_at,
+        },
+    }
+
+
 class CentralClient:
     """Central(Cloud Run) API 호출용 클라이언트.
 
     - JOB Claim/Complete: Central이 Orchestrator
     - 모든 요청은 ADMIN_KEY 헤더로 보호(데모 정책)
+    - httpx.Client 1개를 계속 재사용(keep-alive 커넥션 풀, 가능하면 HTTP/2)
+      -> 호출마다 TCP/TLS handshake를 하지 않음. 프로세스 공용 인스턴스는 get_central_client()
     """
     def __init__(self) -> None:
         if not settings.CENTRAL_BASE_URL:
@@ -23,6 +105,18 @@ class CentralClient:
 
         self.base = settings.CENTRAL_BASE_URL.rstrip("/")
         self.key = settings.CENTRAL_ADMIN_KEY
+        self._http = httpx.Client(headers=self._headers(), **_client_kwargs())
+        # long-poll claim 지원 여부 (404/405를 받으면 False로 기억하고 /claim 사용)
+        self.long_poll_supported = True
+
+    def close(self) -> None:
+        self._http.close()
+
+    def __enter__(self) -> "CentralClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     def _headers(self) -> dict[str, str]:
         h = {"Content-Type": "application/json"}
@@ -30,30 +124,76 @@ class CentralClient:
             h["X-ADMIN-KEY"] = self.key
         return h
 
+    def _request(self, op: str, method: str, path: str, timeout_s: float, **kwargs) -> Any:
+        try:
+            r = self._http.request(method, f"{self.base}{path}", timeout=timeout_s, **kwargs)
+            r.raise_for_status()
+            return r.json()
+        except Exception as e:
+            raise CentralClientError(f"{op} failed: {e}") from e
+
     def claim_tray_job(self, worker_id: str, timeout_s: float = 10.0) -> dict[str, Any] | None:
         """PENDING -> CLAIMED 갱신 후 1건 반환.
         Central 응답 형태(권장):
           - {"job": {...}}  또는  {"job": null}
-        
+
         반환:
           - job dict
         """
-        url = f"{self.base}/api/v1/inference/tray/jobs/claim"
+        data = self._request(
+            "claim_tray_job", "POST", _CLAIM_PATH, timeout_s,
+            json={"worker_id": worker_id},
+        )
+        return _parse_claimed_job(data)
+
+    def claim_tray_job_wait(self, worker_id: str, wait_s: float = 20.0) -> dict[str, Any] | None:
+        """Long-poll claim: Central이 PENDING job이 생길 때까지(최대 wait_s) 응답을 보류.
+
+        반환:
+          - job dict (대기 중 job이 생기면 즉시)
+          - None (wait_s 동안 job 없음)
+        Central에 long-poll 엔드포인트가 없으면(404/405) 이후 계속 claim_tray_job 사용.
+        """
+        if not self.long_poll_supported:
+            return self.claim_tray_job(worker_id)
         try:
-            with httpx.Client(timeout=timeout_s) as c:
-                r = c.post(url, headers=self._headers(), json={"worker_id": worker_id})
-            r.raise_for_status()
-            data = r.json()
+            # 서버 대기 시간 + 여유분
+            data = self._request(
+                "claim_tray_job_wait", "POST", _CLAIM_WAIT_PATH, wait_s + 10.0,
+                json={"worker_id": worker_id, "wait_s": wait_s},
+            )
+        except CentralClientError as e:
+            if not _is_unsupported_route(e):
+                raise
+            self.long_poll_supported = False
+            return self.claim_tray_job(worker_id)
+        return _parse_claimed_job(data)
 
-            # 표준: {"job": TrayJobOut | None}
-            if isinstance(data, dict) and "job" in data:
-                job = data.get("job")
-                return job if isinstance(job, dict) else None
+    def claim_tray_jobs(
+        self,
+        worker_id: str,
+        max_jobs: int,
+        wait_s: float | None = None,
+        timeout_s: float = 10.0,
+    ) -> list[dict[str, Any]]:
+        """최대 max_jobs건을 한 번에 claim (batch 추론용).
 
-            # 하위호환: job dict를 바로 반환하는 구현
-            return data if isinstance(data, dict) else None
-        except Exception as e:
-            raise CentralClientError(f"claim_tray_job failed: {e}") from e
+        wait_s가 있으면 long-poll 엔드포인트 사용 (없으면(404/405) 이후 계속 /claim 사용).
+        Central 응답: {"job": {...}|null, "jobs": [...]} (구버전은 "job"만 있음)
+        """
+        body: dict[str, Any] = {"worker_id": worker_id, "max_jobs": max_jobs}
+        if wait_s is not None and wait_s > 0 and self.long_poll_supported:
+            try:
+                data = self._request(
+                    "claim_tray_jobs", "POST", _CLAIM_WAIT_PATH, wait_s + 10.0, json={**body, "wait_s": wait_s},
+                )
+                return _parse_claimed_jobs(data)
+            except CentralClientError as e:
+                if not _is_unsupported_route(e):
+                    raise
+                self.long_poll_supported = False
+        data = self._request("claim_tray_jobs", "POST", _CLAIM_PATH, timeout_s, json=body)
+        return _parse_claimed_jobs(data)
 
     def complete_tray_job(
         self,
@@ -64,20 +204,23 @@ class CentralClient:
         error: str | None = None,
         timeout_s: float = 15.0,
     ) -> dict[str, Any]:
-        url = f"{self.base}/api/v1/inference/tray/jobs/{job_id}/complete"
         payload: dict[str, Any] = {
             "decision": decision,
             "overlap_score": overlap_score,
             "result_json": result_json,
             "error": error,
         }
-        try:
-            with httpx.Client(timeout=timeout_s) as c:
-                r = c.post(url, headers=self._headers(), json=payload)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
-            raise CentralClientError(f"complete_tray_job failed: {e}") from e
+        return self._request(
+            "complete_tray_job", "POST", f"/api/v1/inference/tray/jobs/{job_id}/complete", timeout_s,
+            json=payload,
+        )
+
+    def ingest_tray_result(self, session_uuid: str, payload: dict[str, Any], timeout_s: float = 10.0) -> dict[str, Any]:
+        """추론 결과 직접 ingest (Job Queue 미사용 모드, 레거시/디버그 경로)."""
+        return self._request(
+            "ingest_tray_result", "POST", f"/api/v1/tray-sessions/{session_uuid}/infer", timeout_s,
+            json=payload,
+        )
 
     def get_active_prototype_set(self, timeout_s: float = 10.0) -> dict[str, Any]:
         """ACTIVE prototype_set 조회.
@@ -92,29 +235,35 @@ class CentralClient:
           "created_at": "..."
         }
         """
-        url = f"{self.base}/api/v1/prototype-sets/active"
+        data = self._request("get_active_prototype_set", "GET", "/api/v1/prototype-sets/active", timeout_s)
+        if not isinstance(data, dict):
+            raise CentralClientError("get_active_prototype_set failed: response is not a dict")
+        return data
+
+    def get_active_prototype_set_if_changed(
+        self, etag: str | None, timeout_s: float = 10.0,
+    ) -> tuple[dict[str, Any] | None, str | None]:
+        """조건부 ACTIVE prototype_set 조회 (If-None-Match).
+
+        반환: (data, etag). 변경이 없으면(304) data는 None이고 etag는 그대로.
+        """
+        headers = {"If-None-Match": etag} if etag else {}
         try:
-            with httpx.Client(timeout=timeout_s) as c:
-                r = c.get(url, headers=self._headers())
+            r = self._http.get(f"{self.base}/api/v1/prototype-sets/active", timeout=timeout_s, headers=headers)
+            if r.status_code == 304:
+                return None, etag
             r.raise_for_status()
             data = r.json()
-            if not isinstance(data, dict):
-                raise CentralClientError("active prototype_set response is not a dict")
-            return data
         except Exception as e:
             raise CentralClientError(f"get_active_prototype_set failed: {e}") from e
+        if not isinstance(data, dict):
+            raise CentralClientError("get_active_prototype_set failed: response is not a dict")
+        return data, r.headers.get("ETag")
 
 
     def list_stores(self, timeout_s: float = 10.0) -> list[dict[str, Any]]:
-        url = f"{self.base}/api/v1/stores"
-        try:
-            with httpx.Client(timeout=timeout_s) as c:
-                r = c.get(url, headers=self._headers())
-            r.raise_for_status()
-            data = r.json()
-            return data if isinstance(data, list) else []
-        except Exception as e:
-            raise CentralClientError(f"list_stores failed: {e}") from e
+        data = self._request("list_stores", "GET", "/api/v1/stores", timeout_s)
+        return data if isinstance(data, list) else []
 
     def ingest_cctv_event(
         self,
@@ -133,38 +282,149 @@ class CentralClient:
         timeout_s: float = 10.0,
     ) -> dict[str, Any]:
         """CCTV 이벤트를 Central API에 저장"""
-        url = f"{self.base}/api/v1/stores/{store_code}/cctv/{device_code}/events"
-        payload = {
-            "event_type": event_type,
-            "confidence": confidence,
-            "status": status,
-            "started_at": started_at,
-            "ended_at": ended_at,
-            "meta_json": meta_json,
-            "clip": {
-                "clip_gcs_uri": clip_gcs_uri,
-                "clip_start_at": clip_start_at,
-                "clip_end_at": clip_end_at,
-            },
-        }
-        try:
-            with httpx.Client(timeout=timeout_s) as c:
-                r = c.post(url, headers=self._headers(), json=payload)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
-            raise CentralClientError(f"ingest_cctv_event failed: {e}") from e
+        payload = _cctv_event_payload(
+            event_type=event_type, confidence=confidence, started_at=started_at, ended_at=ended_at,
+            clip_gcs_uri=clip_gcs_uri, clip_start_at=clip_start_at, clip_end_at=clip_end_at,
+            meta_json=meta_json, status=status,
+        )
+        return self._request(
+            "ingest_cctv_event", "POST", f"/api/v1/stores/{store_code}/cctv/{device_code}/events", timeout_s,
+            json=payload,
+        )
 
     def list_devices(self, store_code: str, *, type: str | None = None, timeout_s: float = 10.0) -> list[dict[str, Any]]:
-        url = f"{self.base}/api/v1/stores/{store_code}/devices"
         params = {}
         if type:
             params["type"] = type
+        data = self._request(
+            "list_devices", "GET", f"/api/v1/stores/{store_code}/devices", timeout_s, params=params,
+        )
+        return data if isinstance(data, list) else []
+
+
+class AsyncCentralClient:
+    """CentralClient의 asyncio 버전 (httpx.AsyncClient 풀 재사용).
+
+    이벤트 루프 안에서 claim/complete/ingest를 동시에 여러 건 보낼 때 사용.
+    """
+    def __init__(self) -> None:
+        if not settings.CENTRAL_BASE_URL:
+            raise CentralClientError("CENTRAL_BASE_URL is not set")
+        if not settings.CENTRAL_ADMIN_KEY:
+            raise CentralClientError("CENTRAL_ADMIN_KEY is not set")
+
+        self.base = settings.CENTRAL_BASE_URL.rstrip("/")
+        self.key = settings.CENTRAL_ADMIN_KEY
+        self._http = httpx.AsyncClient(
+            headers={"Content-Type": "application/json", "X-ADMIN-KEY": self.key},
+            **_client_kwargs(),
+        )
+        self.long_poll_supported = True
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def __aenter__(self) -> "AsyncCentralClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def _request(self, op: str, method: str, path: str, timeout_s: float, **kwargs) -> Any:
         try:
-            with httpx.Client(timeout=timeout_s) as c:
-                r = c.get(url, headers=self._headers(), params=params)
+            r = await self._http.request(method, f"{self.base}{path}", timeout=timeout_s, **kwargs)
             r.raise_for_status()
-            data = r.json()
-            return data if isinstance(data, list) else []
+            return r.json()
         except Exception as e:
-            raise CentralClientError(f"list_devices failed: {e}") from e
+            raise CentralClientError(f"{op} failed: {e}") from e
+
+    async def claim_tray_jobs(
+        self,
+        worker_id: str,
+        max_jobs: int = 1,
+        wait_s: float | None = None,
+        timeout_s: float = 10.0,
+    ) -> list[dict[str, Any]]:
+        body: dict[str, Any] = {"worker_id": worker_id, "max_jobs": max_jobs}
+        if wait_s is not None and wait_s > 0 and self.long_poll_supported:
+            try:
+                data = await self._request(
+                    "claim_tray_jobs", "POST", _CLAIM_WAIT_PATH, wait_s + 10.0, json={**body, "wait_s": wait_s},
+                )
+                return _parse_claimed_jobs(data)
+            except CentralClientError as e:
+                if not _is_unsupported_route(e):
+                    raise
+                self.long_poll_supported = False
+        data = await self._request("claim_tray_jobs", "POST", _CLAIM_PATH, timeout_s, json=body)
+        return _parse_claimed_jobs(data)
+
+    async def complete_tray_job(
+        self,
+        job_id: int,
+        decision: str,
+        overlap_score: float | None,
+        result_json: dict[str, Any],
+        error: str | None = None,
+        timeout_s: float = 15.0,
+    ) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "decision": decision,
+            "overlap_score": overlap_score,
+            "result_json": result_json,
+            "error": error,
+        }
+        return await self._request(
+            "complete_tray_job", "POST", f"/api/v1/inference/tray/jobs/{job_id}/complete", timeout_s,
+            json=payload,
+        )
+
+    async def get_active_prototype_set(self, timeout_s: float = 10.0) -> dict[str, Any]:
+        data = await self._request("get_active_prototype_set", "GET", "/api/v1/prototype-sets/active", timeout_s)
+        if not isinstance(data, dict):
+            raise CentralClientError("get_active_prototype_set failed: response is not a dict")
+        return data
+
+    async def list_stores(self, timeout_s: float = 10.0) -> list[dict[str, Any]]:
+        data = await self._request("list_stores", "GET", "/api/v1/stores", timeout_s)
+        return data if isinstance(data, list) else []
+
+    async def ingest_cctv_event(
+        self,
+        *,
+        store_code: str,
+        device_code: str,
+        event_type: str,
+        confidence: float,
+        started_at: str,
+        ended_at: str,
+        clip_gcs_uri: str,
+        clip_start_at: str,
+        clip_end_at: str,
+        meta_json: dict[str, Any] | None = None,
+        status: str = "OPEN",
+        timeout_s: float = 10.0,
+    ) -> dict[str, Any]:
+        payload = _cctv_event_payload(
+            event_type=event_type, confidence=confidence, started_at=started_at, ended_at=ended_at,
+            clip_gcs_uri=clip_gcs_uri, clip_start_at=clip_start_at, clip_end_at=clip_end_at,
+            meta_json=meta_json, status=status,
+        )
+        return await self._request(
+            "ingest_cctv_event", "POST", f"/api/v1/stores/{store_code}/cctv/{device_code}/events", timeout_s,
+            json=payload,
+        )
+
+
+_shared_client: CentralClient | None = None
+_shared_lock = threading.Lock()
+
+
+def get_central_client() -> CentralClient:
+    """프로세스 공용 CentralClient (worker 루프/engine이 같은 커넥션 풀을 공유)."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = CentralClient()
+    return _shared_client
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+import cv2
+import numpy as np
+
+from app.util.gcs_utils import upload_to_gcs
+
+export_logger = logging.getLogger("cctv.export")
+
+_END = object()
+
+
+class ClipHandle:
+    """인코딩 중인 클립 1개. write/close는 큐에 넣기만 하고 즉시 반환 (frame은 BGR 또는 JPEG 버퍼)."""
+
+    def __init__(self, exporter: "ClipExporter", clip_id: int, path: str, fps: int, size: tuple[int, int]) -> None:
+        self.exporter = exporter
+        self.clip_id = clip_id
+        self.path = path
+        self.fps = fps
+        self.size = size
+        self.encoded: Future = Future()  # 인코딩 완료 시 path, 실패 시 예외
+        self.frames_dropped = 0
+        self._writer: cv2.VideoWriter | None = None
+        self._closed = False
+
+    def write(self, frame: np.ndarray) -> None:
+        if not self._closed:
+            self.exporter._enqueue(self, frame)
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            self.exporter._enqueue(self, _END)
+
+
+class ClipExporter:
+    """CCTV 이벤트 클립 백그라운드 export.
+
+    - 인코딩: encode_workers개 스레드, 클립은 한 스레드에 고정(clip_id 기준)해 프레임 순서 보장
+      detector는 프레임 참조를 큐에 넣기만 하고, 밀리면(max_pending_frames 초과) 프레임을 drop
+    - 업로드/ingest: 인코딩이 끝나면 upload_workers 풀에서 GCS 업로드 -> Central 저장 (지수 backoff 재시도)
+    """
+
+    def __init__(
+        self,
+        encode_workers: int = 2,
+        upload_workers: int = 2,
+        max_pending_frames: int = 900,
+        retries: int = 3,
+        backoff_s: float = 1.0,
+    ) -> None:
+        self.max_pending_frames = max(1, max_pending_frames)
+        self.retries = max(0, retries)
+        self.backoff_s = backoff_s
+
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+        self._pending_frames = 0
+        self._queues: list[queue.Queue] = []
+        for i in range(max(1, encode_workers)):
+            q: queue.Queue = queue.Queue()
+            self._queues.append(q)
+            threading.Thread(target=self._encode_loop, args=(q,), name=f"clip-encode-{i}", daemon=True).start()
+        self._upload_pool = ThreadPoolExecutor(max_workers=max(1, upload_workers), thread_name_prefix="clip-upload")
+
+        self.stats: dict[str, int] = {
+            "clips_opened": 0,
+            "clips_encoded": 0,
+            "encode_failed": 0,
+            "frames_written": 0,
+            "frames_dropped": 0,
+            "uploads_ok": 0,
+            "uploads_failed": 0,
+            "ingests_failed": 0,
+            "retries": 0,
+        }
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._lock:
+            self.stats[key] += n
+
+    # ---- encode ----
+    def open(self, path: str, fps: int, size: tuple[int, int]) -> ClipHandle:
+        self._count("clips_opened")
+        return ClipHandle(self, next(self._ids), path, fps, size)
+
+    def _enqueue(self, handle: ClipHandle, item: Any) -> None:
+        if item is not _END:
+            with self._lock:
+                if self._pending_frames >= self.max_pending_frames:
+                    self.stats["frames_dropped"] += 1
+                    handle.frames_dropped += 1
+                    return
+                self._pending_frames += 1
+        self._queues[handle.clip_id % len(self._queues)].put((handle, item))
+
+    def _encode_loop(self, q: queue.Queue) -> None:
+        while True:
+            handle, item = q.get()
+            if item is _END:
+                self._finish(handle)
+                continue
+            with self._lock:
+                self._pending_frames -= 1
+            if handle.encoded.done():
+                continue
+            try:
+                if handle._writer is None:
+                    handle._writer = cv2.VideoWriter(
+                        handle.path, cv2.VideoWriter_fourcc(*"mp4v"), handle.fps, handle.size
+                    )
+                if item.ndim == 1:
+                    # FrameRing의 JPEG 보관 프레임
+                    item = cv2.imdecode(item, cv2.IMREAD_COLOR)
+                handle._writer.write(item)
+                self._count("frames_written")
+            except Exception as e:
+                self._count("encode_failed")
+                export_logger.warning(f"clip encode 실패 ({handle.path}): {e}")
+                self._release(handle)
+                handle.encoded.set_exception(e)
+
+    def _release(self, handle: ClipHandle) -> None:
+        if handle._writer is not None:
+            handle._writer.release()
+            handle._writer = None
+
+    def _finish(self, handle: ClipHandle) -> None:
+        if handle.encoded.done():
+            return
+        try:
+            if handle._writer is None:
+                raise RuntimeError("no frames written")
+            self._release(handle)
+            self._count("clips_encoded")
+            handle.encoded.set_result(handle.path)
+        except Exception as e:
+            self._count("encode_failed")
+            handle.encoded.set_exception(e)
+
+    # ---- upload / ingest ----
+    def _retry(self, what: str, fn: Callable[[], Any]) -> Any:
+        delay = self.backoff_s
+        for attempt in range(self.retries + 1):
+            try:
+                return fn()
+            except Exception as e:
+                if attempt >= self.retries:
+                    raise
+                self._count("retries")
+                export_logger.warning(f"{what} 실패 ({attempt + 1}/{self.retries + 1}), {delay:.1f}s 후 재시도: {e}")
+                time.sleep(delay)
+                delay *= 2
+
+    def export(
+        self,
+        encoded: Future,
+        bucket: str,
+        blob_name: str,
+        ingest: Callable[[str], Any] | None = None,
+    ) -> Future:
+        """클립 인코딩 완료 후 GCS 업로드 -> ingest(gcs_uri). 반환 Future는 gcs_uri."""
+        done: Future = Future()
+
+        def _run(local_path: str) -> None:
+            try:
+                gcs_uri = self._retry("GCS 업로드", lambda: upload_to_gcs(local_path, bucket, blob_name))
+                self._count("uploads_ok")
+            except Exception as e:
+                self._count("uploads_failed")
+                export_logger.warning(f"GCS 업로드 최종 실패 ({blob_name}): {e}")
+                done.set_exception(e)
+                return
+            if ingest is not None:
+                try:
+                    self._retry("Central 이벤트 저장", lambda: ingest(gcs_uri))
+                except Exception as e:
+                    self._count("ingests_failed")
+                    export_logger.warning(f"Central 이벤트 저장 최종 실패 ({blob_name}): {e}")
+            done.set_result(gcs_uri)
+
+        def _on_encoded(f: Future) -> None:
+            if f.exception() is not None:
+                done.set_exception(f.exception())
+                return
+            self._upload_pool.submit(_run, f.result())
+
+        encoded.add_done_callback(_on_encoded)
+        return done
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {**self.stats, "pending_frames": self._pending_frames}
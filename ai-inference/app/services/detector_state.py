@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator
+
+
+class _StateEntry:
+    def __init__(self, state: Any) -> None:
+        self.state = state
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+
+class DetectorStatePool:
+    """카메라(store, device)별 detector 상태 보관소.
+
+    - 상태는 factory(key)로 생성 (모델/스케일러는 fork로 공유, flow history/fall counter 등만 카메라별)
+    - acquire 동안 해당 카메라 상태는 lock으로 독점 -> 같은 카메라 요청만 직렬, 다른 카메라는 병렬
+      (공유 YOLO model의 predict 자체는 model_lock으로 모델별 직렬화)
+    - ttl_s 동안 사용되지 않은 상태는 다음 acquire 때 제거
+    """
+
+    def __init__(self, ttl_s: float = 600.0) -> None:
+        self.ttl_s = ttl_s
+        self._entries: dict[Hashable, _StateEntry] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _evict_expired(self, now: float) -> None:
+        expired = [
+            k for k, e in self._entries.items()
+            if e.in_use == 0 and now - e.last_used > self.ttl_s
+        ]
+        for k in expired:
+            del self._entries[k]
+        self.evicted += len(expired)
+
+    @contextmanager
+    def acquire(self, key: Hashable, factory: Callable[[Hashable], Any]) -> Iterator[Any]:
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _StateEntry(factory(key))
+                self._entries[key] = entry
+                self.created += 1
+            entry.in_use += 1
+
+        try:
+            with entry.lock:
+                yield entry.state
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"cameras": len(self._entries), "created": self.created, "evicted": self.evicted}
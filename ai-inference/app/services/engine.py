@@ -1,20 +1,33 @@
 from __future__ import annotations
 
 import base64
+import functools
 import io
+import itertools
 import logging
 import os
+import threading
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Any, Optional, Tuple
-from urllib.parse import urlparse
+from typing import Any, Iterator
 
 import numpy as np
 from PIL import Image
 
 from app.core.config import settings
-from app.services.prototype_index import PrototypeIndex, load_index
-from app.services.central_client import CentralClient
-from app.util.gcs_utils import upload_to_gcs, download_to
+from app.services.prototype_index import PrototypeIndex, PrototypeSnapshot
+from app.services.prototype_watcher import PrototypeWatcher
+from app.services.central_client import get_central_client
+from app.services.cctv_batch import iter_chunks, process_frames_batch
+from app.services.cctv_procpool import CctvProcessPool
+from app.services.cctv_stream import ClipWriter, EventClips, FrameRing, clip_filename, fan_out, iter_video
+from app.services.detector_state import DetectorStatePool
+from app.services.startup import StartupPlanner
+from app.services.clip_exporter import ClipExporter
+from app.services.model_registry import FrameTensorCache, ModelRegistry
+from app.services.motion_gate import MotionGate, MotionGateConfig
+from app.util.artifact_cache import get_artifact_cache
+from app.util.image_decode import decode_rgb
 from dotenv import load_dotenv
 import cv2
 import torch
@@ -29,7 +42,7 @@ from app.util.preprocessing.auxiliary_tools import AuxiliaryTools
 
 import sys
 from YOLOwrapper import FallDownDetection as FallDownDetectionWrapper, YOLOWrapper
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor
 import asyncio
 
 # 로거 설정
@@ -39,9 +52,22 @@ cctv_logger = logging.getLogger("cctv")
 sys.modules['__main__'].FallDownDetection = FallDownDetectionWrapper
 sys.modules['__main__'].YOLOWrapper = YOLOWrapper
 
+# ImageNet 정규화 (emb_tfm과 동일), (1,1,1,3) broadcast용
+_EMB_MEAN = np.array((0.485, 0.456, 0.406), dtype=np.float32).reshape(1, 1, 1, 3)
+_EMB_STD = np.array((0.229, 0.224, 0.225), dtype=np.float32).reshape(1, 1, 1, 3)
+
 def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
+
+def _write_file(path: str, data: bytes) -> None:
+    try:
+        _ensure_dir(os.path.dirname(path))
+        with open(path, "wb") as f:
+            f.write(data)
+    except Exception as e:
+        scanner_logger.warning(f"[scanner] 프레임 저장 실패: {path} ({e})")
+
 load_dotenv()
 
 def _env_int(name: str, default: int) -> int:
@@ -51,6 +77,16 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
+def _parse_store_map(raw: str) -> dict[str, str]:
+    """ "S001:a,S002:b" -> {"S001": "a", "S002": "b"}"""
+    out: dict[str, str] = {}
+    for part in raw.split(","):
+        k, sep, v = part.partition(":")
+        if sep and k.strip() and v.strip():
+            out[k.strip()] = v.strip()
+    return out
+
+
 def _env_float(name: str, default: float) -> float:
     try:
         return float(os.getenv(name, str(default)).strip())
@@ -62,98 +98,172 @@ class InferenceEngine:
     def __init__(self) -> None:
         self.mock = bool(getattr(settings, "AI_MOCK_MODE", False))
 
-        self.prototype_index: PrototypeIndex | None = None
-        self.prototype_set_id: int | None = None
+        # prototype index는 snapshot 참조 교체로만 바뀜 (swap_prototype_index)
+        self._prototypes = PrototypeSnapshot()
+        self._prototype_swap_lock = threading.Lock()
 
         # YOLO model (lazy/optional)
         self.yolo = None
 
+        # 디버그 프레임 비동기 저장용
+        self._frame_saver = ThreadPoolExecutor(max_workers=1, thread_name_prefix="tray-frame-saver")
+
         # env 정책
         self.knn_topk = _env_int("KNN_TOPK", 5)
+        self.proto_dtype = os.getenv("PROTOTYPE_INDEX_DTYPE", "float32").strip() or "float32"
+        self.proto_mmap = os.getenv("PROTOTYPE_INDEX_MMAP", "1").strip() == "1"
+        self.proto_ann_nprobe = _env_int("PROTOTYPE_ANN_NPROBE", 0)  # 0이면 meta["ann"]["nprobe"]
+        # ACTIVE prototype_set 변경 감시 주기 (0이면 기동 시 1회만 로드)
+        self.prototype_watcher = PrototypeWatcher(self, interval_s=_env_float("PROTOTYPE_REFRESH_S", 60.0))
         self.unknown_dist_th = _env_float("UNKNOWN_DIST_TH", 0.5)
         self.margin_th = _env_float("MARGIN_TH", 0.04)
 
         self.yolo_imgsz = _env_int("YOLO_IMGSZ", 640)
+
+        # 트레이 프레임 디코드 (pil | cv2 | cv2_reduced | pil_draft)
+        # 축소 디코드 시에도 긴 변은 TRAY_DECODE_MIN_SIDE 이상 유지 (crop 해상도 확보)
+        self.tray_decode_mode = os.getenv("TRAY_DECODE_MODE", "pil").strip().lower() or "pil"
+        self.tray_decode_min_side = _env_int("TRAY_DECODE_MIN_SIDE", self.yolo_imgsz * 2)
         self.yolo_conf = _env_float("YOLO_CONF", 0.25)
         self.yolo_iou = _env_float("YOLO_IOU", 0.7)
         self.ai_device = os.getenv("AI_DEVICE", "cpu").strip() or "cpu"
 
         self.use_job_queue = os.getenv("AI_USE_JOB_QUEUE", "1").strip() == "1"
 
+        # CCTV 스트리밍 (detector별 frame queue 길이, 이벤트 클립 전후 길이)
+        self.cctv_frame_queue = _env_int("CCTV_FRAME_QUEUE", 8)
+        self.cctv_clip_seconds = _env_int("CCTV_CLIP_SECONDS", 5)
+        # 카메라별 pre-event ring을 JPEG로 보관 (0이면 원본 프레임 그대로)
+        self.cctv_ring_jpeg_quality = _env_int("CCTV_RING_JPEG_QUALITY", 85)
+        # 낙상/Auxiliary YOLO predict 1회당 프레임 수 (클립 연속 프레임 또는 live 카메라 간)
+        self.cctv_yolo_batch = max(1, _env_int("CCTV_YOLO_BATCH", 8))
+        # 1이면 YOLO letterbox/정규화를 프레임당 1회만 수행하고 낙상/Auxiliary가 공유
+        self.cctv_shared_preprocess = os.getenv("CCTV_SHARED_PREPROCESS", "1").strip() == "1"
+        self.cctv_models = ModelRegistry()
+        # detector 실행 방식: thread (프로세스 내 스레드) | process (detector별 프로세스 + shared_memory 프레임 전달)
+        self.cctv_exec_mode = os.getenv("CCTV_EXEC_MODE", "thread").strip().lower() or "thread"
+        self.cctv_proc_slots = _env_int("CCTV_PROC_SLOTS", 16)
+        self._cctv_proc_pool: CctvProcessPool | None = None
+        self._cctv_proc_pool_lock = threading.Lock()
+        # 폭력 감지 옵티컬 플로우 backend (farneback / dis_ultrafast / farneback_half)
+        # VIOLENCE_FLOW_BACKEND_BY_STORE="S001:dis_ultrafast,S002:farneback_half" 로 store별 지정
+        self.violence_flow_backend = os.getenv("VIOLENCE_FLOW_BACKEND", "farneback").strip()
+        self.violence_flow_backend_by_store = _parse_store_map(os.getenv("VIOLENCE_FLOW_BACKEND_BY_STORE", ""))
+        # 움직임 게이트 기본값 (device별 Device.config_json["motion_gate"]로 override)
+        self.motion_gate_default = MotionGateConfig(enabled=os.getenv("CCTV_MOTION_GATE", "0").strip() == "1")
+        self.device_config_ttl_s = _env_float("CCTV_DEVICE_CONFIG_TTL_S", 60.0)
+        self._device_config_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+        # 카메라별 detector 상태 (CCTV_STATE_TTL_S 동안 요청이 없으면 제거)
+        self.cctv_states = DetectorStatePool(ttl_s=_env_float("CCTV_STATE_TTL_S", 600.0))
+        # 이벤트 클립 인코딩/GCS 업로드/Central 저장은 백그라운드 (detector는 enqueue만)
+        self.clip_exporter = ClipExporter(
+            encode_workers=_env_int("CCTV_CLIP_ENCODE_WORKERS", 2),
+            upload_workers=_env_int("CCTV_CLIP_UPLOAD_WORKERS", 2),
+            max_pending_frames=_env_int("CCTV_CLIP_MAX_PENDING_FRAMES", 900),
+            retries=_env_int("CCTV_CLIP_EXPORT_RETRIES", 3),
+            backoff_s=_env_float("CCTV_CLIP_EXPORT_BACKOFF_S", 1.0),
+        )
+
         # ---- Embedding encoder (프로토타입 생성과 동일하게 맞춰야 함) ----
         # prototype_index가 ResNet50(2048-d) 기반이면 아래 설정이 맞습니다.
         self.emb_img_size = _env_int("EMB_IMG_SIZE", 224)
         self.emb_device = os.getenv("EMB_DEVICE", self.ai_device).strip() or "cpu"
-
+        self.emb_batch_max = _env_int("EMB_BATCH_MAX", 32)
+        # pil: 프로토타입 생성과 동일한 emb_tfm 경로 (기본)
+        # cv2: encoder 로딩 시 pil 대비 cosine 차이를 샘플로 확인하고 EMB_PREPROCESS_MAX_COS_DELTA 이하일 때만 사용
+        self.emb_preprocess = os.getenv("EMB_PREPROCESS", "pil").strip().lower() or "pil"
+        self.emb_preprocess_max_cos_delta = _env_float("EMB_PREPROCESS_MAX_COS_DELTA", 0.005)
+        self.emb_parity_sample_dir = os.getenv("EMB_PARITY_SAMPLE_DIR", "").strip()
+        self.emb_preprocess_parity: dict[str, Any] | None = None
+
+        # encoder는 startup_load에서 로딩 (import 시점에 ResNet50 가중치를 만들지 않음)
         self.encoder = None
         self.emb_tfm = None
-        try:
-            w = ResNet50_Weights.IMAGENET1K_V2
-            m = models.resnet50(weights=w)
-            m.fc = nn.Identity()
-            m.eval().to(self.emb_device)
-
-            tf = transforms.Compose([
-                transforms.Resize((self.emb_img_size, self.emb_img_size)),
-                transforms.ToTensor(),
-                transforms.Normalize(mean=(0.485, 0.456, 0.406),
-                                     std=(0.229, 0.224, 0.225)),
-            ])
-
-            self.encoder = m
-            self.emb_tfm = tf
-        except Exception:
-            # encoder 로딩 실패하면 None 유지 (서버가 죽지 않도록)
-            self.encoder = None
-            self.emb_tfm = None
-
+        self.emb_dim = 2048  # ResNet50 fc=Identity 출력, 새 prototype 인덱스 dim 검증용
 
-    def _resolve_yolo_local_path(self) -> str | None:
-        """YOLO 모델 경로 결정: 로컬 우선, 없으면 GCS에서 다운로드"""
-        # 1) 로컬 경로 우선
-        yolo_path = (
-            os.getenv("YOLO_MODEL_PATH", "").strip()
-            or str(getattr(settings, "YOLO_MODEL_PATH", "") or "").strip()
-        )
-        if yolo_path and os.path.exists(yolo_path):
-            return yolo_path
-
-        # 2) URI로 받으면 캐시에 내려받음
-        yolo_uri = (
-            os.getenv("YOLO_MODEL_URI", "").strip()
-            or str(getattr(settings, "YOLO_MODEL_GCS_URI", "") or "").strip()
-        )
-        if not yolo_uri:
-            return None
-
-        cache_dir = os.path.join(getattr(settings, "CACHE_DIR", "/tmp"), "models")
-        _ensure_dir(cache_dir)
+        # CCTV 모델 (CCTV_LAZY_LOAD=1이면 기동 시 건너뛰고 첫 CCTV 요청 때 로딩)
+        self.violence_classifier: ViolenceClassification | None = None
+        self.fall_detector: FallDownDetection | None = None
+        self.auxiliary_detector: AuxiliaryTools | None = None
+        self.cctv_lazy_load = os.getenv("CCTV_LAZY_LOAD", "0").strip() == "1"
 
-        parsed = urlparse(yolo_uri)
-        filename = os.path.basename(parsed.path) or "yolo.pt"
-        local_path = os.path.join(cache_dir, filename)
+        # 모델/artifact 병렬 로딩 (컴포넌트별 소요 시간은 /health)
+        self.startup = StartupPlanner(max_workers=_env_int("STARTUP_LOAD_WORKERS", 4))
 
-        # 이미 있으면 재사용
-        if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
-            scanner_logger.info(f"[scanner] YOLO 모델 캐시 사용: {local_path}")
-            return local_path
+    def _load_encoder(self) -> None:
+        """ResNet50 임베딩 encoder (실패하면 None 유지, 서버는 뜸)"""
+        w = ResNet50_Weights.IMAGENET1K_V2
+        m = models.resnet50(weights=w)
+        emb_dim = int(m.fc.in_features)
+        m.fc = nn.Identity()
+        m.eval().to(self.emb_device)
 
-        # gs:// 또는 https:// 등 다운로드
-        scanner_logger.info(f"[scanner] YOLO 모델 다운로드: {yolo_uri}")
-        download_to(yolo_uri, local_path)
-        return local_path
+        tf = transforms.Compose([
+            transforms.Resize((self.emb_img_size, self.emb_img_size)),
+            transforms.ToTensor(),
+            transforms.Normalize(mean=(0.485, 0.456, 0.406),
+                                 std=(0.229, 0.224, 0.225)),
+        ])
 
-        self.violence_classifier: ViolenceClassification | None = None
-        self.fall_detector: FallDownDetection | None = None
-        self.auxiliary_detector: AuxiliaryTools | None = None
+        self.emb_tfm = tf
+        # encoder를 공개하기 전에 확인 (확인 전 요청이 cv2 경로를 쓰지 않도록)
+        if self.emb_preprocess == "cv2":
+            self._check_emb_preprocess_parity(m)
+        self.encoder = m
+        self.emb_dim = emb_dim
+
+    def _emb_parity_samples(self, n: int = 16) -> list[np.ndarray]:
+        """parity 확인용 crop: EMB_PARITY_SAMPLE_DIR 이미지 (없으면 결정론적 합성 crop)."""
+        crops: list[np.ndarray] = []
+        if self.emb_parity_sample_dir and os.path.isdir(self.emb_parity_sample_dir):
+            for name in sorted(os.listdir(self.emb_parity_sample_dir))[:n]:
+                try:
+                    with Image.open(os.path.join(self.emb_parity_sample_dir, name)) as im:
+                        crops.append(np.asarray(im.convert("RGB")))
+                except Exception:
+                    continue
+        if crops:
+            return crops
+
+        rng = np.random.default_rng(0)
+        for i in range(n):
+            h, w = int(rng.integers(48, 480)), int(rng.integers(48, 480))
+            yy, xx = np.mgrid[0:h, 0:w].astype(np.float32)
+            base = np.stack([xx / w, yy / h, (xx + yy) / (w + h)], axis=-1) * 255.0
+            base += rng.normal(scale=12.0, size=(h, w, 3))
+            crops.append(np.clip(base, 0, 255).astype(np.uint8))
+        return crops
 
+    @torch.no_grad()
+    def _check_emb_preprocess_parity(self, encoder: nn.Module) -> None:
+        """EMB_PREPROCESS=cv2: pil(emb_tfm)과 임베딩 cosine 차이 기록, 기준 초과 시 pil로 되돌림."""
+        crops = self._emb_parity_samples()
+        xs = {}
+        for mode in ("pil", "cv2"):
+            y = encoder(self._preprocess_crops(crops, mode).to(self.emb_device))
+            xs[mode] = (y / (y.norm(dim=1, keepdim=True) + 1e-12)).cpu().numpy()
+        max_delta = float(np.max(1.0 - np.sum(xs["pil"] * xs["cv2"], axis=1)))
+
+        ok = max_delta <= self.emb_preprocess_max_cos_delta
+        self.emb_preprocess = "cv2" if ok else "pil"
+        self.emb_preprocess_parity = {
+            "samples": len(crops),
+            "source": self.emb_parity_sample_dir or "synthetic",
+            "max_cos_delta": max_delta,
+            "threshold": self.emb_preprocess_max_cos_delta,
+            "mode": self.emb_preprocess,
+        }
+        if ok:
+            scanner_logger.info(f"[scanner] EMB_PREPROCESS=cv2 parity 확인: {self.emb_preprocess_parity}")
+        else:
+            scanner_logger.warning(f"[scanner] EMB_PREPROCESS=cv2 parity 기준 초과, pil 사용: {self.emb_preprocess_parity}")
 
     def _resolve_yolo_seg_local_path(self) -> str | None:
         """
         YOLO 모델은 무조건 URI로만 로드합니다.
         - YOLO_MODEL_PATH / settings.YOLO_MODEL_PATH는 완전히 무시
         - YOLO_SEG_MODEL_URI (또는 settings.YOLO_SEG_MODEL_URI)만 사용
-        - URI에서 내려받아 CACHE_DIR/models 아래에 저장한 "로컬 캐시 경로"를 반환
+        - URI에서 내려받아 artifact 캐시(ARTIFACT_CACHE_DIR)에 저장한 "로컬 캐시 경로"를 반환
         """
         yolo_uri = (
             os.getenv("YOLO_SEG_MODEL_URI", "").strip()
@@ -162,83 +272,83 @@ class InferenceEngine:
         if not yolo_uri:
             return None
 
-        cache_dir = os.path.join(getattr(settings, "CACHE_DIR", "/tmp"), "models")
-        _ensure_dir(cache_dir)
-
-        parsed = urlparse(yolo_uri)
-        filename = os.path.basename(parsed.path) or "yolo.pt"
-        local_path = os.path.join(cache_dir, filename)
-
-        # 캐시 재사용 (기본)
+        # gs://는 md5/generation으로 변경 감지, https://는 FORCE_DOWNLOAD일 때만 다시 받음
         force = os.getenv("YOLO_MODEL_FORCE_DOWNLOAD", "0").strip() == "1"
-        if (not force) and os.path.exists(local_path) and os.path.getsize(local_path) > 0:
-            return local_path
-
-        # gs:// 또는 https:// 등 다운로드 (download_to가 처리)
-        download_to(yolo_uri, local_path)
-        return local_path
+        return get_artifact_cache().fetch(yolo_uri, refresh=force)
 
 
     def startup_load(self) -> None:
         if self.mock:
             return
-        
-        # 1) prototype_set 기반 통합 인덱스 로드
-        try:
-            npy_uri, meta_uri, psid = self._resolve_active_prototype_index_uris()
-            if npy_uri and meta_uri:
-                cache_dir = os.path.join(getattr(settings, "CACHE_DIR", "/tmp"), "prototype_index")
-                _ensure_dir(cache_dir)
 
-                npy_local = self._fetch_uri_to_local(npy_uri, cache_dir)
-                meta_local = self._fetch_uri_to_local(meta_uri, cache_dir)
+        # 컴포넌트별 GCS 조회/다운로드/모델 생성이 서로 기다리지 않도록 병렬 로딩
+        self.startup.add("encoder", self._load_encoder)
+        self.startup.add("prototype_index", self._load_prototype_index)
+        self.startup.add("tray_yolo", self._load_tray_yolo)
+        self.startup.add("cctv_violence", self._load_violence_classifier, lazy=self.cctv_lazy_load)
+        self.startup.add("cctv_fall", self._load_fall_detector, lazy=self.cctv_lazy_load)
+        self.startup.add("cctv_auxiliary", self._load_auxiliary_detector, lazy=self.cctv_lazy_load)
+        self.startup.run()
 
-                self.prototype_index = load_index(npy_local, meta_local)
-                self.prototype_set_id = psid
-            else:
-                self.prototype_index = None
-                self.prototype_set_id = None
-        except Exception:
-            self.prototype_index = None
-            self.prototype_set_id = None
+        # 이후 ACTIVE prototype_set 변경은 백그라운드에서 교체 (재시작 불필요)
+        self.prototype_watcher.start()
 
-        # CCTV 폭력 감지 모델 로드 (GCS에서)
-        try:
-            self.violence_classifier = ViolenceClassification()
-        except Exception as e:
-            logging.warning(f"ViolenceClassification 로드 실패: {e}")
-            self.violence_classifier = None
+    def ensure_cctv_models(self) -> None:
+        """CCTV 모델 로딩 보장 (lazy 설정이면 첫 호출에서 로딩, 이후에는 즉시 반환)"""
+        self.startup.ensure("cctv_violence", "cctv_fall", "cctv_auxiliary")
 
-        # CCTV 낙상 감지 모델 로드 (GCS에서)
-        try:
-            self.fall_detector = FallDownDetection()
-        except Exception as e:
-            logging.warning(f"FallDownDetection 로드 실패: {e}")
-            self.fall_detector = None
+    def _load_prototype_index(self) -> None:
+        """prototype_set 기반 통합 인덱스 로드 (ACTIVE set 조회 -> 다운로드 -> dim 검증 -> swap)"""
+        self.prototype_watcher.poll_once()
 
-        # CCTV Auxiliary 감지 모델 로드 (GCS에서)
-        try:
-            self.auxiliary_detector = AuxiliaryTools()
-        except Exception as e:
-            logging.warning(f"AuxiliaryTools 로드 실패: {e}")
-            self.auxiliary_detector = None
+    @property
+    def prototype_index(self) -> PrototypeIndex | None:
+        return self._prototypes.index
 
-        # # 이번 데모 정책: prototype은 로컬에서 관리 (Central/GCS에서 끌어오지 않음)
-        # if not settings.PROTOTYPE_INDEX_PATH:
-        #     self.prototype_index = None
-        #     self.prototype_set_id = None
+    @property
+    def prototype_set_id(self) -> int | None:
+        return self._prototypes.set_id
 
-        # 2) YOLO 로드(있으면)
-        try:
-            yolo_local = self._resolve_yolo_local_path()
-            yolo_local = self._resolve_yolo_seg_local_path()
-            if yolo_local:
-                from ultralytics import YOLO  # type: ignore
-                self.yolo = YOLO(yolo_local)
-                scanner_logger.info(f"[scanner] YOLO 모델 로드 완료: {yolo_local}")
-        except Exception as e:
-            scanner_logger.error(f"[scanner] YOLO 모델 로드 실패: {e}")
-            self.yolo = None
+    def prototype_snapshot(self) -> PrototypeSnapshot:
+        """현재 (index, prototype_set_id). 요청 1건(또는 batch 1개)은 이 snapshot 하나만 사용."""
+        return self._prototypes
+
+    def swap_prototype_index(self, index: PrototypeIndex | None, set_id: int | None) -> PrototypeSnapshot:
+        """index/set_id를 원자적으로 교체하고 이전 snapshot을 반환 (read-copy-update).
+
+        - reader는 lock 없이 self._prototypes 참조를 1번 읽음 -> 교체 중에도 반쯤 바뀐 상태를 보지 않음
+        - 이전 index는 처리 중인 요청이 참조를 놓으면 GC (mmap 매핑도 그때 해제)
+        """
+        new = PrototypeSnapshot(index=index, set_id=set_id, loaded_at=time.time())
+        with self._prototype_swap_lock:
+            old, self._prototypes = self._prototypes, new
+        scanner_logger.info(
+            "[scanner] prototype index 교체: set_id %s -> %s (N=%s)",
+            old.set_id, set_id, len(index) if index is not None else 0,
+        )
+        return old
+
+    def _load_tray_yolo(self) -> None:
+        """트레이 YOLO-seg 로드 (YOLO_SEG_MODEL_URI가 있으면)"""
+        yolo_local = self._resolve_yolo_seg_local_path()
+        if yolo_local:
+            from ultralytics import YOLO  # type: ignore
+            self.yolo = YOLO(yolo_local)
+            scanner_logger.info(f"[scanner] YOLO 모델 로드 완료: {yolo_local}")
+
+    def _load_violence_classifier(self) -> None:
+        """CCTV 폭력 감지 모델 로드 (GCS에서)"""
+        self.violence_classifier = ViolenceClassification(flow_backend=self.violence_flow_backend)
+
+    def _load_fall_detector(self) -> None:
+        """CCTV 낙상 감지 모델 로드 (GCS에서), YOLO 전처리 공유 registry 등록"""
+        self.fall_detector = FallDownDetection(buffer_len=0)
+        self.cctv_models.register("FALL", self.fall_detector)
+
+    def _load_auxiliary_detector(self) -> None:
+        """CCTV Auxiliary 감지 모델 로드 (GCS에서), YOLO 전처리 공유 registry 등록"""
+        self.auxiliary_detector = AuxiliaryTools(buffer_len=0)
+        self.cctv_models.register("WHEELCHAIR", self.auxiliary_detector)
 
     def infer_tray(self, payload: dict[str, Any]) -> dict[str, Any]:
         """
@@ -249,6 +359,78 @@ class InferenceEngine:
           - device_code: str
           - frame_b64: str (dataURL 포함 가능)
         """
+        res = self.infer_tray_batch([payload])[0]
+        if isinstance(res, Exception):
+            raise res
+        return res
+
+    def infer_tray_bytes(self, payload: dict[str, Any], frame_bytes: bytes) -> dict[str, Any]:
+        """infer_tray와 동일하지만 프레임을 base64가 아닌 원본 JPEG bytes로 받음 (worker 경로)."""
+        return self.infer_tray({**payload, "frame_bytes": frame_bytes})
+
+    def decode_tray_frame(self, payload: dict[str, Any]) -> dict[str, Any]:
+        """payload의 프레임을 미리 decode해 "decoded"로 붙임 (worker prefetch 단계, prepare_tray는 재사용)."""
+        frame_bytes = self._frame_bytes(payload)
+        decoded = decode_rgb(frame_bytes, mode=self.tray_decode_mode, min_side=self.tray_decode_min_side)
+        return {**payload, "frame_bytes": frame_bytes, "decoded": decoded}
+
+    def prepare_tray(
+        self, payload: dict[str, Any], protos: PrototypeSnapshot | None = None,
+    ) -> tuple[dict[str, Any], dict[str, Any] | None]:
+        """트레이 요청의 모델 외 앞단 (decode + 프레임 저장 + snapshot 고정).
+
+        MOCK / index 미로딩이면 결과까지 만들어 (ctx, result)로 반환, 아니면 (ctx, None).
+        TrayBatcher는 이 단계를 호출자 스레드에서 실행하고 ctx["img"]만 batch로 보냄.
+        """
+        ctx = self._prepare_tray(payload)
+        ctx["protos"] = protos or self.prototype_snapshot()
+        return ctx, self._tray_early_result(ctx)
+
+    def finalize_tray(self, ctx: dict[str, Any], instances: list[dict[str, Any]]) -> dict[str, Any]:
+        """instances -> decision/result_json (+ Job Queue 미사용 시 Central ingest). 호출자 스레드에서 실행."""
+        return self._finalize_tray(ctx, instances)
+
+    def infer_tray_batch(self, payloads: list[dict[str, Any]]) -> list[dict[str, Any] | Exception]:
+        """
+        여러 트레이 프레임을 한 번에 추론.
+        - YOLO predict 1회 + ResNet50 forward 1회 + kNN GEMM 1회
+        - 반환 리스트는 payloads와 같은 순서이며, 개별 실패는 Exception 객체로 채워짐
+        """
+        results: list[dict[str, Any] | Exception | None] = [None] * len(payloads)
+        pending: list[tuple[int, dict[str, Any]]] = []
+        # batch 전체가 같은 index/set_id를 사용 (처리 중 hot swap이 있어도 섞이지 않음)
+        protos = self.prototype_snapshot()
+
+        for i, payload in enumerate(payloads):
+            try:
+                ctx, early = self.prepare_tray(payload, protos)
+            except Exception as e:
+                results[i] = e
+                continue
+            if early is not None:
+                results[i] = early
+            else:
+                pending.append((i, ctx))
+
+        if pending:
+            # 5) YOLO seg -> crop -> embedding -> kNN -> gating
+            try:
+                batch_instances = self.infer_instances_batch([ctx["img"] for _, ctx in pending], protos)
+            except Exception as e:
+                batch_instances = [e] * len(pending)
+
+            for (i, ctx), instances in zip(pending, batch_instances):
+                if isinstance(instances, Exception):
+                    results[i] = instances
+                    continue
+                try:
+                    results[i] = self.finalize_tray(ctx, instances)
+                except Exception as e:
+                    results[i] = e
+
+        return results  # type: ignore[return-value]
+
+    def _prepare_tray(self, payload: dict[str, Any]) -> dict[str, Any]:
         session_uuid = str(payload.get("session_uuid") or "").strip()
         store_code = str(payload.get("store_code") or "").strip()
         device_code = str(payload.get("device_code") or "").strip()
@@ -257,12 +439,38 @@ class InferenceEngine:
         if not session_uuid or not store_code or not device_code:
             raise ValueError("session_uuid/store_code/device_code are required")
 
-        # 1) 프레임 decode (+ 원본 bytes 확보)
-        frame_bytes, img = self._decode_frame(payload)
+        # 1) 프레임 decode (+ 원본 bytes 확보), decode_tray_frame으로 미리 decode된 경우 재사용
+        frame_bytes = self._frame_bytes(payload)
+        decoded = payload.get("decoded") or decode_rgb(
+            frame_bytes, mode=self.tray_decode_mode, min_side=self.tray_decode_min_side
+        )
+        img, orig_shape, sx, sy = decoded
 
         # 2) 로컬 저장 (PC#2 관리자 디버깅/리뷰용)
         local_path = self._save_tray_frame(session_uuid, attempt_no, frame_bytes)
 
+        return {
+            "session_uuid": session_uuid,
+            "store_code": store_code,
+            "device_code": device_code,
+            "attempt_no": attempt_no,
+            "img": img,
+            "orig_shape": orig_shape,
+            "scale": (sx, sy),
+            "local_path": local_path,
+        }
+
+    def _emit_tray_result(self, ctx: dict[str, Any], res: dict[str, Any]) -> dict[str, Any]:
+        if not self.use_job_queue:
+            self._try_ingest_to_central(
+                ctx["session_uuid"], ctx["store_code"], ctx["device_code"], ctx["attempt_no"], res
+            )
+        return res
+
+    def _tray_early_result(self, ctx: dict[str, Any]) -> dict[str, Any] | None:
+        """모델 추론 없이 결과가 정해지는 경우(MOCK / index 미로딩)."""
+        local_path = ctx["local_path"]
+
         # 3) MOCK 모드
         if self.mock:
             res = {
@@ -271,7 +479,7 @@ class InferenceEngine:
                 "result_json": {
                     "mode": "mock",
                     "local_frame_path": local_path,
-                    "prototype_set_id": self.prototype_set_id,
+                    "prototype_set_id": ctx["protos"].set_id,
                     "instances": [
                         {
                             "instance_id": 1,
@@ -292,12 +500,10 @@ class InferenceEngine:
                     "items": [{"item_id": 101, "qty": 1}],
                 },
             }
-            if not self.use_job_queue:
-                self._try_ingest_to_central(session_uuid, store_code, device_code, attempt_no, res)
-            return res
+            return self._emit_tray_result(ctx, res)
 
         # 4) prototype index 없으면 UNKNOWN
-        if not self.prototype_index:
+        if not ctx["protos"].index:
             res = {
                 "overlap_score": None,
                 "decision": "UNKNOWN",
@@ -305,17 +511,18 @@ class InferenceEngine:
                     "mode": "real",
                     "error": "prototype index not loaded (ACTIVE prototype_set index URIs not resolved)",
                     "local_frame_path": local_path,
-                    "prototype_set_id": self.prototype_set_id,
+                    "prototype_set_id": ctx["protos"].set_id,
                     "instances": [],
                     "items": [],
                 },
             }
-            if not self.use_job_queue:
-                self._try_ingest_to_central(session_uuid, store_code, device_code, attempt_no, res)
-            return res
+            return self._emit_tray_result(ctx, res)
+
+        return None
 
-        # 5) YOLO seg -> crop -> embedding -> kNN -> gating
-        instances = self._infer_instances(img)
+    def _finalize_tray(self, ctx: dict[str, Any], instances: list[dict[str, Any]]) -> dict[str, Any]:
+        session_uuid = ctx["session_uuid"]
+        local_path = ctx["local_path"]
 
         if not instances:
             res = {
@@ -324,7 +531,7 @@ class InferenceEngine:
                 "result_json": {
                     "mode": "real",
                     "local_frame_path": local_path,
-                    "prototype_set_id": self.prototype_set_id,
+                    "prototype_set_id": ctx["protos"].set_id,
                     "instances": [],
                     "items": [],
                     "error": "no detections",
@@ -334,9 +541,20 @@ class InferenceEngine:
                 "[scanner] 미감지: session=%s, reason=no detections",
                 session_uuid,
             )
-            if not self.use_job_queue:
-                self._try_ingest_to_central(session_uuid, store_code, device_code, attempt_no, res)
-            return res
+            return self._emit_tray_result(ctx, res)
+
+        # 축소 디코드였다면 bbox를 원본 프레임 좌표로 복원 (키오스크 오버레이 기준)
+        h, w = int(ctx["orig_shape"][0]), int(ctx["orig_shape"][1])
+        sx, sy = ctx["scale"]
+        if sx != 1.0 or sy != 1.0:
+            for it in instances:
+                x1, y1, x2, y2 = it["bbox"]
+                it["bbox"] = [
+                    min(w - 1, int(x1 * sx)),
+                    min(h - 1, int(y1 * sy)),
+                    min(w, int(round(x2 * sx))),
+                    min(h, int(round(y2 * sy))),
+                ]
 
         # decision 정책:
         # - 하나라도 REVIEW/UNKNOWN 있으면 REVIEW
@@ -359,15 +577,14 @@ class InferenceEngine:
             item_map[iid] = item_map.get(iid, 0) + int(it.get("qty", 1))
         items = [{"item_id": k, "qty": v} for k, v in item_map.items()]
 
-        h, w = int(img.shape[0]), int(img.shape[1])
         res = {
             "overlap_score": 0.0,
             "decision": decision,
             "result_json": {
                 "mode": "real",
                 "local_frame_path": local_path,
-                "prototype_set_id": self.prototype_set_id,
-                "input": {"shape": [h, w, int(img.shape[2])]},
+                "prototype_set_id": ctx["protos"].set_id,
+                "input": {"shape": [h, w, int(ctx["orig_shape"][2])]},
                 "instances": instances,
                 "items": items,
             },
@@ -389,9 +606,7 @@ class InferenceEngine:
                 len(instances),
             )
 
-        if not self.use_job_queue:
-            self._try_ingest_to_central(session_uuid, store_code, device_code, attempt_no, res)
-        return res
+        return self._emit_tray_result(ctx, res)
 
     def infer_cctv(self, payload: dict[str, Any]) -> dict[str, Any]:
         """CCTV 폭력/낙상 감지 추론"""
@@ -424,6 +639,8 @@ class InferenceEngine:
                 ]
             }
 
+        self.ensure_cctv_models()
+
         # 공통 변수
         store_code = payload.get("store_code", "")
         device_code = payload.get("device_code", "")
@@ -432,65 +649,109 @@ class InferenceEngine:
         GCS_BUCKET_CCTV = os.getenv("GCS_BUCKET_CCTV")
 
         if clip_local_path:
-            frames, fps, width, height = self._decode_video(clip_local_path)
+            frames, fps, width, height = iter_video(clip_local_path)
         elif frames_b64:
-            frames = self._decode_b64_frames(frames_b64)
+            frames = self._iter_b64_frames(frames_b64)
             fps = 15
-            if frames:
-                height, width = frames[0].shape[:2]
-            else:
-                height, width = 0, 0
+            width, height = 0, 0
         else:
-            frames, fps, width, height = [], 30, 0, 0
+            frames, fps, width, height = iter(()), 30, 0, 0
 
-        if not frames:
+        # 첫 프레임 확인 (빈 입력이면 종료, b64는 크기 확인)
+        first = next(frames, None)
+        if first is None:
             return {"events": []}
+        if not width or not height:
+            height, width = first.shape[:2]
+        frames = itertools.chain([first], frames)
 
         events = []
-        tasks = []
-
-        if self.violence_classifier:
-            tasks.append(("VIOLENCE", self._run_violence_inference_frames))
-
-        if self.fall_detector:
-            tasks.append(("FALL", self._run_fall_inference_frames))
-
-        if self.auxiliary_detector:
-            tasks.append(("WHEELCHAIR", self._run_auxiliary_inference_frames))
-
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            future_to_type = {
-                executor.submit(func, frames, fps, width, height, now): event_type
-                for event_type, func in tasks
-            }
-
-            for future in as_completed(future_to_type):
-                event_type = future_to_type[future]
+        camera = (store_code, device_code)
+        gate = self.motion_gate_for(store_code, device_code, fps)
+
+        # 디코딩은 1회, detector들에 분배.
+        # ring에는 클립 pre-event 구간 + detector 간 지연(queue, YOLO batch) 만큼만 보관
+        clip_frames = self.cctv_clip_seconds * fps
+        # (움직임 게이트 재개 시 warmup 프레임은 producer보다 그만큼 늦게 detector에 도착)
+        lag_frames = self.cctv_frame_queue + self.cctv_yolo_batch + 1
+        if gate.config.enabled:
+            lag_frames += gate.config.warmup_frames
+        pool = self._get_cctv_proc_pool() if self.cctv_exec_mode == "process" else None
+        if pool is not None:
+            # process 모드: 워커 프로세스마다 detector 1벌을 요청마다 초기화해서 쓰고, pool.run은 요청 단위로 직렬 실행
+            # -> 카메라별 상태(cctv_states)를 쓰지 않으며 카메라 간 병렬 처리도 되지 않음
+            event_types = [t for t in ("VIOLENCE", "FALL", "WHEELCHAIR") if t in pool.events]
+            # 감지 통보가 디코딩보다 최대 slot 수만큼 늦음
+            ring = FrameRing(clip_frames + max(lag_frames, pool.n_slots + 1), jpeg_quality=self.cctv_ring_jpeg_quality)
+            outcomes = self._run_cctv_in_processes(
+                pool, frames, first.shape, event_types, fps, width, height, now, ring, gate, camera
+            )
+        else:
+            # 카메라(store, device)별 detector 상태: 모델은 공유, history/counter만 분리
+            # 같은 카메라 요청만 직렬 처리되고 다른 카메라 요청은 병렬로 실행 가능
+            with self.cctv_states.acquire(camera, self._new_cctv_state) as detectors:
+                tasks = []
+                if "VIOLENCE" in detectors:
+                    tasks.append(("VIOLENCE", functools.partial(self._run_violence_inference_frames, classifier=detectors["VIOLENCE"])))
+
+                if "FALL" in detectors:
+                    tasks.append(("FALL", functools.partial(self._run_fall_inference_frames, detector=detectors["FALL"])))
+
+                if "WHEELCHAIR" in detectors:
+                    tasks.append(("WHEELCHAIR", functools.partial(self._run_auxiliary_inference_frames, detector=detectors["WHEELCHAIR"])))
+
+                event_types = [t for t, _ in tasks]
+                ring = FrameRing(clip_frames + lag_frames, jpeg_quality=self.cctv_ring_jpeg_quality)
+                # 클립은 producer(fan_out)가 모든 프레임으로 기록, detector는 감지 시 등록만
+                clips = EventClips(ring)
+                # 낙상/Auxiliary가 공유하는 프레임별 전처리 텐서 (detector 간 진행 차이만큼 보관)
+                tensor_cache = FrameTensorCache(2 * lag_frames * max(1, len(self.cctv_models.specs()))) if self.cctv_shared_preprocess else None
+                consumers = [
+                    (event_type, functools.partial(
+                        func, fps=fps, width=width, height=height, now=now, clips=clips, tensor_cache=tensor_cache,
+                        camera=camera,
+                    ))
+                    for event_type, func in tasks
+                ]
                 try:
-                    result = future.result()
-
-                    if event_type == "VIOLENCE" and result["is_violence"]:
-                        detected = True
-                    elif event_type == "FALL" and result["is_fall"]:
-                        detected = True
-                    elif event_type == "WHEELCHAIR" and result["detected"]:
-                        detected = True
-                    else:
-                        detected = False
-                    
-                    if detected:
-                        event = self._process_cctv_event(
-                                event_type=event_type,
-                                inference_result=result,
-                                now=now,
-                                store_code=store_code,
-                                device_code=device_code,
-                                gcs_bucket=GCS_BUCKET_CCTV,
-                            )
-                        if event:
-                            events.append(event)
-                except Exception as e:
-                    logging.warning(f"{event_type} 추론 실패: {e}")
+                    outcomes = fan_out(frames, consumers, ring, queue_size=self.cctv_frame_queue, gate=gate, clips=clips)
+                finally:
+                    # 입력이 post-event 구간 전에 끝난 클립도 닫아서 export
+                    clips.close()
+        gate_stats = gate.stats()
+        cctv_logger.info(
+            f"[{store_code}/{device_code}] motion gate: skipped {gate_stats['frames_skipped']}/{gate_stats['frames_seen']} frames"
+        )
+
+        for event_type in event_types:
+            result = outcomes.get(event_type)
+            if isinstance(result, Exception):
+                logging.warning(f"{event_type} 추론 실패: {result}")
+                continue
+            try:
+                if event_type == "VIOLENCE" and result["is_violence"]:
+                    detected = True
+                elif event_type == "FALL" and result["is_fall"]:
+                    detected = True
+                elif event_type == "WHEELCHAIR" and result["detected"]:
+                    detected = True
+                else:
+                    detected = False
+
+                if detected:
+                    result["extra_meta"] = {**result.get("extra_meta", {}), "motion_gate": gate_stats}
+                    event = self._process_cctv_event(
+                            event_type=event_type,
+                            inference_result=result,
+                            now=now,
+                            store_code=store_code,
+                            device_code=device_code,
+                            gcs_bucket=GCS_BUCKET_CCTV,
+                        )
+                    if event:
+                        events.append(event)
+            except Exception as e:
+                logging.warning(f"{event_type} 추론 실패: {e}")
 
         return {"events": events}
 
@@ -502,24 +763,26 @@ class InferenceEngine:
         store_code: str,
         device_code: str,
         gcs_bucket: str,
+        blob_name: str | None = None,
     ) -> dict[str, Any] | None:
-        """CCTV 이벤트 처리 (GCS 업로드 + Central API 저장)"""
+        """CCTV 이벤트 처리 (GCS 업로드 + Central API 저장은 clip_exporter에 예약 후 즉시 반환)"""
         local_clip_path = inference_result.get("local_clip_path")
         confidence = inference_result.get("confidence", 0.0)
         extra_meta = inference_result.get("extra_meta", {})
 
-        gcs_uri = None
+        # 인코딩 완료 Future (없으면 이미 기록된 파일)
+        encoded: Future | None = inference_result.get("clip_encoded")
+        if encoded is None and local_clip_path and os.path.exists(local_clip_path):
+            encoded = Future()
+            encoded.set_result(local_clip_path)
 
-        # GCS 업로드
-        if local_clip_path and os.path.exists(local_clip_path):
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
+        gcs_uri = None
+        if local_clip_path and encoded is not None and gcs_bucket:
             # FALL -> fall_down 으로 변환 (일관성 유지)
             event_name = "fall_down" if event_type == "FALL" else event_type.lower()
-            blob_name = f"cctv_{event_name}_{timestamp}.mp4"
-            try:
-                gcs_uri = upload_to_gcs(local_clip_path, gcs_bucket, blob_name)
-            except Exception as e:
-                logging.warning(f"GCS 업로드 실패 ({event_type}): {e}")
+            blob_name = blob_name or clip_filename(f"cctv_{event_name}", store_code, device_code, now)
+            # 업로드 완료 후 확정되는 경로 (upload_to_gcs 반환 형식과 동일)
+            gcs_uri = f"gs://{gcs_bucket}/{blob_name}"
 
         # 이벤트 데이터 생성
         event_data = {
@@ -531,74 +794,226 @@ class InferenceEngine:
                 "mode": "real",
                 "clip_path": local_clip_path,
                 "gcs_uri": gcs_uri,
+                "clip_status": "queued" if gcs_uri else None,
                 **extra_meta,
             },
         }
 
-        # Central API에 이벤트 저장
-        if gcs_uri and store_code and device_code:
-            self._try_ingest_cctv_event(
-                store_code=store_code,
-                device_code=device_code,
-                event_data=event_data,
-                gcs_uri=gcs_uri,
-            )
+        # 인코딩 완료 -> GCS 업로드 -> Central API 저장 (재시도 포함, 백그라운드)
+        if gcs_uri:
+            ingest = None
+            if store_code and device_code:
+                ingest = functools.partial(self._ingest_cctv_event, store_code, device_code, event_data)
+            self.clip_exporter.export(encoded, gcs_bucket, blob_name, ingest=ingest)
 
         return event_data
 
+    def cctv_device_config(self, store_code: str, device_code: str) -> dict[str, Any] | None:
+        """Central Device.config_json 조회 (store 단위로 CCTV_DEVICE_CONFIG_TTL_S 동안 캐시)"""
+        if not store_code or not device_code:
+            return None
+        now = time.monotonic()
+        cached = self._device_config_cache.get(store_code)
+        if cached is None or now - cached[0] > self.device_config_ttl_s:
+            try:
+                rows = get_central_client().list_devices(store_code, type="CCTV", timeout_s=3.0)
+                configs = {str(r.get("device_code")): r.get("config_json") for r in rows}
+            except Exception as e:
+                logging.warning(f"device config 조회 실패 ({store_code}): {e}")
+                configs = cached[1] if cached else {}
+            cached = (now, configs)
+            self._device_config_cache[store_code] = cached
+        config = cached[1].get(device_code)
+        return config if isinstance(config, dict) else None
+
+    def motion_gate_for(self, store_code: str, device_code: str, fps: float, config_json: Any = None) -> MotionGate:
+        """device 설정(config_json["motion_gate"])을 반영한 움직임 게이트"""
+        if config_json is None:
+            config_json = self.cctv_device_config(store_code, device_code)
+        return MotionGate(MotionGateConfig.from_device_config(config_json, self.motion_gate_default), fps)
+
+    def _new_cctv_state(self, key: tuple[str, str]) -> dict[str, Any]:
+        """카메라별 detector 상태 (모델/스케일러는 공유, store별 flow backend 반영)"""
+        store_code, _ = key
+        detectors: dict[str, Any] = {}
+        if self.violence_classifier is not None:
+            backend = self.violence_flow_backend_by_store.get(store_code)
+            detectors["VIOLENCE"] = self.violence_classifier.fork(flow_backend=backend)
+        if self.fall_detector is not None:
+            detectors["FALL"] = self.fall_detector.fork(buffer_len=0)
+        if self.auxiliary_detector is not None:
+            detectors["WHEELCHAIR"] = self.auxiliary_detector.fork(buffer_len=0)
+        return detectors
+
+    def _start_event_clip(
+        self,
+        subdir: str,
+        filename: str,
+        fps: int,
+        width: int,
+        height: int,
+        ring: FrameRing,
+        event_idx: int,
+    ) -> ClipWriter:
+        """감지 시점 ±clip_seconds 클립 기록 시작 (pre-event는 ring에서, 이후는 feed)."""
+        local_clip_dir = os.path.join(settings.CACHE_DIR, subdir)
+        _ensure_dir(local_clip_dir)
+        clip_frames = self.cctv_clip_seconds * fps
+        return ClipWriter(
+            os.path.join(local_clip_dir, filename),
+            fps,
+            (width, height),
+            ring,
+            event_idx,
+            pre_frames=clip_frames,
+            post_frames=clip_frames,
+            sink=self.clip_exporter,
+        )
+
+    def _get_cctv_proc_pool(self) -> CctvProcessPool | None:
+        """process 모드 워커 풀 (최초 요청 시 시작, 실패하면 thread 모드로 동작)"""
+        with self._cctv_proc_pool_lock:
+            if self._cctv_proc_pool is not None and self._cctv_proc_pool.alive:
+                return self._cctv_proc_pool
+            if self._cctv_proc_pool is not None:
+                logging.warning("CCTV process pool 워커 종료 감지, 재시작")
+                self._cctv_proc_pool.close()
+                self._cctv_proc_pool = None
+            events = [
+                event_type
+                for event_type, attr in (("VIOLENCE", "violence_classifier"), ("FALL", "fall_detector"), ("WHEELCHAIR", "auxiliary_detector"))
+                if getattr(self, attr, None) is not None
+            ]
+            if not events:
+                return None
+            try:
+                self._cctv_proc_pool = CctvProcessPool(
+                    events,
+                    n_slots=self.cctv_proc_slots,
+                    yolo_batch=self.cctv_yolo_batch,
+                    shared_preprocess=self.cctv_shared_preprocess,
+                    flow_backend=self.violence_flow_backend,
+                ).start()
+            except Exception as e:
+                logging.warning(f"CCTV process pool 시작 실패, thread 모드 사용: {e}")
+                self._cctv_proc_pool = None
+            return self._cctv_proc_pool
+
+    def _run_cctv_in_processes(
+        self,
+        pool: CctvProcessPool,
+        frames: Iterator[np.ndarray],
+        frame_shape: tuple[int, ...],
+        event_types: list[str],
+        fps: int,
+        width: int,
+        height: int,
+        now: datetime,
+        ring: FrameRing,
+        gate: MotionGate,
+        camera: tuple[str, str],
+    ) -> dict[str, Any]:
+        """process 모드: 워커 프로세스가 추론, 클립 기록(ring/feed)은 이 스레드에서. 결과 형식은 스레드 runner와 동일."""
+        names = {
+            "VIOLENCE": ("violence_clips", "cctv_violence"),
+            "FALL": ("fall_clips", "cctv_fall_down"),
+            "WHEELCHAIR": ("auxiliary_clips", "cctv_auxiliary"),
+        }
+        clips: dict[str, ClipWriter] = {}
+
+        def on_frame(idx: int, frame: np.ndarray) -> None:
+            ring.append(idx, frame)
+            for clip in clips.values():
+                clip.feed(idx, frame)
+
+        def on_event(event_type: str, idx: int) -> None:
+            if event_type not in clips:
+                subdir, prefix = names[event_type]
+                clips[event_type] = self._start_event_clip(
+                    subdir, clip_filename(prefix, *camera, now), fps, width, height, ring, idx
+                )
+
+        try:
+            summaries = pool.run(
+                frames, frame_shape, event_types, on_frame, on_event,
+                gate=gate, flow_backend=self.violence_flow_backend_by_store.get(camera[0]),
+            )
+        finally:
+            for clip in clips.values():
+                clip.close()
+
+        flags = {"VIOLENCE": "is_violence", "FALL": "is_fall", "WHEELCHAIR": "detected"}
+        outcomes: dict[str, Any] = {}
+        for event_type, summary in summaries.items():
+            if isinstance(summary, Exception):
+                outcomes[event_type] = summary
+                continue
+            clip = clips.get(event_type)
+            if summary is None or summary.get("event_idx") is None or clip is None:
+                outcomes[event_type] = {flags[event_type]: False, "confidence": 0.0, "local_clip_path": None, "extra_meta": {}}
+                continue
+            extra_meta: dict[str, Any] = {"source": "shared_frames", "exec_mode": "process"}
+            if event_type == "VIOLENCE":
+                extra_meta.update(avg_probability=summary["avg_probability"], violence_ratio=summary["violence_ratio"])
+            outcomes[event_type] = {
+                flags[event_type]: True,
+                "confidence": summary.get("confidence", 1.0),
+                "local_clip_path": clip.path,
+                "clip_encoded": clip.encoded,
+                "extra_meta": extra_meta,
+            }
+        return outcomes
+
     def _run_violence_inference_frames(
         self,
-        frames: list[np.ndarray],
+        frames: Iterator[tuple[int, np.ndarray]],
         fps: int,
         width: int,
         height: int,
         now: datetime,
+        clips: EventClips,
+        tensor_cache: FrameTensorCache | None = None,
+        classifier=None,
+        camera: tuple[str, str] = ("", ""),
     ) -> dict[str, Any]:
-        """공유 프레임으로 폭력 감지 추론"""
-        self.violence_classifier._reset()
+        """공유 프레임 스트림으로 폭력 감지 추론 (classifier: 카메라별 상태, 클립마다 초기화)
+
+        클립 프레임은 fan_out producer가 기록 (clips), 여기서는 감지 시 클립 등록만.
+        """
+        classifier = classifier or self.violence_classifier
+        classifier._reset()
 
         probabilities = []
         violence_detected = False
-        violence_frame = None
+        clip: ClipWriter | None = None
         frame_interval = 3
 
-        for i, frame in enumerate(frames):
+        for i, frame in frames:
             if i % frame_interval != 0:
                 continue
 
-            result = self.violence_classifier.process_frame(frame)
+            result = classifier.process_frame(frame)
             if result.get("ready"):
                 prob = result.get("probability", 0.0)
                 probabilities.append(prob)
-                if prob >= self.violence_classifier.threshold and not violence_detected:
+                if prob >= classifier.threshold and not violence_detected:
                     violence_detected = True
-                    violence_frame = i
+                    # 클립 저장 (감지 시점 ±5초)
+                    clip = clips.start(functools.partial(
+                        self._start_event_clip, "violence_clips", clip_filename("cctv_violence", *camera, now),
+                        fps, width, height, event_idx=i,
+                    ))
 
         if not probabilities:
             return {"is_violence": False, "confidence": 0.0, "local_clip_path": None, "extra_meta": {}}
 
         if violence_detected:
-            # 클립 저장 (감지 시점 ±5초)
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
-            local_clip_dir = os.path.join(settings.CACHE_DIR, "violence_clips")
-            _ensure_dir(local_clip_dir)
-            local_clip_path = os.path.join(local_clip_dir, f"cctv_violence_{timestamp}.mp4")
-
-            clip_seconds = 5
-            start_frame = max(0, violence_frame - clip_seconds * fps)
-            end_frame = min(len(frames), violence_frame + clip_seconds * fps)
-
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(local_clip_path, fourcc, fps, (width, height))
-            for f in frames[start_frame:end_frame]:
-                out.write(f)
-            out.release()
-
-            violence_count = sum(1 for p in probabilities if p >= self.violence_classifier.threshold)
+            violence_count = sum(1 for p in probabilities if p >= classifier.threshold)
             return {
                 "is_violence": True,
                 "confidence": float(max(probabilities)),
-                "local_clip_path": local_clip_path,
+                "local_clip_path": clip.path,
+                "clip_encoded": clip.encoded,
                 "extra_meta": {
                     "source": "shared_frames",
                     "avg_probability": float(np.mean(probabilities)),
@@ -608,51 +1023,69 @@ class InferenceEngine:
 
         return {"is_violence": False, "confidence": 0.0, "local_clip_path": None, "extra_meta": {}}
 
-    def _run_fall_inference_frames(
+    def _scan_yolo_event_frames(
         self,
-        frames: list[np.ndarray],
+        detector,
+        flag: str,
+        frames: Iterator[tuple[int, np.ndarray]],
         fps: int,
         width: int,
         height: int,
         now: datetime,
-    ) -> dict[str, Any]:
-        """공유 프레임으로 낙상 감지 추론"""
-        fall_detected = False
-        fall_frame = None
-        skip_frames = 0
-
-        for i, frame in enumerate(frames):
-            if skip_frames > 0:
-                skip_frames -= 1
-                continue
-
-            result = self.fall_detector.process_frame(frame)
-
-            if result.get("is_fall") and not fall_detected:
-                fall_detected = True
-                fall_frame = i
-                skip_frames = fps * 10
-
-        if fall_detected:
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
-            local_clip_dir = os.path.join(settings.CACHE_DIR, "fall_clips")
-            _ensure_dir(local_clip_dir)
-            local_clip_path = os.path.join(local_clip_dir, f"cctv_fall_down_{timestamp}.mp4")
+        clips: EventClips,
+        subdir: str,
+        prefix: str,
+        tensor_cache: FrameTensorCache | None = None,
+        camera: tuple[str, str] = ("", ""),
+    ) -> ClipWriter | None:
+        """YOLO 기반 detector(낙상/Auxiliary)로 프레임을 cctv_yolo_batch개씩 predict 1회 추론.
+
+        결과는 프레임 순서대로 detector 상태에 반영, 첫 감지 시 클립을 등록하고 종료
+        (post-event 프레임은 fan_out producer가 clips로 기록).
+        tensor_cache가 있으면 다른 YOLO detector와 프레임별 전처리 텐서를 공유.
+        """
+        for chunk in iter_chunks(frames, self.cctv_yolo_batch):
+            results = process_frames_batch(
+                [(detector, f) for _, f in chunk],
+                self.cctv_yolo_batch,
+                cache=tensor_cache,
+                keys=[i for i, _ in chunk],
+            )
+            for (i, _), result in zip(chunk, results):
+                if isinstance(result, Exception):
+                    raise result
+                if result.get(flag):
+                    return clips.start(functools.partial(
+                        self._start_event_clip, subdir, clip_filename(prefix, *camera, now),
+                        fps, width, height, event_idx=i,
+                    ))
 
-            clip_seconds = 5
-            start_frame = max(0, fall_frame - clip_seconds * fps)
-            end_frame = min(len(frames), fall_frame + clip_seconds * fps)
+        return None
 
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            out = cv2.VideoWriter(local_clip_path, fourcc, fps, (width, height))
-            for f in frames[start_frame:end_frame]:
-                out.write(f)
-            out.release()
+    def _run_fall_inference_frames(
+        self,
+        frames: Iterator[tuple[int, np.ndarray]],
+        fps: int,
+        width: int,
+        height: int,
+        now: datetime,
+        clips: EventClips,
+        tensor_cache: FrameTensorCache | None = None,
+        detector=None,
+        camera: tuple[str, str] = ("", ""),
+    ) -> dict[str, Any]:
+        """공유 프레임 스트림으로 낙상 감지 추론 (detector: 카메라별 상태)"""
+        clip = self._scan_yolo_event_frames(
+            detector or self.fall_detector, "is_fall", frames, fps, width, height, now, clips, "fall_clips", "cctv_fall_down",
+            tensor_cache=tensor_cache, camera=camera,
+        )
 
+        if clip is not None:
             return {
                 "is_fall": True,
                 "confidence": 1.0,
-                "local_clip_path": local_clip_path,
+                "local_clip_path": clip.path,
+                "clip_encoded": clip.encoded,
                 "extra_meta": {"source": "shared_frames"},
             }
 
@@ -660,49 +1093,28 @@ class InferenceEngine:
 
     def _run_auxiliary_inference_frames(
             self,
-            frames: list[np.ndarray],
+            frames: Iterator[tuple[int, np.ndarray]],
             fps: int,
             width: int,
             height: int,
             now: datetime,
+            clips: EventClips,
+            tensor_cache: FrameTensorCache | None = None,
+            detector=None,
+            camera: tuple[str, str] = ("", ""),
         ) -> dict[str, Any]:
-            """공유 프레임으로 Auxiliary 감지 추론"""
-            detected = False
-            detected_frame = None
-            skip_frames = 0
-
-            for i, frame in enumerate(frames):
-                if skip_frames > 0:
-                    skip_frames -= 1
-                    continue
-
-                result = self.auxiliary_detector.process_frame(frame)
-
-                if result.get("detected") and not detected:
-                    detected = True
-                    detected_frame = i
-                    skip_frames = fps * 10
-
-            if detected:
-                timestamp = now.strftime("%Y%m%d_%H%M%S")
-                local_clip_dir = os.path.join(settings.CACHE_DIR, "auxiliary_clips")
-                _ensure_dir(local_clip_dir)
-                local_clip_path = os.path.join(local_clip_dir, f"cctv_auxiliary_{timestamp}.mp4")
-
-                clip_seconds = 5
-                start_frame = max(0, detected_frame - clip_seconds * fps)
-                end_frame = min(len(frames), detected_frame + clip_seconds * fps)
-
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(local_clip_path, fourcc, fps, (width, height))
-                for f in frames[start_frame:end_frame]:
-                    out.write(f)
-                out.release()
+            """공유 프레임 스트림으로 Auxiliary 감지 추론 (detector: 카메라별 상태)"""
+            clip = self._scan_yolo_event_frames(
+                detector or self.auxiliary_detector, "detected", frames, fps, width, height, now, clips,
+                "auxiliary_clips", "cctv_auxiliary", tensor_cache=tensor_cache, camera=camera,
+            )
 
+            if clip is not None:
                 return {
                     "detected": True,
                     "confidence": 1.0,
-                    "local_clip_path": local_clip_path,
+                    "local_clip_path": clip.path,
+                    "clip_encoded": clip.encoded,
                     "extra_meta": {"source": "shared_frames"},
                 }
 
@@ -738,6 +1150,61 @@ class InferenceEngine:
         return v
 
 
+    def _preprocess_crops(self, crops: list[np.ndarray], mode: str | None = None) -> torch.Tensor:
+        """
+        crop(RGB) 리스트 -> (B,3,S,S) 정규화 텐서.
+        PIL/transforms 대신 cv2.resize + NumPy 벡터 연산으로 한 번에 처리합니다.
+        EMB_PREPROCESS=pil(기본)이면 기존 emb_tfm 경로(프로토타입 생성과 완전 동일)를 사용하고,
+        cv2 경로는 _check_emb_preprocess_parity를 통과한 경우에만 사용됩니다.
+        """
+        if (mode or self.emb_preprocess) != "cv2":
+            xs = [self.emb_tfm(Image.fromarray(c.astype(np.uint8)).convert("RGB")) for c in crops]
+            return torch.stack(xs, dim=0)
+
+        S = self.emb_img_size
+        batch = np.empty((len(crops), S, S, 3), dtype=np.uint8)
+        for i, c in enumerate(crops):
+            h, w = c.shape[:2]
+            interp = cv2.INTER_AREA if (h > S or w > S) else cv2.INTER_LINEAR
+            batch[i] = cv2.resize(np.ascontiguousarray(c, dtype=np.uint8), (S, S), interpolation=interp)
+
+        x = batch.astype(np.float32) * (1.0 / 255.0)
+        x -= _EMB_MEAN
+        x /= _EMB_STD
+        return torch.from_numpy(np.ascontiguousarray(x.transpose(0, 3, 1, 2)))
+
+    @torch.no_grad()
+    def _embed_crops_resnet50(self, crops: list[np.ndarray], dim: int) -> np.ndarray:
+        """
+        crop 리스트를 ResNet50 forward 1회(EMB_BATCH_MAX 단위)로 임베딩 -> (B, dim) L2 normalize.
+        빈 crop은 0 벡터, encoder가 없거나 차원이 다르면 simple 임베딩으로 fallback.
+        """
+        out = np.zeros((len(crops), dim), dtype=np.float32)
+        valid = [i for i, c in enumerate(crops) if c is not None and c.size > 0]
+        if not valid:
+            return out
+
+        if self.encoder is None or self.emb_tfm is None:
+            for i in valid:
+                out[i] = self._embed_crop_simple(crops[i], dim)
+            return out
+
+        step = max(1, self.emb_batch_max)
+        for s in range(0, len(valid), step):
+            ids = valid[s:s + step]
+            x = self._preprocess_crops([crops[i] for i in ids]).to(self.emb_device)
+            y = self.encoder(x)                                    # (b,2048)
+            y = y / (y.norm(dim=1, keepdim=True) + 1e-12)
+            v = y.detach().cpu().numpy().astype(np.float32)
+
+            if v.shape[1] != dim:
+                for i in ids:
+                    out[i] = self._embed_crop_simple(crops[i], dim)
+                continue
+            out[ids] = v
+
+        return out
+
     def _embed_crop_simple(self, crop: np.ndarray, dim: int) -> np.ndarray:
         """
         외부 임베딩 모델이 아직 없더라도 서버가 깨지지 않도록,
@@ -774,34 +1241,7 @@ class InferenceEngine:
     # -----------------------------
     # prototype_set 기반 로딩 helpers
     # -----------------------------
-    def _resolve_active_prototype_index_uris(self) -> Tuple[str, str, Optional[int]]:
-        """
-        반환: (npy_uri, meta_uri, prototype_set_id)
-
-        1) CentralClient에 get_active_prototype_set()가 구현되어 있으면 그걸 우선 사용
-        2) 없으면 settings/env의 PROTOTYPE_INDEX_URI / PROTOTYPE_INDEX_META_URI 사용
-        """
-        # 1) Central 우선
-        try:
-            cc = CentralClient()
-            fn = getattr(cc, "get_active_prototype_set", None)
-            if callable(fn):
-                data = fn(timeout_s=3.0)
-                npy_uri = str(data.get("index_npy_gcs_uri") or "").strip()
-                meta_uri = str(data.get("index_meta_gcs_uri") or "").strip()
-                psid = data.get("prototype_set_id")
-                psid = int(psid) if psid is not None and str(psid).isdigit() else None
-                if npy_uri and meta_uri:
-                    return npy_uri, meta_uri, psid
-        except Exception:
-            pass
-
-        # 2) fallback
-        npy_uri = str(getattr(settings, "PROTOTYPE_INDEX_URI", "") or "").strip()
-        meta_uri = str(getattr(settings, "PROTOTYPE_INDEX_META_URI", "") or "").strip()
-        return npy_uri, meta_uri, None
-
-    def _fetch_uri_to_local(self, uri: str, cache_dir: str) -> str:
+    def _fetch_uri_to_local(self, uri: str) -> str:
         """
         지원:
           - gs://bucket/path/file.ext
@@ -809,94 +1249,25 @@ class InferenceEngine:
           - file:///abs/path/file.ext
           - /abs/path/file.ext 또는 상대경로 (scheme 없는 경우)
 
-        다운로드/복사 후 로컬 경로 반환
+        원격 uri는 artifact 캐시(md5 검증, offline manifest)를 거쳐 로컬 경로 반환, 로컬 파일은 그대로
         """
-        u = str(uri).strip()
-        if not u:
-            raise ValueError("empty uri")
-
-        parsed = urlparse(u)
-        scheme = (parsed.scheme or "").lower()
-
-        filename = os.path.basename(parsed.path) if parsed.path else "artifact.bin"
-        local_path = os.path.join(cache_dir, filename)
-
-        if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
-            return local_path
-
-        if scheme in ("http", "https"):
-            import requests
-            r = requests.get(u, timeout=15)
-            r.raise_for_status()
-            with open(local_path, "wb") as f:
-                f.write(r.content)
-            return local_path
-
-        if scheme == "gs":
-            try:
-                from google.cloud import storage
-            except Exception as e:
-                raise RuntimeError("google-cloud-storage is required for gs:// uris") from e
-
-            bucket = parsed.netloc
-            blob_name = parsed.path.lstrip("/")
-            client = storage.Client()
-            b = client.bucket(bucket)
-            blob = b.blob(blob_name)
-            blob.download_to_filename(local_path)
-            return local_path
-
-        if scheme == "file":
-            src = parsed.path
-            if not os.path.exists(src):
-                raise FileNotFoundError(src)
-            with open(src, "rb") as rf, open(local_path, "wb") as wf:
-                wf.write(rf.read())
-            return local_path
-
-        if scheme == "":
-            src = u
-            if not os.path.exists(src):
-                raise FileNotFoundError(src)
-            with open(src, "rb") as rf, open(local_path, "wb") as wf:
-                wf.write(rf.read())
-            return local_path
-
-        raise ValueError(f"unsupported uri scheme: {scheme}")
+        return get_artifact_cache().fetch(uri)
 
     # -----------------------------
     # 기존 helpers
     # -----------------------------
-    def _decode_video(self, path: str) -> tuple[list, int, int, int]:
-        """비디오를 한 번만 디코딩하여 프레임 리스트 반환"""
-        cap = cv2.VideoCapture(path)
-        if not cap.isOpened():
-            return [], 30, 0, 0
-
-        fps = int(cap.get(cv2.CAP_PROP_FPS)) or 30
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-        frames = []
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            frames.append(frame)
-        cap.release()
-
-        return frames, fps, width, height
-
-    def _decode_b64_frames(self, frames_b64: list[str]) -> list[np.ndarray]:
-        """Base64 프레임들을 디코딩"""
-        decoded_frames = []
+    def _iter_b64_frames(self, frames_b64: list[str]) -> Iterator[np.ndarray]:
+        """Base64 프레임들을 하나씩 디코딩 (BGR)"""
         for frame_b64 in frames_b64:
             frame_bytes, frame_rgb = self._decode_frame({"frame_b64": frame_b64})
-            frame_bgr = cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
-            decoded_frames.append(frame_bgr)
-        return decoded_frames
+            yield cv2.cvtColor(frame_rgb, cv2.COLOR_RGB2BGR)
+
+    def _frame_bytes(self, payload: dict[str, Any]) -> bytes:
+        # worker 경로: 원본 bytes를 그대로 전달받음 (base64 왕복 없음)
+        raw = payload.get("frame_bytes")
+        if raw is not None:
+            return raw
 
-    def _decode_frame(self, payload: dict[str, Any]) -> tuple[bytes, np.ndarray]:
         frame_b64 = payload.get("frame_b64")
         if not frame_b64:
             raise ValueError("frame_b64 required")
@@ -905,16 +1276,24 @@ class InferenceEngine:
         if s.startswith("data:") and "," in s:
             s = s.split(",", 1)[1]
 
-        raw = base64.b64decode(s)
+        return base64.b64decode(s)
+
+    def _decode_frame(self, payload: dict[str, Any]) -> tuple[bytes, np.ndarray]:
+        raw = self._frame_bytes(payload)
         img = Image.open(io.BytesIO(raw)).convert("RGB")
         return raw, np.array(img)
 
-    def _save_tray_frame(self, session_uuid: str, attempt_no: int, frame_bytes: bytes) -> str:
+    def _save_tray_frame(self, session_uuid: str, attempt_no: int, frame_bytes: bytes) -> str | None:
+        """디버그/리뷰용 원본 프레임 저장. 경로는 즉시 반환하고 쓰기는 백그라운드에서 수행(기본)."""
+        if not settings.TRAY_SAVE_FRAME:
+            return None
+
         base_dir = os.path.join(getattr(settings, "CACHE_DIR", "/tmp"), "tray", session_uuid)
-        _ensure_dir(base_dir)
         path = os.path.join(base_dir, f"attempt_{attempt_no}.jpg")
-        with open(path, "wb") as f:
-            f.write(frame_bytes)
+        if settings.TRAY_SAVE_FRAME_ASYNC:
+            self._frame_saver.submit(_write_file, path, frame_bytes)
+        else:
+            _write_file(path, frame_bytes)
         return path
 
     def _try_ingest_to_central(
@@ -930,7 +1309,7 @@ class InferenceEngine:
         단, Central 장애가 로컬 추론을 막으면 안 되므로 예외는 삼킴.
         """
         try:
-            cc = CentralClient()
+            cc = get_central_client()
             cc.ingest_tray_result(
                 session_uuid=session_uuid,
                 payload={
@@ -946,31 +1325,28 @@ class InferenceEngine:
         except Exception:
             pass
 
-    def _try_ingest_cctv_event(
+    def _ingest_cctv_event(
         self,
         store_code: str,
         device_code: str,
         event_data: dict[str, Any],
         gcs_uri: str,
     ) -> None:
-        """CCTV 이벤트를 Central API에 저장 시도"""
-        try:
-            cc = CentralClient()
-            cc.ingest_cctv_event(
-                store_code=store_code,
-                device_code=device_code,
-                event_type=event_data.get("event_type", "VIOLENCE"),
-                confidence=event_data.get("confidence", 0.0),
-                started_at=event_data.get("started_at"),
-                ended_at=event_data.get("ended_at"),
-                clip_gcs_uri=gcs_uri,
-                clip_start_at=event_data.get("started_at"),
-                clip_end_at=event_data.get("ended_at"),
-                meta_json=event_data.get("meta_json"),
-                timeout_s=3.0,
-            )
-        except Exception as e:
-            logging.warning(f"Central API CCTV 이벤트 저장 실패: {e}")
+        """CCTV 이벤트를 Central API에 저장 (실패 시 예외, clip_exporter가 재시도)"""
+        cc = get_central_client()
+        cc.ingest_cctv_event(
+            store_code=store_code,
+            device_code=device_code,
+            event_type=event_data.get("event_type", "VIOLENCE"),
+            confidence=event_data.get("confidence", 0.0),
+            started_at=event_data.get("started_at"),
+            ended_at=event_data.get("ended_at"),
+            clip_gcs_uri=gcs_uri,
+            clip_start_at=event_data.get("started_at"),
+            clip_end_at=event_data.get("ended_at"),
+            meta_json={**(event_data.get("meta_json") or {}), "clip_status": "uploaded"},
+            timeout_s=3.0,
+        )
 
     def _load_models(self) -> None:
         # device
@@ -1068,20 +1444,34 @@ class InferenceEngine:
           "qty": 1
         }
         """
-        if not self.prototype_index:
-            return []
+        return self.infer_instances_batch([img])[0]
 
-        if self.yolo is None:
-            return []
+    def infer_instances_batch(
+        self,
+        imgs: list[np.ndarray],
+        protos: PrototypeSnapshot | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        여러 프레임을 YOLO predict 1회로 처리하고, 모든 프레임의 crop을
+        임베딩 1회 + kNN 1회로 매칭한 뒤 프레임별 instances로 되돌려줍니다.
+        protos를 주지 않으면 호출 시점의 snapshot을 사용합니다.
+        """
+        empty: list[list[dict[str, Any]]] = [[] for _ in imgs]
+        if not imgs:
+            return empty
 
-        H, W = int(img.shape[0]), int(img.shape[1])
-        out: list[dict[str, Any]] = []
+        index = (protos or self.prototype_snapshot()).index
+        if not index:
+            return empty
+
+        if self.yolo is None:
+            return empty
 
         try:
             # ultralytics는 입력을 np.ndarray(BGR/RGB)로 받아도 동작하는 경우가 많지만,
-            # 여기서는 PIL 경유 없이 그대로 전달합니다.
+            # 여기서는 PIL 경유 없이 그대로 전달합니다. (리스트면 한 번에 batch 추론)
             results = self.yolo.predict(
-                source=img,
+                source=imgs if len(imgs) > 1 else imgs[0],
                 imgsz=self.yolo_imgsz,
                 conf=self.yolo_conf,
                 iou=self.yolo_iou,
@@ -1089,72 +1479,86 @@ class InferenceEngine:
                 verbose=False,
             )
         except Exception:
-            return []
+            return empty
 
         if not results:
-            return []
-
-        inst_id = 1
-        for r in results:
-            boxes = getattr(r, "boxes", None)
-            if boxes is None:
-                continue
+            return empty
+
+        # 단일 프레임이면 results 전체가 해당 프레임 결과
+        per_frame = [list(results)] if len(imgs) == 1 else [[r] for r in results]
+
+        # 1) 박스 수집 (clamp + int)
+        cands: list[tuple[int, list[int], float]] = []
+        crops: list[np.ndarray] = []
+        for f, (img, frame_results) in enumerate(zip(imgs, per_frame)):
+            H, W = int(img.shape[0]), int(img.shape[1])
+            for r in frame_results:
+                boxes = getattr(r, "boxes", None)
+                if boxes is None:
+                    continue
 
-            xyxy = getattr(boxes, "xyxy", None)
-            conf = getattr(boxes, "conf", None)
+                xyxy = getattr(boxes, "xyxy", None)
+                conf = getattr(boxes, "conf", None)
 
-            if xyxy is None:
-                continue
+                if xyxy is None:
+                    continue
 
-            xyxy_np = xyxy.detach().cpu().numpy() if hasattr(xyxy, "detach") else np.array(xyxy)
-            conf_np = None
-            if conf is not None:
-                conf_np = conf.detach().cpu().numpy() if hasattr(conf, "detach") else np.array(conf)
+                xyxy_np = xyxy.detach().cpu().numpy() if hasattr(xyxy, "detach") else np.array(xyxy)
+                conf_np = None
+                if conf is not None:
+                    conf_np = conf.detach().cpu().numpy() if hasattr(conf, "detach") else np.array(conf)
 
-            for i in range(xyxy_np.shape[0]):
-                x1, y1, x2, y2 = xyxy_np[i].tolist()
+                for i in range(xyxy_np.shape[0]):
+                    x1, y1, x2, y2 = xyxy_np[i].tolist()
 
-                # clamp + int
-                x1i = max(0, min(W - 1, int(x1)))
-                y1i = max(0, min(H - 1, int(y1)))
-                x2i = max(0, min(W, int(x2)))
-                y2i = max(0, min(H, int(y2)))
+                    # clamp + int
+                    x1i = max(0, min(W - 1, int(x1)))
+                    y1i = max(0, min(H - 1, int(y1)))
+                    x2i = max(0, min(W, int(x2)))
+                    y2i = max(0, min(H, int(y2)))
 
-                if x2i <= x1i or y2i <= y1i:
-                    continue
+                    if x2i <= x1i or y2i <= y1i:
+                        continue
 
-                c = float(conf_np[i]) if conf_np is not None and i < len(conf_np) else 0.0
+                    c = float(conf_np[i]) if conf_np is not None and i < len(conf_np) else 0.0
+                    cands.append((f, [x1i, y1i, x2i, y2i], c))
+                    crops.append(img[y1i:y2i, x1i:x2i])
 
-                crop = img[y1i:y2i, x1i:x2i]
-                q = self._embed_crop_resnet50(crop, self.prototype_index.vectors.shape[1])
+        if not cands:
+            return empty
 
-                topk = self.prototype_index.knn(q, k=self.knn_topk)
-                if not topk:
-                    continue
+        # 2) 모든 프레임의 crop을 한 번에 임베딩 -> kNN (GEMM 1회)
+        Q = self._embed_crops_resnet50(crops, index.dim)
+        topks = index.knn_batch(Q, k=self.knn_topk)
 
-                best_item, d1 = topk[0]
-                d2 = topk[1][1] if len(topk) > 1 else (d1 + 1.0)
-                margin = float(d2 - d1)
+        # 3) gating (instance_id는 프레임별로 1부터)
+        out = empty
+        for (f, bbox, c), topk in zip(cands, topks):
+            if not topk:
+                continue
 
-                if float(d1) > float(self.unknown_dist_th):
-                    state = "UNKNOWN"
-                else:
-                    state = "AUTO" if margin >= float(self.margin_th) else "REVIEW"
+            best_item, d1 = topk[0]
+            d2 = topk[1][1] if len(topk) > 1 else (d1 + 1.0)
+            margin = float(d2 - d1)
 
-                out.append(
-                    {
-                        "instance_id": inst_id,
-                        "confidence": float(c),
-                        "bbox": [x1i, y1i, x2i, y2i],
-                        "label_text": f"item-{int(best_item)}",
-                        "top_k": [{"item_id": int(ii), "distance": float(dd)} for ii, dd in topk],
-                        "best_item_id": int(best_item),
-                        "match_distance": float(d1),
-                        "match_margin": margin,
-                        "state": state,
-                        "qty": 1,
-                    }
-                )
-                inst_id += 1
+            if float(d1) > float(self.unknown_dist_th):
+                state = "UNKNOWN"
+            else:
+                state = "AUTO" if margin >= float(self.margin_th) else "REVIEW"
+
+            out[f].append(
+                {
+                    "instance_id": len(out[f]) + 1,
+                    "confidence": float(c),
+                    "bbox": bbox,
+                    "label_text": f"item-{int(best_item)}",
+                    "top_k": [{"item_id": int(ii), "distance": float(dd)} for ii, dd in topk],
+                    "best_item_id": int(best_item),
+                    "match_distance": float(d1),
+                    "match_margin": margin,
+                    "state": state,
+                    "qty": 1,
+                }
+            )
 
         return out
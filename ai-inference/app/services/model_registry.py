@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable
+
+import cv2
+import numpy as np
+import torch
+
+
+@dataclass(frozen=True)
+class InputSpec:
+    """YOLO 입력 전처리 규격. 같은 spec을 쓰는 모델끼리는 전처리 결과를 공유."""
+
+    imgsz: int = 640
+    stride: int = 32
+    pad_value: int = 114
+
+
+# 공유 모델별 predict lock (모델 객체가 사라지면 같이 제거)
+_MODEL_LOCKS: "weakref.WeakKeyDictionary[Any, threading.Lock]" = weakref.WeakKeyDictionary()
+_MODEL_LOCKS_GUARD = threading.Lock()
+
+
+def model_lock(model: Any) -> threading.Lock:
+    """모델 객체 1개당 lock 1개.
+
+    ultralytics predictor는 호출마다 내부 상태(batch/results 등)를 바꾸므로 스레드 안전하지 않음.
+    fork()된 카메라별 detector와 live 세션이 같은 model을 공유하므로 predict는 이 lock 안에서만 호출.
+    """
+    with _MODEL_LOCKS_GUARD:
+        lock = _MODEL_LOCKS.get(model)
+        if lock is None:
+            lock = _MODEL_LOCKS[model] = threading.Lock()
+        return lock
+
+
+def letterbox_params(shape_hw: tuple[int, int], spec: InputSpec) -> tuple[float, int, int, int]:
+    """원본 (h, w) -> letterbox_tensor의 (배율 r, left pad, top pad, 정사각 입력 크기)."""
+    h, w = shape_hw
+    size = int(np.ceil(spec.imgsz / spec.stride) * spec.stride)
+    r = min(size / h, size / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    return r, (size - nw) // 2, (size - nh) // 2, size
+
+
+def letterbox_tensor(frame_bgr: np.ndarray, spec: InputSpec) -> torch.Tensor:
+    """BGR 프레임 -> (3, S, S) float32 RGB [0,1] 텐서 (S = imgsz를 stride 배수로 올림).
+
+    비율 유지 resize 후 정사각형(S x S)으로 중앙 padding.
+    ultralytics predict가 numpy 입력에 쓰는 LetterBox(auto=True, stride 배수까지만 최소 padding)와는 입력 크기가 달라
+    검출 결과가 완전히 같지는 않음 (비교: scripts/check_yolo_letterbox.py).
+    텐서 입력은 ultralytics가 scale_boxes를 하지 않으므로 결과는 results_to_frame으로 원본 좌표로 되돌려야 함.
+    """
+    h, w = frame_bgr.shape[:2]
+    r, left, top, size = letterbox_params((h, w), spec)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    if (nw, nh) != (w, h):
+        frame_bgr = cv2.resize(frame_bgr, (nw, nh), interpolation=cv2.INTER_LINEAR)
+
+    out = np.full((size, size, 3), spec.pad_value, dtype=np.uint8)
+    out[top:top + nh, left:left + nw] = frame_bgr
+
+    chw = np.ascontiguousarray(out[..., ::-1].transpose(2, 0, 1))
+    return torch.from_numpy(chw).float().div_(255.0)
+
+
+def results_to_frame(results: list[Any], frames: list[np.ndarray], spec: InputSpec) -> list[Any]:
+    """letterbox_tensor 입력으로 얻은 ultralytics Results의 boxes/keypoints를 원본 프레임 좌표로 변환 (in-place).
+
+    numpy 입력의 predict와 같이 xyxy/keypoints.xy가 프레임 픽셀 좌표가 됨 (masks는 변환하지 않음).
+    """
+    from ultralytics.engine.results import Boxes, Keypoints
+
+    for res, frame in zip(results, frames):
+        h, w = frame.shape[:2]
+        r, left, top, _ = letterbox_params((h, w), spec)
+        if res.boxes is not None:
+            b = res.boxes.data.clone()
+            b[:, [0, 2]] = ((b[:, [0, 2]] - left) / r).clamp_(0, w)
+            b[:, [1, 3]] = ((b[:, [1, 3]] - top) / r).clamp_(0, h)
+            res.boxes = Boxes(b, (h, w))
+        if res.keypoints is not None:
+            k = res.keypoints.data.clone()
+            k[..., 0] = ((k[..., 0] - left) / r).clamp_(0, w)
+            k[..., 1] = ((k[..., 1] - top) / r).clamp_(0, h)
+            # Keypoints가 conf < 0.5인 점을 다시 0으로 만듦 (numpy 입력 결과와 동일)
+            res.keypoints = Keypoints(k, (h, w))
+        res.orig_shape = (h, w)
+        res.orig_img = frame
+    return results
+
+
+class FrameTensorCache:
+    """프레임별 전처리 텐서 캐시 (key, spec) -> tensor.
+
+    - 낙상/Auxiliary YOLO가 같은 spec이면 letterbox/정규화를 프레임당 1회만 수행
+    - 스레드 안전 (infer_cctv에서는 detector별 consumer 스레드가 공유)
+    - 최근 maxlen개만 유지 (detector 간 진행 차이가 더 크면 재계산)
+    """
+
+    def __init__(self, maxlen: int = 64) -> None:
+        self.maxlen = max(1, int(maxlen))
+        self._data: OrderedDict[tuple[Hashable, InputSpec], torch.Tensor] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, frame: np.ndarray, spec: InputSpec) -> torch.Tensor:
+        k = (key, spec)
+        with self._lock:
+            t = self._data.get(k)
+            if t is not None:
+                self.hits += 1
+                self._data.move_to_end(k)
+                return t
+            self.misses += 1
+
+        t = letterbox_tensor(frame, spec)
+
+        with self._lock:
+            self._data[k] = t
+            while len(self._data) > self.maxlen:
+                self._data.popitem(last=False)
+        return t
+
+    def batch(self, items: list[tuple[Hashable, np.ndarray]], spec: InputSpec) -> torch.Tensor:
+        """(key, frame) 목록 -> (B, 3, imgsz, imgsz) 텐서 (YOLO predict 입력)."""
+        return torch.stack([self.get(k, f, spec) for k, f in items])
+
+
+class ModelRegistry:
+    """CCTV detector 등록소. detector는 INPUT_SPEC으로 입력 규격을 선언."""
+
+    def __init__(self) -> None:
+        self._models: dict[str, Any] = {}
+
+    def register(self, name: str, detector: Any) -> None:
+        if detector is not None:
+            self._models[name] = detector
+
+    def get(self, name: str) -> Any | None:
+        return self._models.get(name)
+
+    def items(self) -> list[tuple[str, Any]]:
+        return list(self._models.items())
+
+    def specs(self) -> set[InputSpec]:
+        return {spec for _, d in self._models.items() if (spec := input_spec_of(d)) is not None}
+
+
+def input_spec_of(detector: Any) -> InputSpec | None:
+    return getattr(detector, "INPUT_SPEC", None)
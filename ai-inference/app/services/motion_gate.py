@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Any
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class MotionGateConfig:
+    """움직임 게이트 설정. Device.config_json의 "motion_gate" 키로 device별 override.
+
+    예: {"motion_gate": {"enabled": true, "pixel_th": 15, "area_ratio": 0.01, "hold_s": 5}}
+    """
+
+    enabled: bool = False               # 기본 꺼짐 (CCTV_MOTION_GATE=1 또는 device 설정으로 사용)
+    thumb_w: int = 64                   # 비교용 grayscale 썸네일 크기
+    thumb_h: int = 48
+    pixel_th: int = 12                  # 픽셀 변화로 볼 absdiff 임계값 (0~255)
+    area_ratio: float = 0.005           # 변화 픽셀 비율이 이 이상이면 움직임
+    hold_s: float = 3.0                 # 마지막 움직임 이후 detector를 계속 돌리는 시간
+    warmup_frames: int = 8              # 움직임 재개 시 detector에 다시 넣는 직전 프레임 수
+
+    @classmethod
+    def from_device_config(cls, config_json: Any, default: "MotionGateConfig | None" = None) -> "MotionGateConfig":
+        base = default or cls()
+        raw = config_json.get("motion_gate") if isinstance(config_json, dict) else None
+        if not isinstance(raw, dict):
+            return base
+        kwargs = {f.name: getattr(base, f.name) for f in fields(cls)}
+        for f in fields(cls):
+            if f.name not in raw:
+                continue
+            v = raw[f.name]
+            try:
+                if isinstance(getattr(base, f.name), bool):
+                    kwargs[f.name] = v.strip().lower() in ("1", "true", "yes", "on") if isinstance(v, str) else bool(v)
+                else:
+                    kwargs[f.name] = type(getattr(base, f.name))(v)
+            except (TypeError, ValueError):
+                continue
+        return cls(**kwargs)
+
+
+class MotionGate:
+    """작은 grayscale 썸네일 프레임 차분으로 정지 장면의 detector 추론을 건너뜀.
+
+    update(idx, frame)가 detector에 넣을 프레임 목록을 반환:
+      - 정지 상태: [] (건너뛴 프레임은 warmup용으로 최근 warmup_frames개만 보관)
+      - 움직임 재개: 보관한 직전 프레임들 + 현재 프레임 (flow/낙상 counter 히스토리 워밍업)
+      - 움직임 지속(hold_s 이내): [현재 프레임]
+    """
+
+    def __init__(self, config: MotionGateConfig, fps: float) -> None:
+        self.config = config
+        self.hold_frames = max(1, int(round(config.hold_s * max(1.0, fps))))
+        self._prev: np.ndarray | None = None
+        self._since_motion = self.hold_frames  # 시작은 정지 상태로 간주 (첫 움직임에서 활성)
+        self._skipped: deque[tuple[int, np.ndarray]] = deque(maxlen=max(0, config.warmup_frames))
+
+        self.frames_seen = 0
+        self.frames_skipped = 0
+        self.frames_replayed = 0
+        self.motion_starts = 0
+
+    @property
+    def active(self) -> bool:
+        return self._since_motion < self.hold_frames
+
+    def _has_motion(self, frame: np.ndarray) -> bool:
+        c = self.config
+        small = cv2.resize(frame, (c.thumb_w, c.thumb_h), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        gray = cv2.GaussianBlur(gray, (3, 3), 0)
+        prev, self._prev = self._prev, gray
+        if prev is None:
+            return True
+        changed = np.count_nonzero(cv2.absdiff(gray, prev) > c.pixel_th)
+        return changed >= c.area_ratio * gray.size
+
+    def update(self, idx: int, frame: np.ndarray) -> list[tuple[int, np.ndarray]]:
+        self.frames_seen += 1
+        if not self.config.enabled:
+            return [(idx, frame)]
+
+        was_active = self.active
+        if self._has_motion(frame):
+            self._since_motion = 0
+        else:
+            self._since_motion += 1
+
+        if self.active:
+            if was_active:
+                return [(idx, frame)]
+            self.motion_starts += 1
+            self.frames_replayed += len(self._skipped)
+            out = list(self._skipped) + [(idx, frame)]
+            self._skipped.clear()
+            return out
+
+        self.frames_skipped += 1
+        if self._skipped.maxlen:
+            self._skipped.append((idx, frame))
+        return []
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "frames_seen": self.frames_seen,
+            "frames_skipped": self.frames_skipped,
+            "frames_replayed": self.frames_replayed,
+            "motion_starts": self.motion_starts,
+            "motion_active": self.active,
+        }
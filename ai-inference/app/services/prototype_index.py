@@ -3,25 +3,314 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 import json
+import os
+import struct
 import numpy as np
 
+_EPS = 1e-12
+_PAGE = 4096
+
+
+def _l2_normalize_rows(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    return x / (np.linalg.norm(x, axis=1, keepdims=True) + _EPS)
+
+
 @dataclass
 class PrototypeIndex:
+    """통합 prototype 인덱스.
+
+    - vectors는 load 시점에 한 번만 L2 normalize 된 (N, D) C-contiguous 행렬
+    - knn/knn_batch는 코사인 거리(1 - cos)를 오름차순으로 반환
+    - ann이 있으면(meta["ann"]) 전체 GEMM 대신 근사 검색 backend 사용
+    """
     item_ids: np.ndarray
     vectors: np.ndarray
     meta: dict[str, Any]
+    ann: IvfBackend | None = None
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
 
     def knn(self, q: np.ndarray, k: int = 5) -> list[tuple[int, float]]:
-        q = q / (np.linalg.norm(q) + 1e-12)
-        V = self.vectors
-        Vn = V / (np.linalg.norm(V, axis=1, keepdims=True) + 1e-12)
-        sims = Vn @ q
-        dists = 1.0 - sims
-        idx = np.argsort(dists)[:k]
-        return [(int(self.item_ids[i]), float(dists[i])) for i in idx]
-
-def load_index(npy_path: str, meta_json_path: str) -> PrototypeIndex:
-    vectors = np.load(npy_path)
+        res = self.knn_batch(np.asarray(q).reshape(1, -1), k=k)
+        return res[0] if res else []
+
+    def knn_batch(self, Q: np.ndarray, k: int = 5) -> list[list[tuple[int, float]]]:
+        """(B, D) 쿼리 전체를 GEMM 1회로 검색. 트레이 1장의 crop 전체를 한 번에 처리할 때 사용."""
+        Q = np.asarray(Q)
+        if Q.ndim == 1:
+            Q = Q.reshape(1, -1)
+        if Q.shape[0] == 0 or len(self) == 0:
+            return [[] for _ in range(Q.shape[0])]
+
+        Qn = _l2_normalize_rows(Q).astype(self.vectors.dtype, copy=False)
+        if self.ann is not None:
+            return [
+                [(int(self.item_ids[r]), float(d)) for r, d in zip(rows, d_row)]
+                for rows, d_row in self.ann.search(Qn, self.vectors, k)
+            ]
+
+        sims = Qn @ self.vectors.T                      # (B, N)
+        dists = 1.0 - sims.astype(np.float32, copy=False)
+
+        idx = _topk_indices(dists, k)
+        top_d = np.take_along_axis(dists, idx, axis=1)
+        top_ids = self.item_ids[idx]
+        return [
+            [(int(i), float(d)) for i, d in zip(ids_row, d_row)]
+            for ids_row, d_row in zip(top_ids, top_d)
+        ]
+
+
+def _topk_indices(dists: np.ndarray, k: int) -> np.ndarray:
+    """행별 거리 상위 k개 index (오름차순). 전체 argsort 대신 argpartition 사용. k<=0이면 (rows, 0)."""
+    n = dists.shape[1]
+    k = min(int(k), n)
+    if k <= 0:
+        return np.empty((dists.shape[0], 0), dtype=np.intp)
+    if k < n:
+        part = np.argpartition(dists, k - 1, axis=1)[:, :k]
+    else:
+        part = np.broadcast_to(np.arange(n), dists.shape).copy()
+    order = np.argsort(np.take_along_axis(dists, part, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(part, order, axis=1)
+
+
+class IvfBackend:
+    """IVF(inverted file) 근사 검색.
+
+    - 오프라인에서 spherical k-means로 nlist개 centroid 학습, vectors는 list 순서로 재배열해 저장
+      -> list l의 vectors는 vectors[offsets[l]:offsets[l+1]] 연속 구간 (gather 복사 없음)
+    - 쿼리마다 centroid와 가장 가까운 nprobe개 list만 정확 거리 계산 (nprobe >= nlist면 exact와 동일)
+    """
+    kind = "ivf"
+
+    def __init__(self, centroids: np.ndarray, offsets: np.ndarray, nprobe: int = 8) -> None:
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.nprobe = max(1, min(int(nprobe), self.nlist))
+
+    @property
+    def nlist(self) -> int:
+        return int(self.centroids.shape[0])
+
+    @classmethod
+    def load(cls, path: str, spec: dict[str, Any], nprobe: int | None = None) -> "IvfBackend":
+        with np.load(path) as z:
+            return cls(z["centroids"], z["offsets"], nprobe=nprobe or int(spec.get("nprobe", 8)))
+
+    def search(self, Qn: np.ndarray, vectors: np.ndarray, k: int) -> list[tuple[np.ndarray, np.ndarray]]:
+        """쿼리별 (row index, 거리) 상위 k개. 후보가 k개 미만이면 있는 만큼만."""
+        B = Qn.shape[0]
+        probe = _topk_indices(1.0 - Qn.astype(np.float32, copy=False) @ self.centroids.T, self.nprobe)
+
+        # list 단위로 묶어서 계산: 같은 list를 보는 쿼리들은 GEMM 1회
+        cand_d: list[list[np.ndarray]] = [[] for _ in range(B)]
+        cand_r: list[list[np.ndarray]] = [[] for _ in range(B)]
+        for l in np.unique(probe):
+            lo, hi = int(self.offsets[l]), int(self.offsets[l + 1])
+            if hi <= lo:
+                continue
+            qs = np.nonzero((probe == l).any(axis=1))[0]
+            d = 1.0 - (Qn[qs] @ vectors[lo:hi].T).astype(np.float32, copy=False)
+            rows = np.arange(lo, hi)
+            for j, q in enumerate(qs):
+                cand_d[q].append(d[j])
+                cand_r[q].append(rows)
+
+        out: list[tuple[np.ndarray, np.ndarray]] = []
+        for ds, rs in zip(cand_d, cand_r):
+            if not ds:
+                out.append((np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)))
+                continue
+            d = np.concatenate(ds)[None, :]
+            idx = _topk_indices(d, k)[0]
+            out.append((np.concatenate(rs)[idx], d[0, idx]))
+        return out
+
+
+# meta["ann"]["type"] -> backend (IvfBackend.load와 같은 시그니처)
+_ANN_BACKENDS = {"ivf": IvfBackend.load}
+
+
+def train_ivf(
+    vectors: np.ndarray,
+    nlist: int,
+    iters: int = 20,
+    max_train: int = 100_000,
+    seed: int = 0,
+) -> tuple[np.ndarray, np.ndarray]:
+    """정규화된 vectors로 spherical k-means -> (centroids (nlist, D), 행별 list 번호 (N,))."""
+    rng = np.random.default_rng(seed)
+    X = np.asarray(vectors, dtype=np.float32)
+    n = X.shape[0]
+    nlist = max(1, min(int(nlist), n))
+
+    train = X[rng.choice(n, size=min(n, max(nlist, max_train)), replace=False)]
+    C = train[rng.choice(train.shape[0], size=nlist, replace=False)].copy()
+    for _ in range(iters):
+        assign = _assign_lists(train, C)
+        sums = np.zeros_like(C)
+        np.add.at(sums, assign, train)
+        counts = np.bincount(assign, minlength=nlist)
+        # 빈 list는 임의 학습 벡터로 다시 시작
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = train[rng.choice(train.shape[0], size=int(empty.sum()), replace=False)]
+        C = _l2_normalize_rows(sums)
+    return C, _assign_lists(X, C)
+
+
+def _assign_lists(X: np.ndarray, C: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    out = np.empty(X.shape[0], dtype=np.int64)
+    for i in range(0, X.shape[0], chunk):
+        out[i:i + chunk] = np.argmax(X[i:i + chunk] @ C.T, axis=1)
+    return out
+
+
+@dataclass(frozen=True)
+class PrototypeSnapshot:
+    """엔진이 요청 처리에 쓰는 (index, prototype_set_id) 묶음.
+
+    교체는 새 snapshot 참조 1회 대입으로만 이루어지므로(RCU), 요청 시작 시 잡은
+    snapshot은 처리 도중 교체가 있어도 index와 set_id가 항상 짝이 맞음.
+    """
+    index: PrototypeIndex | None = None
+    set_id: int | None = None
+    loaded_at: float | None = None
+
+
+def _write_page_aligned_npy(path: str, arr: np.ndarray) -> None:
+    """헤더를 space로 채워 데이터 시작 위치를 4KiB 경계에 맞춘 .npy (np.load로 그대로 읽힘)."""
+    arr = np.ascontiguousarray(arr)
+    header = repr({
+        "descr": np.lib.format.dtype_to_descr(arr.dtype),
+        "fortran_order": False,
+        "shape": arr.shape,
+    }).encode("latin1")
+    # magic(6) + version(2) + header_len(2) + header + padding + "\n"
+    pad = -(10 + len(header) + 1) % _PAGE
+    header = header + b" " * pad + b"\n"
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header)
+        f.write(arr.tobytes(order="C"))
+    os.replace(tmp, path)
+
+
+def save_index(
+    npy_path: str,
+    meta_json_path: str,
+    vectors: np.ndarray,
+    meta: dict[str, Any],
+    dtype: str = "float32",
+    ann: str | None = None,
+    nlist: int | None = None,
+    nprobe: int = 8,
+) -> None:
+    """정규화된 vectors를 page-aligned .npy로 저장하고 meta에 표시.
+
+    meta["normalized"]가 true인 인덱스는 load_index가 복사/정규화 없이 mmap으로 바로 사용.
+    ann="ivf"면 IVF를 학습해 <npy 이름>.ivf.npz로 같이 저장하고 meta["ann"]에 기록
+    (vectors/item_ids는 list 순서로 재배열되므로 exact 검색 결과는 동일).
+    """
+    vectors = _l2_normalize_rows(vectors)
+    meta = dict(meta)
+
+    if ann == "ivf":
+        nlist = nlist or max(1, int(4 * np.sqrt(vectors.shape[0])))
+        centroids, assign = train_ivf(vectors, nlist)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=centroids.shape[0]))])
+        vectors = vectors[order]
+        meta["item_ids"] = [meta["item_ids"][i] for i in order.tolist()]
+
+        ann_path = f"{os.path.splitext(npy_path)[0]}.ivf.npz"
+        np.savez(ann_path, centroids=centroids, offsets=offsets)
+        meta["ann"] = {
+            "type": "ivf",
+            "path": os.path.basename(ann_path),
+            "nlist": int(centroids.shape[0]),
+            "nprobe": int(nprobe),
+        }
+    elif ann:
+        raise ValueError(f"unknown ann backend: {ann}")
+    else:
+        meta.pop("ann", None)
+
+    vectors = vectors.astype(np.dtype(dtype), copy=False)
+    _write_page_aligned_npy(npy_path, vectors)
+
+    meta = {
+        **meta,
+        "dim": int(vectors.shape[1]),
+        "count": int(vectors.shape[0]),
+        "dtype": np.dtype(dtype).name,
+        "normalized": True,
+        "page_aligned": True,
+    }
+    with open(meta_json_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def ann_path_for(meta: dict[str, Any], npy_path: str) -> str | None:
+    """meta["ann"] 파일 위치 (npy와 같은 디렉토리/prefix 기준). ann이 없으면 None.
+
+    로컬 경로뿐 아니라 gs:// 등 uri에도 사용 (npy uri의 마지막 '/' 뒤만 교체).
+    """
+    spec = meta.get("ann")
+    if not spec:
+        return None
+    base = npy_path.rsplit("/", 1)[0] + "/" if "/" in npy_path else ""
+    return base + str(spec["path"])
+
+
+def load_index(
+    npy_path: str,
+    meta_json_path: str,
+    dtype: str = "float32",
+    mmap: bool = True,
+    ann_path: str | None = None,
+    nprobe: int | None = None,
+) -> PrototypeIndex:
+    """인덱스 로드 + 1회 정규화.
+
+    dtype="float16"이면 메모리를 절반으로 줄임(대형 카탈로그용, 거리 정밀도는 ~1e-3).
+    mmap=True이고 save_index로 만든(정규화 + dtype 일치) 파일이면 np.load(mmap_mode="r")로
+    읽기 전용 매핑만 함 -> 같은 파일을 여는 uvicorn worker들이 page cache를 공유.
+    meta["ann"]이 있으면 ann_path(기본: npy 옆 파일)의 근사 검색 backend를 붙임 (nprobe로 덮어쓰기 가능).
+    """
     meta = json.loads(Path(meta_json_path).read_text(encoding="utf-8"))
     item_ids = np.array(meta["item_ids"], dtype=np.int32)
-    return PrototypeIndex(item_ids=item_ids, vectors=vectors, meta=meta)
+
+    raw = np.load(npy_path, mmap_mode="r") if mmap else np.load(npy_path)
+    if raw.ndim != 2 or raw.shape[0] != item_ids.shape[0]:
+        raise ValueError(f"prototype index shape mismatch: vectors={raw.shape}, item_ids={item_ids.shape}")
+
+    zero_copy = (
+        mmap
+        and bool(meta.get("normalized"))
+        and raw.dtype == np.dtype(dtype)
+        and raw.flags.c_contiguous
+    )
+    if zero_copy:
+        vectors = raw
+    else:
+        vectors = np.ascontiguousarray(_l2_normalize_rows(raw), dtype=np.dtype(dtype))
+
+    ann = None
+    spec = meta.get("ann")
+    if spec:
+        kind = str(spec.get("type"))
+        if kind not in _ANN_BACKENDS:
+            raise ValueError(f"unknown ann backend in meta: {kind}")
+        ann = _ANN_BACKENDS[kind](ann_path or ann_path_for(meta, npy_path), spec, nprobe)
+        if int(ann.offsets[-1]) != vectors.shape[0]:
+            raise ValueError(f"ann index mismatch: lists cover {int(ann.offsets[-1])} rows, vectors={vectors.shape[0]}")
+    return PrototypeIndex(item_ids=item_ids, vectors=vectors, meta=meta, ann=ann)
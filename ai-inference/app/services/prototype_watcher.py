@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional, Tuple
+
+from app.core.config import settings
+from app.services.central_client import get_central_client
+from app.services.prototype_index import ann_path_for, load_index
+
+if TYPE_CHECKING:
+    from app.services.engine import InferenceEngine
+
+watcher_logger = logging.getLogger("prototype_watcher")
+
+
+class PrototypeWatcher:
+    """ACTIVE prototype_set 감시 + 무중단 교체.
+
+    - interval_s마다 Central /prototype-sets/active를 조건부 조회(ETag), 변경 없으면 304
+    - 인덱스 파일은 artifact 캐시로 받음 (gs://는 md5 비교 -> 같은 파일명으로 덮어쓴 경우도 감지)
+    - set_id 또는 로컬 파일(md5)이 바뀐 경우에만 백그라운드에서 로드 + dim 검증 후 engine.swap_prototype_index
+    - 실패하면 기존 인덱스를 그대로 사용하고 다음 주기에 재시도
+    """
+
+    def __init__(self, engine: "InferenceEngine", interval_s: float = 60.0) -> None:
+        self.engine = engine
+        self.interval_s = interval_s
+        self._etag: str | None = None
+        self._active: dict[str, Any] | None = None
+        self._loaded_key: tuple | None = None
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        self.checks = 0
+        self.swaps = 0
+        self.failures = 0
+        self.last_check_at: float | None = None
+        self.last_error: str | None = None
+
+    def _resolve(self) -> Tuple[str, str, Optional[int]]:
+        """
+        반환: (npy_uri, meta_uri, prototype_set_id)
+
+        1) Central ACTIVE prototype_set (ETag 조건부 조회, 304면 직전 응답 재사용)
+        2) Central 조회 실패(timeout/5xx/ACTIVE 없음) 시 직전 ACTIVE 응답 재사용
+        3) 아직 인덱스가 하나도 로드되지 않은 경우(최초 로드)에만 settings/env의
+           PROTOTYPE_INDEX_URI / PROTOTYPE_INDEX_META_URI 사용, 그 외에는 예외 -> 기존 인덱스 유지
+        """
+        # 1) Central 우선
+        try:
+            data, etag = get_central_client().get_active_prototype_set_if_changed(self._etag, timeout_s=3.0)
+            if data is not None:
+                self._active, self._etag = data, etag
+        except Exception as e:
+            # 2) 일시 장애로 env 인덱스로 바뀌었다가 되돌아오지 않도록 직전 응답 유지
+            if self._active is None:
+                if self.engine.prototype_snapshot().index is not None:
+                    raise
+                watcher_logger.warning(f"ACTIVE prototype_set 조회 실패, env 인덱스로 최초 로드: {e}")
+
+        data = self._active or {}
+        npy_uri = str(data.get("index_npy_gcs_uri") or "").strip()
+        meta_uri = str(data.get("index_meta_gcs_uri") or "").strip()
+        psid = data.get("prototype_set_id")
+        psid = int(psid) if psid is not None and str(psid).isdigit() else None
+        if npy_uri and meta_uri:
+            return npy_uri, meta_uri, psid
+
+        # 3) fallback (최초 로드만)
+        if self.engine.prototype_snapshot().index is not None:
+            raise ValueError("ACTIVE prototype_set has no index URIs")
+        npy_uri = str(getattr(settings, "PROTOTYPE_INDEX_URI", "") or "").strip()
+        meta_uri = str(getattr(settings, "PROTOTYPE_INDEX_META_URI", "") or "").strip()
+        return npy_uri, meta_uri, None
+
+    def poll_once(self) -> bool:
+        """1회 확인. 새 인덱스로 교체했으면 True (로드/검증 실패는 예외)."""
+        with self._poll_lock:
+            self.checks += 1
+            self.last_check_at = time.time()
+
+            npy_uri, meta_uri, psid = self._resolve()
+            if not (npy_uri and meta_uri):
+                return False
+
+            npy_local = self.engine._fetch_uri_to_local(npy_uri)
+            meta_local = self.engine._fetch_uri_to_local(meta_uri)
+            # 근사 검색 인덱스(meta["ann"])는 npy와 같은 위치에서 받음
+            ann_uri = ann_path_for(json.loads(Path(meta_local).read_text(encoding="utf-8")), npy_uri)
+            ann_local = self.engine._fetch_uri_to_local(ann_uri) if ann_uri else None
+            key = (psid, npy_local, meta_local, ann_local)
+            if key == self._loaded_key:
+                return False
+
+            index = load_index(
+                npy_local, meta_local,
+                dtype=self.engine.proto_dtype,
+                mmap=self.engine.proto_mmap,
+                ann_path=ann_local,
+                nprobe=self.engine.proto_ann_nprobe or None,
+            )
+            emb_dim = self.engine.emb_dim
+            if emb_dim and index.dim != emb_dim:
+                raise ValueError(
+                    f"prototype_set {psid}: index dim {index.dim} != encoder dim {emb_dim} ({npy_uri})"
+                )
+
+            self.engine.swap_prototype_index(index, psid)
+            self._loaded_key = key
+            self.swaps += 1
+            return True
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s * random.uniform(0.9, 1.1)):
+            try:
+                self.poll_once()
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                watcher_logger.warning(f"prototype 인덱스 갱신 실패 (기존 인덱스 유지): {e}")
+
+    def start(self) -> None:
+        # Central이 없으면(env 인덱스만 사용) 감시할 대상이 없음
+        if self.interval_s <= 0 or self._thread is not None or not settings.CENTRAL_BASE_URL:
+            return
+        self._thread = threading.Thread(target=self._loop, name="prototype-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def status(self) -> dict[str, Any]:
+        snap = self.engine.prototype_snapshot()
+        return {
+            "prototype_set_id": snap.set_id,
+            "loaded_at": snap.loaded_at,
+            "count": len(snap.index) if snap.index is not None else 0,
+            "ann": snap.index.ann.kind if snap.index is not None and snap.index.ann is not None else None,
+            "interval_s": self.interval_s,
+            "checks": self.checks,
+            "swaps": self.swaps,
+            "failures": self.failures,
+            "last_check_at": self.last_check_at,
+            "last_error": self.last_error,
+        }
@@ -1,6 +1,16 @@
 from __future__ import annotations
-from typing import Iterator
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Iterator
+
 import cv2
+import numpy as np
+
+rtsp_logger = logging.getLogger("rtsp")
+
 
 def iter_frames(rtsp_uri: str, max_frames: int = 5, stride: int = 5) -> Iterator:
     """RTSP 스트림에서 프레임 샘플링(스켈레톤)."""
@@ -18,3 +28,159 @@ def iter_frames(rtsp_uri: str, max_frames: int = 5, stride: int = 5) -> Iterator
             i += 1
     finally:
         cap.release()
+
+
+def _open_capture(uri: str, transport: str) -> cv2.VideoCapture:
+    # FFmpeg backend 옵션 (UDP는 패킷 손실 시 프레임 깨짐이 잦아 기본 tcp)
+    if transport and uri.startswith("rtsp"):
+        os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", f"rtsp_transport;{transport}")
+    cap = cv2.VideoCapture(uri, cv2.CAP_FFMPEG)
+    # 내부 버퍼 최소화 (오래된 프레임이 쌓이면 lag 증가)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class RtspReader:
+    """카메라 1대의 디코더를 열어두고 최신 프레임만 유지하는 reader 스레드.
+
+    - 연결 실패/끊김 시 지수 backoff로 재연결 (backoff_min_s ~ backoff_max_s)
+    - 모든 패킷은 grab()으로 소비하되 retrieve(디코드 결과 변환)는 sample_fps로만 수행
+    - consumer가 가져가지 않은 프레임은 최신 프레임으로 덮어씀 (drop, 카운트)
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        name: str = "",
+        sample_fps: float = 10.0,
+        backoff_min_s: float = 1.0,
+        backoff_max_s: float = 30.0,
+        transport: str = "tcp",
+    ) -> None:
+        self.uri = uri
+        self.name = name or uri
+        self.sample_interval = 1.0 / sample_fps if sample_fps > 0 else 0.0
+        self.backoff_min_s = backoff_min_s
+        self.backoff_max_s = backoff_max_s
+        self.transport = transport
+
+        self._cond = threading.Condition()
+        self._frame: np.ndarray | None = None
+        self._frame_ts = 0.0
+        self._seq = 0
+        self._taken_seq = 0
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"rtsp-{self.name}", daemon=True)
+
+        # metrics
+        self.connected = False
+        self.reconnects = 0
+        self.frames_grabbed = 0
+        self.frames_sampled = 0
+        self.frames_dropped = 0
+        self.last_error: str | None = None
+        self.source_fps = 0.0
+        self._grab_fps = 0.0
+
+    def start(self) -> "RtspReader":
+        self._thread.start()
+        return self
+
+    def stop(self, join_timeout_s: float = 5.0) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout=join_timeout_s)
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def read(self, timeout_s: float = 0.0) -> tuple[int, np.ndarray, float] | None:
+        """아직 가져가지 않은 최신 프레임 (seq, BGR frame, capture monotonic ts). 없으면 None."""
+        with self._cond:
+            if self._seq == self._taken_seq and timeout_s > 0:
+                self._cond.wait(timeout=timeout_s)
+            if self._seq == self._taken_seq or self._frame is None:
+                return None
+            self._taken_seq = self._seq
+            return self._seq, self._frame, self._frame_ts
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "frames_grabbed": self.frames_grabbed,
+            "frames_sampled": self.frames_sampled,
+            "frames_dropped": self.frames_dropped,
+            "source_fps": round(self.source_fps, 2),
+            "grab_fps": round(self._grab_fps, 2),
+            "last_error": self.last_error,
+        }
+
+    def _publish(self, frame: np.ndarray, ts: float) -> None:
+        with self._cond:
+            if self._seq != self._taken_seq:
+                self.frames_dropped += 1
+            self._frame = frame
+            self._frame_ts = ts
+            self._seq += 1
+            self.frames_sampled += 1
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        backoff = self.backoff_min_s
+        while not self._stop.is_set():
+            cap = _open_capture(self.uri, self.transport)
+            if not cap.isOpened():
+                cap.release()
+                self.connected = False
+                self.last_error = "open failed"
+                rtsp_logger.warning(f"[{self.name}] open failed, retry in {backoff:.1f}s")
+                self._stop.wait(backoff)
+                backoff = min(self.backoff_max_s, backoff * 2)
+                continue
+
+            self.connected = True
+            self.source_fps = float(cap.get(cv2.CAP_PROP_FPS) or 0.0)
+            rtsp_logger.info(f"[{self.name}] connected (fps={self.source_fps:.1f})")
+
+            next_sample = 0.0
+            window_start = time.monotonic()
+            window_grabs = 0
+            try:
+                while not self._stop.is_set():
+                    if not cap.grab():
+                        self.last_error = "stream ended"
+                        break
+                    now = time.monotonic()
+                    self.frames_grabbed += 1
+                    window_grabs += 1
+                    if now - window_start >= 1.0:
+                        self._grab_fps = window_grabs / (now - window_start)
+                        window_start, window_grabs = now, 0
+
+                    if now < next_sample:
+                        continue
+                    ok, frame = cap.retrieve()
+                    if not ok or frame is None:
+                        continue
+                    next_sample = now + self.sample_interval
+                    self._publish(frame, now)
+                    # 정상 수신이 이어지면 backoff 초기화
+                    backoff = self.backoff_min_s
+            except Exception as e:
+                self.last_error = str(e)
+                rtsp_logger.warning(f"[{self.name}] read error: {e}")
+            finally:
+                cap.release()
+                self.connected = False
+
+            if self._stop.is_set():
+                break
+            self.reconnects += 1
+            rtsp_logger.warning(f"[{self.name}] disconnected ({self.last_error}), reconnect in {backoff:.1f}s")
+            self._stop.wait(backoff)
+            backoff = min(self.backoff_max_s, backoff * 2)
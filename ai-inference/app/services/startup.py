@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+startup_logger = logging.getLogger("startup")
+
+
+class _Component:
+    def __init__(self, name: str, fn: Callable[[], None], lazy: bool) -> None:
+        self.name = name
+        self.fn = fn
+        self.lazy = lazy
+        self.status = "deferred" if lazy else "pending"
+        self.seconds: float | None = None
+        self.error: str | None = None
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+
+
+class StartupPlanner:
+    """모델/artifact 로딩 계획.
+
+    - add()로 컴포넌트 등록 (lazy: 기동 시 건너뛰고 ensure() 때 로딩)
+    - run(): lazy가 아닌 컴포넌트를 max_workers 스레드에서 병렬 로딩 (GCS 조회/다운로드/모델 생성이 겹침)
+    - 컴포넌트 실패는 기록만 하고 다른 컴포넌트는 계속 (기존처럼 서버는 뜸)
+    - report(): 컴포넌트별 status/소요 시간 (/health)
+    """
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max(1, max_workers)
+        self._components: dict[str, _Component] = {}
+        self.started_at: float | None = None
+        self.total_seconds: float | None = None
+
+    def add(self, name: str, fn: Callable[[], None], lazy: bool = False) -> None:
+        self._components[name] = _Component(name, fn, lazy)
+
+    def _run_one(self, c: _Component) -> None:
+        with c.lock:
+            if c.done.is_set():
+                return
+            c.status = "loading"
+            t0 = time.perf_counter()
+            try:
+                c.fn()
+                c.status = "ok"
+            except Exception as e:
+                c.status = "failed"
+                c.error = f"{type(e).__name__}: {e}"
+                startup_logger.warning(f"{c.name} 로딩 실패: {e}")
+            finally:
+                c.seconds = time.perf_counter() - t0
+                c.done.set()
+            startup_logger.info(f"{c.name}: {c.status} ({c.seconds:.2f}s)")
+
+    def run(self) -> None:
+        self.started_at = time.time()
+        t0 = time.perf_counter()
+        eager = [c for c in self._components.values() if not c.lazy]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="startup") as ex:
+            wait([ex.submit(self._run_one, c) for c in eager])
+        self.total_seconds = time.perf_counter() - t0
+
+    def ensure(self, *names: str) -> None:
+        """lazy 컴포넌트를 필요할 때 1회 로딩 (동시 호출 시 1번만 실행되고 나머지는 대기)."""
+        for name in names:
+            c = self._components.get(name)
+            if c is not None and not c.done.is_set():
+                self._run_one(c)
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "total_seconds": None if self.total_seconds is None else round(self.total_seconds, 3),
+            "components": {
+                c.name: {
+                    "status": c.status,
+                    "seconds": None if c.seconds is None else round(c.seconds, 3),
+                    **({"error": c.error} if c.error else {}),
+                }
+                for c in self._components.values()
+            },
+        }
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any
+
+import numpy as np
+
+scanner_logger = logging.getLogger("scanner")
+
+
+class TrayBatcher:
+    """동시에 들어온 트레이 추론 요청의 모델 단계만 모아 InferenceEngine.infer_instances_batch로 한 번에 처리.
+
+    - 첫 요청이 들어온 뒤 max_wait_ms 동안 최대 max_batch건까지 모음
+    - 모델 호출(YOLO/ResNet/kNN)은 dispatcher 스레드 1개에서만 일어나므로 GPU/CPU 경합이 없음
+    - decode/프레임 저장(prepare_tray)과 결과 생성/Central ingest(finalize_tray)는 호출자 스레드에서 실행
+      -> 느린 Central 호출이나 디코딩이 다른 요청의 batch를 막지 않음
+    - 호출자는 infer_tray(payload)로 기존 engine.infer_tray와 동일하게 사용
+    """
+
+    def __init__(self, engine, max_batch: int = 8, max_wait_ms: float = 5.0) -> None:
+        self.engine = engine
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._q: queue.Queue[tuple[tuple[np.ndarray, Any], Future]] = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="tray-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, img: np.ndarray, protos) -> Future:
+        """디코딩된 프레임 1장 -> instances list Future (protos: 요청 시작 시 고정한 prototype snapshot)"""
+        self.start()
+        fut: Future = Future()
+        self._q.put(((img, protos), fut))
+        return fut
+
+    def infer_tray(self, payload: dict[str, Any]) -> dict[str, Any]:
+        if self.max_batch <= 1:
+            return self.engine.infer_tray(payload)
+        ctx, early = self.engine.prepare_tray(payload)
+        if early is not None:
+            return early
+        instances = self.submit(ctx["img"], ctx["protos"]).result()
+        return self.engine.finalize_tray(ctx, instances)
+
+    def _collect(self) -> list[tuple[tuple[np.ndarray, Any], Future]]:
+        batch = [self._q.get()]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._q.get_nowait())
+                else:
+                    batch.append(self._q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # prototype snapshot별로 묶음 (hot swap 직후 잠깐만 2개 이상)
+            groups: dict[int, list[tuple[tuple[np.ndarray, Any], Future]]] = {}
+            for item in batch:
+                groups.setdefault(id(item[0][1]), []).append(item)
+
+            for items in groups.values():
+                protos = items[0][0][1]
+                try:
+                    results = self.engine.infer_instances_batch([img for (img, _), _ in items], protos)
+                except Exception as e:
+                    results = [e] * len(items)
+
+                for (_, fut), res in zip(items, results):
+                    if isinstance(res, Exception):
+                        fut.set_exception(res)
+                    else:
+                        fut.set_result(res)
+
+            if len(batch) > 1:
+                scanner_logger.info("[scanner] batch 추론: size=%d", len(batch))
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+import base64
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Iterator
+from urllib.parse import urlparse
+
+cache_logger = logging.getLogger("artifact_cache")
+
+_CHUNK = 1 << 20
+
+
+def _md5_file(path: str) -> str:
+    h = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _blob_version(blob) -> str | None:
+    """md5_hash가 없는 blob의 버전 키 (crc32c -> generation -> etag 순)."""
+    if getattr(blob, "crc32c", None):
+        return f"crc32c:{blob.crc32c}"
+    if getattr(blob, "generation", None):
+        return f"generation:{blob.generation}"
+    if getattr(blob, "etag", None):
+        return f"etag:{blob.etag}"
+    return None
+
+
+class ArtifactCache:
+    """모델/인덱스 artifact 로컬 캐시 (content-addressed).
+
+    - objects/<md5>/<파일명>: 내용(md5) 기준 저장, 같은 내용이면 uri가 달라도 1개만 보관
+    - 다운로드는 tmp 파일 -> md5 검증 -> rename (중간에 죽어도 깨진 파일이 캐시에 남지 않음)
+    - manifest.json: uri -> (md5, generation, version, size, path), "최신 모델" 조회 결과, 객체별 마지막 사용 시각
+      네트워크가 없거나 GCS 조회가 실패하면 manifest 기준 로컬 파일로 시작 (offline)
+    - max_bytes 초과 시 오래 안 쓴 객체부터 삭제 (LRU)
+    - 여러 uvicorn worker가 같은 디렉토리를 쓰므로 manifest 갱신은 파일 lock 하에서
+    """
+
+    def __init__(self, root: str, max_bytes: int = 20 << 30, latest_ttl_s: float = 600.0) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.latest_ttl_s = latest_ttl_s
+        self._objects_dir = os.path.join(root, "objects")
+        self._tmp_dir = os.path.join(root, "tmp")
+        self._manifest_path = os.path.join(root, "manifest.json")
+        self._lock = threading.Lock()
+        os.makedirs(self._objects_dir, exist_ok=True)
+        os.makedirs(self._tmp_dir, exist_ok=True)
+
+    # ---- manifest ----
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._lock, open(os.path.join(self.root, ".lock"), "a") as lf:
+            fcntl.flock(lf, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lf, fcntl.LOCK_UN)
+
+    def _read_manifest(self) -> dict[str, Any]:
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        for k in ("uris", "latest", "objects"):
+            data.setdefault(k, {})
+        return data
+
+    def _write_manifest(self, data: dict[str, Any]) -> None:
+        tmp = f"{self._manifest_path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, self._manifest_path)
+
+    def _usable(self, entry: dict[str, Any] | None) -> str | None:
+        """manifest 항목의 로컬 파일이 온전하면 경로 (크기 확인)."""
+        if not entry:
+            return None
+        path = entry.get("path")
+        if not path or not os.path.exists(path):
+            return None
+        if entry.get("size") is not None and os.path.getsize(path) != entry["size"]:
+            return None
+        return path
+
+    def _record(self, uri: str, entry: dict[str, Any]) -> str:
+        with self._locked():
+            data = self._read_manifest()
+            data["uris"][uri] = entry
+            data["objects"][entry["md5"]] = {"size": entry["size"], "last_used": time.time()}
+            self._evict(data, keep=entry["md5"])
+            self._write_manifest(data)
+        return entry["path"]
+
+    def _touch(self, key: str) -> None:
+        with self._locked():
+            data = self._read_manifest()
+            if key in data["objects"]:
+                data["objects"][key]["last_used"] = time.time()
+                self._write_manifest(data)
+
+    def _evict(self, data: dict[str, Any], keep: str) -> None:
+        objects = data["objects"]
+        total = sum(int(o.get("size") or 0) for o in objects.values())
+        for key, _ in sorted(objects.items(), key=lambda kv: kv[1].get("last_used", 0)):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(os.path.join(self._objects_dir, key), ignore_errors=True)
+            total -= int(objects[key].get("size") or 0)
+            del objects[key]
+            for uri in [u for u, e in data["uris"].items() if e.get("md5") == key]:
+                del data["uris"][uri]
+            cache_logger.info(f"artifact 캐시 eviction: {key}")
+
+    # ---- store ----
+    def _store(self, tmp_path: str, filename: str, expected_md5: str | None) -> tuple[str, str, int]:
+        """tmp 파일 검증 후 objects/<md5>/<filename>으로 이동 -> (path, md5, size)."""
+        md5 = _md5_file(tmp_path)
+        if expected_md5 and md5 != expected_md5:
+            os.unlink(tmp_path)
+            raise IOError(f"md5 mismatch for {filename}: expected {expected_md5}, got {md5}")
+        obj_dir = os.path.join(self._objects_dir, md5)
+        os.makedirs(obj_dir, exist_ok=True)
+        path = os.path.join(obj_dir, filename)
+        os.replace(tmp_path, path)
+        return path, md5, os.path.getsize(path)
+
+    def _tmp_file(self, filename: str) -> str:
+        fd, tmp = tempfile.mkstemp(prefix=f"{filename}.", suffix=".part", dir=self._tmp_dir)
+        os.close(fd)
+        return tmp
+
+    def _fetch_blob(self, uri: str, blob) -> str:
+        """gs blob (metadata 로드됨)을 캐시에 확보."""
+        expected = base64.b64decode(blob.md5_hash).hex() if blob.md5_hash else None
+        filename = os.path.basename(blob.name) or "artifact.bin"
+        if expected:
+            path = os.path.join(self._objects_dir, expected, filename)
+            if os.path.exists(path) and os.path.getsize(path) == blob.size:
+                self._touch(expected)
+                if self._read_manifest()["uris"].get(uri, {}).get("md5") != expected:
+                    self._record(uri, {"path": path, "md5": expected, "size": blob.size, "generation": blob.generation})
+                return path
+        else:
+            # composite object 등 md5_hash가 없는 blob: crc32c / generation / etag로 같은 버전인지 판단
+            version = _blob_version(blob)
+            entry = self._read_manifest()["uris"].get(uri)
+            path = self._usable(entry) if version and entry and entry.get("version") == version else None
+            if path:
+                self._touch(entry["md5"])
+                return path
+
+        tmp = self._tmp_file(filename)
+        try:
+            cache_logger.info(f"artifact 다운로드: {uri}")
+            blob.download_to_filename(tmp)
+            path, md5, size = self._store(tmp, filename, expected)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        return self._record(
+            uri, {"path": path, "md5": md5, "size": size, "generation": blob.generation, "version": _blob_version(blob)}
+        )
+
+    # ---- public ----
+    def fetch(self, uri: str, refresh: bool = False) -> str:
+        """uri -> 로컬 경로.
+
+        - gs://: blob md5/generation 조회 후 같은 내용이 캐시에 있으면 재사용 (조회 실패 시 manifest 기준)
+        - http(s)://: manifest에 있으면 재사용 (refresh=True면 다시 받음)
+        - file:// 또는 로컬 경로: 그대로 반환
+        """
+        u = str(uri).strip()
+        if not u:
+            raise ValueError("empty uri")
+        parsed = urlparse(u)
+        scheme = (parsed.scheme or "").lower()
+
+        if scheme in ("", "file"):
+            src = parsed.path if scheme == "file" else u
+            if not os.path.exists(src):
+                raise FileNotFoundError(src)
+            return src
+
+        cached = self._usable(self._read_manifest()["uris"].get(u))
+
+        if scheme == "gs":
+            from app.util.gcs_utils import _storage_client
+
+            try:
+                blob = _storage_client().bucket(parsed.netloc).get_blob(parsed.path.lstrip("/"))
+            except Exception as e:
+                if cached:
+                    cache_logger.warning(f"GCS 조회 실패, 로컬 캐시 사용 ({u}): {e}")
+                    return cached
+                raise
+            if blob is None:
+                raise FileNotFoundError(u)
+            return self._fetch_blob(u, blob)
+
+        if scheme in ("http", "https"):
+            if cached and not refresh:
+                return cached
+            import requests
+
+            filename = os.path.basename(parsed.path) or "artifact.bin"
+            tmp = self._tmp_file(filename)
+            try:
+                try:
+                    with requests.get(u, timeout=15, stream=True) as r:
+                        r.raise_for_status()
+                        with open(tmp, "wb") as f:
+                            for chunk in r.iter_content(_CHUNK):
+                                f.write(chunk)
+                except Exception as e:
+                    if cached:
+                        cache_logger.warning(f"다운로드 실패, 로컬 캐시 사용 ({u}): {e}")
+                        return cached
+                    raise
+                path, md5, size = self._store(tmp, filename, None)
+            finally:
+                if os.path.exists(tmp):
+                    os.unlink(tmp)
+            return self._record(u, {"path": path, "md5": md5, "size": size, "generation": None})
+
+        raise ValueError(f"unsupported uri scheme: {scheme}")
+
+    def latest(self, bucket_name: str, prefix: str, model_type: str) -> str:
+        """prefix 아래 이름에 model_type이 들어간 blob 중 최신(updated) 파일의 로컬 경로.
+
+        latest_ttl_s 이내에 조회한 결과가 있으면 GCS 목록 조회 없이 재사용,
+        목록 조회가 실패하면 마지막으로 확보한 파일 사용.
+        """
+        key = f"gs://{bucket_name}/{prefix}*{model_type}"
+        data = self._read_manifest()
+        hit = data["latest"].get(key)
+        cached = self._usable(data["uris"].get(hit["uri"])) if hit else None
+        if cached and time.time() - hit.get("resolved_at", 0) < self.latest_ttl_s:
+            self._touch(data["uris"][hit["uri"]]["md5"])
+            return cached
+
+        from app.util.gcs_utils import _storage_client
+
+        try:
+            blobs = [b for b in _storage_client().bucket(bucket_name).list_blobs(prefix=prefix) if model_type in b.name]
+        except Exception as e:
+            if cached:
+                cache_logger.warning(f"GCS 목록 조회 실패, 로컬 캐시 사용 ({key}): {e}")
+                return cached
+            raise
+        if not blobs:
+            raise FileNotFoundError(f"No model found for {prefix}*{model_type}* in {bucket_name}")
+
+        latest_blob = max(blobs, key=lambda b: b.updated)
+        uri = f"gs://{bucket_name}/{latest_blob.name}"
+        cache_logger.info(f"Latest model found: {uri}")
+        path = self._fetch_blob(uri, latest_blob)
+        with self._locked():
+            data = self._read_manifest()
+            data["latest"][key] = {"uri": uri, "resolved_at": time.time()}
+            self._write_manifest(data)
+        return path
+
+    def verify(self) -> list[str]:
+        """캐시 객체 전체 md5 재검증, 손상된 객체는 삭제하고 목록 반환."""
+        bad = []
+        with self._locked():
+            data = self._read_manifest()
+            for key in list(data["objects"]):
+                obj_dir = os.path.join(self._objects_dir, key)
+                files = os.listdir(obj_dir) if os.path.isdir(obj_dir) else []
+                if files and all(_md5_file(os.path.join(obj_dir, f)) == key for f in files):
+                    continue
+                bad.append(key)
+                shutil.rmtree(obj_dir, ignore_errors=True)
+                del data["objects"][key]
+                for uri in [u for u, e in data["uris"].items() if e.get("md5") == key]:
+                    del data["uris"][uri]
+            self._write_manifest(data)
+        return bad
+
+
+@lru_cache(maxsize=1)
+def get_artifact_cache() -> ArtifactCache:
+    root = os.getenv("ARTIFACT_CACHE_DIR", "").strip() or os.path.join(
+        os.getenv("CACHE_DIR", "/opt/ai-inference/cache"), "artifacts"
+    )
+    max_gb = float(os.getenv("ARTIFACT_CACHE_MAX_GB", "20"))
+    latest_ttl_s = float(os.getenv("ARTIFACT_LATEST_TTL_S", "600"))
+    return ArtifactCache(root, max_bytes=int(max_gb * (1 << 30)), latest_ttl_s=latest_ttl_s)
+
+
+if __name__ == "__main__":
+    # 운영 점검: python -m app.util.artifact_cache [--verify]
+    import argparse
+
+    ap = argparse.ArgumentParser(description="artifact 캐시 상태 / md5 재검증")
+    ap.add_argument("--verify", action="store_true", help="모든 객체 md5 재검증 (손상 객체 삭제)")
+    args = ap.parse_args()
+
+    cache = get_artifact_cache()
+    manifest = cache._read_manifest()
+    total = sum(int(o.get("size") or 0) for o in manifest["objects"].values())
+    print(f"root={cache.root}  objects={len(manifest['objects'])}  bytes={total}  max_bytes={cache.max_bytes}")
+    for uri, e in sorted(manifest["uris"].items()):
+        print(f"  {uri} -> {e['md5']} ({e['size']} bytes, generation={e.get('generation')})")
+    if args.verify:
+        bad = cache.verify()
+        print(f"verify: {len(bad)} corrupted" + (f" {bad}" if bad else ""))
@@ -1,5 +1,5 @@
 from __future__ import annotations
-import tempfile
+from functools import lru_cache
 from pathlib import Path
 from urllib.parse import urlparse
 from google.cloud import storage
@@ -22,6 +22,19 @@ def download_to(gs_uri: str, dest_path: str) -> str:
     return str(p)
 
 
+def download_bytes(gs_uri: str) -> bytes:
+    """gs:// 객체를 디스크를 거치지 않고 메모리(bytes)로 다운로드"""
+    bucket_name, blob_name = parse_gs_uri(gs_uri)
+    blob = _storage_client().bucket(bucket_name).blob(blob_name)
+    return blob.download_as_bytes()
+
+
+@lru_cache(maxsize=1)
+def _storage_client() -> storage.Client:
+    # 인증/세션 초기화 비용이 있으므로 반복 호출 경로에서는 재사용
+    return storage.Client()
+
+
 def upload_to_gcs(local_path: str, bucket_name: str, blob_name: str) -> str:
     """로컬 파일을 GCS 버킷에 업로드"""
     client = storage.Client()
@@ -33,108 +46,21 @@ def upload_to_gcs(local_path: str, bucket_name: str, blob_name: str) -> str:
 
 def load_latest_model(bucket_name: str, prefix: str, model_type: str, local_dir: str | None = None):
     """
-    GCS 버킷에서 최신 모델 파일을 다운로드하고 로드
+    GCS 버킷에서 최신 모델 파일을 가져와서 로드 (로컬 artifact 캐시 경유)
 
     Args:
         bucket_name: GCS 버킷 이름
         prefix: 모델 파일 prefix (예: "cctv_fall_down_")
         model_type: 모델 파일 확장자 또는 타입 (예: ".pt", ".joblib")
-        local_dir: .pt 파일 저장 디렉토리 (None이면 tempdir 사용)
+        local_dir: 미사용 (하위 호환용, 파일은 ARTIFACT_CACHE_DIR에 저장)
 
     Returns:
         .pt 파일: 로컬 경로 (str)
         .joblib 파일: 로드된 모델 객체
     """
-    import os
-    import logging
-
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blobs = list(bucket.list_blobs(prefix=prefix))
-
-    # model_type을 포함하는 파일만 필터링
-    matching_blobs = [b for b in blobs if model_type in b.name]
-
-    if not matching_blobs:
-        raise FileNotFoundError(f"No model found for {prefix}*{model_type}* in {bucket_name}")
-
-    # 가장 최근에 업데이트된 파일 선택
-    latest_blob = max(matching_blobs, key=lambda b: b.updated)
-    blob_filename = latest_blob.name.split('/')[-1]
-
-    logging.info(f"Latest model found: gs://{bucket_name}/{latest_blob.name}")
-
-    # .pt 파일: 로컬 경로 반환
-    if blob_filename.endswith('.pt'):
-        if local_dir is None:
-            local_dir = os.path.join(tempfile.gettempdir(), "yolo_models")
-        Path(local_dir).mkdir(parents=True, exist_ok=True)
-        local_path = str(Path(local_dir) / blob_filename)
-
-        if not os.path.exists(local_path):
-            logging.info(f"Downloading model to: {local_path}")
-            latest_blob.download_to_filename(local_path)
-        else:
-            logging.info(f"Model already cached: {local_path}")
+    from app.util.artifact_cache import get_artifact_cache
 
+    local_path = get_artifact_cache().latest(bucket_name, prefix, model_type)
+    if local_path.endswith('.pt'):
         return local_path
-
-    # .joblib 파일: 모델 객체 반환
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.joblib') as tmp:
-        latest_blob.download_to_filename(tmp.name)
-        model = joblib.load(tmp.name)
-
-    return model
-
-
-def upload_to_gcs(local_path: str, bucket_name: str, blob_name: str) -> str:
-    """로컬 파일을 GCS 버킷에 업로드"""
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(blob_name)
-    blob.upload_from_filename(local_path)
-    return f"gs://{bucket_name}/{blob_name}"
-
-
-def load_latest_model(bucket_name: str, prefix: str, model_type: str, local_dir: str | None = None):
-    """GCS 버킷에서 최신 모델 파일을 다운로드하고 로드"""
-    import os
-    import logging
-
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blobs = list(bucket.list_blobs(prefix=prefix))
-
-    # model_type을 포함하는 파일만 필터링
-    matching_blobs = [b for b in blobs if model_type in b.name]
-
-    if not matching_blobs:
-        raise FileNotFoundError(f"No model found for {prefix}*{model_type}* in {bucket_name}")
-
-    # 가장 최근에 업데이트된 파일 선택
-    latest_blob = max(matching_blobs, key=lambda b: b.updated)
-    blob_filename = latest_blob.name.split('/')[-1]
-
-    logging.info(f"Latest model found: gs://{bucket_name}/{latest_blob.name}")
-
-    # .pt 파일: 로컬 경로 반환
-    if blob_filename.endswith('.pt'):
-        if local_dir is None:
-            local_dir = os.path.join(tempfile.gettempdir(), "yolo_models")
-        Path(local_dir).mkdir(parents=True, exist_ok=True)
-        local_path = str(Path(local_dir) / blob_filename)
-
-        if not os.path.exists(local_path):
-            logging.info(f"Downloading model to: {local_path}")
-            latest_blob.download_to_filename(local_path)
-        else:
-            logging.info(f"Model already cached: {local_path}")
-
-        return local_path
-
-    # .joblib 파일: 모델 객체 반환
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.joblib') as tmp:
-        latest_blob.download_to_filename(tmp.name)
-        model = joblib.load(tmp.name)
-
-    return model
\ No newline at end of file
+    return joblib.load(local_path)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+DECODE_MODES = ("pil", "cv2", "cv2_reduced", "pil_draft")
+
+# cv2 reduced decode 플래그 (JPEG DCT 단계에서 1/2, 1/4, 1/8 축소)
+# IMREAD_IGNORE_ORIENTATION: PIL과 같이 EXIF 회전을 적용하지 않음
+#   (회전되면 W/H가 뒤바뀌어 sx/sy와 원본 좌표가 어긋나고, pil 모드와 결과도 달라짐)
+_CV2_REDUCED = {
+    1: cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION,
+    2: cv2.IMREAD_REDUCED_COLOR_2 | cv2.IMREAD_IGNORE_ORIENTATION,
+    4: cv2.IMREAD_REDUCED_COLOR_4 | cv2.IMREAD_IGNORE_ORIENTATION,
+    8: cv2.IMREAD_REDUCED_COLOR_8 | cv2.IMREAD_IGNORE_ORIENTATION,
+}
+
+
+def _reduce_factor(w: int, h: int, min_side: int) -> int:
+    """긴 변이 min_side 이상으로 남는 가장 큰 축소 배율(1/2/4/8)."""
+    long_side = max(w, h)
+    f = 1
+    for cand in (2, 4, 8):
+        if long_side // cand >= min_side:
+            f = cand
+    return f
+
+
+def decode_rgb(raw: bytes, mode: str = "pil", min_side: int = 1280) -> tuple[np.ndarray, tuple[int, int, int], float, float]:
+    """JPEG/PNG bytes -> RGB ndarray.
+
+    반환: (img_rgb, 원본 shape(H,W,3), sx, sy)
+      - sx/sy: 디코드된 이미지 좌표 -> 원본 좌표 배율 (축소 디코드가 아니면 1.0)
+      - 모든 mode가 EXIF orientation을 적용하지 않은 저장 방향 그대로 반환 (pil과 동일)
+
+    mode:
+      - pil:         PIL 전체 해상도 (기존 동작)
+      - cv2:         cv2.imdecode 전체 해상도 (libjpeg-turbo, 보통 PIL보다 빠름)
+      - cv2_reduced: 원본이 min_side보다 충분히 크면 1/2~1/8 축소 디코드
+      - pil_draft:   PIL draft 모드 축소 디코드 (JPEG만 적용, 그 외는 전체 해상도)
+    """
+    if mode not in DECODE_MODES:
+        raise ValueError(f"unsupported decode mode: {mode}")
+
+    if mode == "cv2":
+        bgr = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), _CV2_REDUCED[1])
+        if bgr is None:
+            raise ValueError("cv2.imdecode failed")
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        return rgb, (rgb.shape[0], rgb.shape[1], 3), 1.0, 1.0
+
+    # 헤더만 읽어 원본 크기 확인 (PIL open은 lazy)
+    im = Image.open(io.BytesIO(raw))
+    W, H = im.size
+
+    if mode == "cv2_reduced":
+        f = _reduce_factor(W, H, min_side)
+        bgr = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), _CV2_REDUCED[f])
+        if bgr is None:
+            raise ValueError("cv2.imdecode failed")
+        rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+    else:
+        if mode == "pil_draft":
+            f = _reduce_factor(W, H, min_side)
+            if f > 1:
+                im.draft("RGB", (max(1, W // f), max(1, H // f)))
+        rgb = np.array(im.convert("RGB"))
+
+    h, w = rgb.shape[:2]
+    return rgb, (H, W, 3), W / float(w), H / float(h)
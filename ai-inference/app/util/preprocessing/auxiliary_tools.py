@@ -1,5 +1,6 @@
 # ai-inference/preprocessing/auxiliary_tools.py
 
+import copy
 import cv2
 import logging
 import os
@@ -7,6 +8,7 @@ from collections import deque
 from datetime import datetime
 
 from ultralytics import YOLO
+from app.services.model_registry import InputSpec, model_lock
 from app.util.gcs_utils import load_latest_model
 
 
@@ -22,15 +24,21 @@ class AuxiliaryTools:
     YOLO 기반 Auxiliary Detection (Wheelchair 등)
     """
 
-    def __init__(self, fps=30, output_dir='./auxiliary_clips'):
+    # YOLO 입력 규격 (같은 규격의 모델과 전처리 텐서 공유)
+    INPUT_SPEC = InputSpec(imgsz=640)
+
+    def __init__(self, fps=30, output_dir='./auxiliary_clips', pt_path=None, buffer_len=None):
         """
         fps: 입력 영상 FPS
         output_dir: 클립 저장 디렉토리
+        pt_path: 로컬 모델 경로 (없으면 GCS 최신 모델)
+        buffer_len: 자체 클립용 프레임 버퍼 길이 (None이면 fps*10, 0이면 보관 안 함 - 엔진은 카메라별 FrameRing 사용)
         """
         self.logger = logging.getLogger(__name__)
         self.logger.info("GCS에서 Auxiliary 모델 로딩 중...")
 
-        pt_path = load_latest_model(GCS_BUCKET, GCS_AUXILIARY_PREFIX, ".pt")
+        if pt_path is None:
+            pt_path = load_latest_model(GCS_BUCKET, GCS_AUXILIARY_PREFIX, ".pt")
         self.model = YOLO(pt_path)
 
         self.logger.info("Auxiliary 모델 로딩 완료")
@@ -40,44 +48,66 @@ class AuxiliaryTools:
         self.output_dir = output_dir
 
         # 이벤트 클립용 프레임 버퍼 (전후 5초)
-        self.frame_buffer = deque(maxlen=fps * 10)
+        self.frame_buffer = deque(maxlen=fps * 10 if buffer_len is None else buffer_len)
         self.last_clip_path = None
 
     # =====================================================
     # 공개 함수
     # =====================================================
+    def fork(self, buffer_len=None):
+        """
+        모델은 공유하고 프레임 버퍼만 새로 가진 인스턴스 (카메라별 상태용)
+        공유 model의 predict는 predict_batch에서 model_lock으로 직렬화됨
+        """
+        other = copy.copy(self)
+        maxlen = self.frame_buffer.maxlen if buffer_len is None else buffer_len
+        other.frame_buffer = deque(maxlen=maxlen)
+        other.last_clip_path = None
+        return other
+
     def process_frame(self, frame):
         """
         프레임 처리 및 객체 검출 여부 판정
         """
-        result = {
-            "detected": False,
-            "num_objects": 0,
-            "clip_path": None
-        }
-
         try:
-            self.frame_buffer.append(frame)
+            results = self.predict_batch([frame])
+            return self.apply_result(frame, results[0])
+
+        except Exception as e:
+            self.logger.error(f"ERROR: {str(e)}")
+            raise
 
-            results = self.model.predict(
-                frame,
+    def predict_batch(self, frames):
+        """
+        여러 프레임(카메라/시점 무관)을 predict 1회로 추론
+        frames: BGR 프레임 list 또는 전처리된 (B, 3, H, W) 텐서 (FrameTensorCache.batch)
+        fork()된 인스턴스끼리 model을 공유하므로 model별 lock으로 직렬화 (ultralytics predictor는 스레드 안전하지 않음)
+        """
+        with model_lock(self.model):
+            return self.model.predict(
+                frames,
+                imgsz=self.INPUT_SPEC.imgsz,
                 conf=0.4,
                 verbose=False
             )
 
-            boxes = results[0].boxes
-            detected = boxes is not None and len(boxes) > 0
+    def apply_result(self, frame, result):
+        """
+        프레임 1장의 predict 결과로 상태(buffer) 갱신 및 검출 여부 판정
+        """
+        self.frame_buffer.append(frame)
 
-            if detected:
-                self.logger.info(f"Auxiliary 객체 감지 ({len(boxes)}개)")
+        boxes = result.boxes
+        detected = boxes is not None and len(boxes) > 0
 
-            result["detected"] = detected
-            result["num_objects"] = len(boxes) if detected else 0
-            return result
+        if detected:
+            self.logger.info(f"Auxiliary 객체 감지 ({len(boxes)}개)")
 
-        except Exception as e:
-            self.logger.error(f"ERROR: {str(e)}")
-            raise
+        return {
+            "detected": detected,
+            "num_objects": len(boxes) if detected else 0,
+            "clip_path": None
+        }
 
     # =====================================================
     # 헬퍼 함수 (내부 전용)
@@ -1,3 +1,4 @@
+import copy
 import cv2
 import logging
 import os
@@ -5,6 +6,7 @@ from collections import deque
 from datetime import datetime
 
 from ultralytics import YOLO
+from app.services.model_registry import InputSpec, model_lock
 from app.util.gcs_utils import load_latest_model
 
 
@@ -20,14 +22,20 @@ class FallDownDetection:
     YOLOv8 Pose 기반 낙상 감지 전처리 클래스
     """
 
-    def __init__(self, fps=30, output_dir='./fall_clips'):
+    # YOLO 입력 규격 (같은 규격의 모델과 전처리 텐서 공유)
+    INPUT_SPEC = InputSpec(imgsz=640)
+
+    def __init__(self, fps=30, output_dir='./fall_clips', pt_path=None, buffer_len=None):
         """
         fps: 입력 영상 FPS
+        pt_path: 로컬 모델 경로 (없으면 GCS 최신 모델)
+        buffer_len: 자체 클립용 프레임 버퍼 길이 (None이면 fps*10, 0이면 보관 안 함 - 엔진은 카메라별 FrameRing 사용)
         """
         self.logger = logging.getLogger(__name__)
         self.logger.info("GCS에서 낙상 모델 로딩 중...")
 
-        pt_path = load_latest_model(GCS_BUCKET, GCS_FALL_DOWN_PREFIX, ".pt")
+        if pt_path is None:
+            pt_path = load_latest_model(GCS_BUCKET, GCS_FALL_DOWN_PREFIX, ".pt")
         self.model = YOLO(pt_path)
 
         self.logger.info("낙상 모델 로딩 완료")
@@ -36,43 +44,66 @@ class FallDownDetection:
         self.fps = fps
         self.output_dir = output_dir
 
-        self.frame_buffer = deque(maxlen=fps * 10)  # 전후 5초
+        self.frame_buffer = deque(maxlen=fps * 10 if buffer_len is None else buffer_len)  # 전후 5초
         self.fall_counter = {}
         self.last_clip_path = None
 
         self.FALL_FRAME_THRESHOLD = 2
         self.ASPECT_RATIO_TH = 1.0
 
+    def fork(self, buffer_len=None):
+        """
+        모델은 공유하고 프레임 상태(buffer/counter)만 새로 가진 인스턴스 (카메라별 상태용)
+        공유 model의 predict는 predict_batch에서 model_lock으로 직렬화됨
+        """
+        other = copy.copy(self)
+        maxlen = self.frame_buffer.maxlen if buffer_len is None else buffer_len
+        other.frame_buffer = deque(maxlen=maxlen)
+        other.fall_counter = {}
+        other.last_clip_path = None
+        return other
+
     def process_frame(self, frame):
         """
         프레임 처리 및 낙상 여부 판정
         """
-        result = {
-            "is_fall": False,
-            "clip_path": None
-        }
-
         try:
-            self.frame_buffer.append(frame)
+            results = self.predict_batch([frame])
+            return self.apply_result(frame, results[0])
+
+        except Exception as e:
+            self.logger.error(f"ERROR: {str(e)}")
+            raise
 
-            results = self.model.predict(
-                frame,
-                imgsz=640,
+    def predict_batch(self, frames):
+        """
+        여러 프레임(카메라/시점 무관)을 predict 1회로 추론
+        frames: BGR 프레임 list 또는 전처리된 (B, 3, H, W) 텐서 (FrameTensorCache.batch)
+        fork()된 인스턴스끼리 model을 공유하므로 model별 lock으로 직렬화 (ultralytics predictor는 스레드 안전하지 않음)
+        """
+        with model_lock(self.model):
+            return self.model.predict(
+                frames,
+                imgsz=self.INPUT_SPEC.imgsz,
                 conf=0.5,
                 verbose=False
             )
 
-            is_fall = self._detect_fall(results)
+    def apply_result(self, frame, result):
+        """
+        프레임 1장의 predict 결과로 상태(buffer, fall_counter) 갱신 및 낙상 여부 판정
+        """
+        self.frame_buffer.append(frame)
 
-            if is_fall:
-                self.logger.info("낙상 감지됨")
+        is_fall = self._detect_fall([result])
 
-            result["is_fall"] = is_fall
-            return result
+        if is_fall:
+            self.logger.info("낙상 감지됨")
 
-        except Exception as e:
-            self.logger.error(f"ERROR: {str(e)}")
-            raise
+        return {
+            "is_fall": is_fall,
+            "clip_path": None
+        }
 
     def _detect_fall(self, results):
         """
@@ -0,0 +1,66 @@
+import cv2
+
+
+FLOW_BACKENDS = ("farneback", "dis_ultrafast", "farneback_half")
+
+
+class FarnebackFlow:
+    """기존 방식: 입력 해상도(320x240) 그대로 Farneback (3 levels, 3 iterations)"""
+
+    def __call__(self, prev_gray, gray):
+        return cv2.calcOpticalFlowFarneback(
+            prev_gray, gray, None,
+            pyr_scale=0.5, levels=3, winsize=15,
+            iterations=3, poly_n=5, poly_sigma=1.2, flags=0
+        )
+
+
+class DownscaledFarnebackFlow:
+    """1/scale 해상도에서 Farneback 후 원래 해상도로 복원 (벡터 크기도 scale배)
+
+    학습 시 특징(320x240 기준 magnitude)과 스케일을 맞추기 위해 flow를 다시 키움
+    """
+
+    def __init__(self, scale=2, levels=2, winsize=9, iterations=2):
+        self.scale = scale
+        self.levels = levels
+        self.winsize = winsize
+        self.iterations = iterations
+
+    def __call__(self, prev_gray, gray):
+        h, w = gray.shape[:2]
+        small = (max(1, w // self.scale), max(1, h // self.scale))
+        p = cv2.resize(prev_gray, small, interpolation=cv2.INTER_AREA)
+        g = cv2.resize(gray, small, interpolation=cv2.INTER_AREA)
+        flow = cv2.calcOpticalFlowFarneback(
+            p, g, None,
+            pyr_scale=0.5, levels=self.levels, winsize=self.winsize,
+            iterations=self.iterations, poly_n=5, poly_sigma=1.1, flags=0
+        )
+        flow = cv2.resize(flow, (w, h), interpolation=cv2.INTER_LINEAR)
+        flow *= float(self.scale)
+        return flow
+
+
+class DisFlow:
+    """DIS optical flow (ULTRAFAST preset, CPU 전용)
+
+    인스턴스 내부 버퍼를 재사용하므로 카메라(스레드)별로 따로 생성
+    """
+
+    def __init__(self, preset=cv2.DISOPTICAL_FLOW_PRESET_ULTRAFAST):
+        self._dis = cv2.DISOpticalFlow_create(preset)
+
+    def __call__(self, prev_gray, gray):
+        return self._dis.calc(prev_gray, gray, None)
+
+
+def make_flow_backend(name="farneback"):
+    """이름 -> flow 함수 객체 (prev_gray, gray) -> (H, W, 2) float32"""
+    if name == "farneback":
+        return FarnebackFlow()
+    if name == "dis_ultrafast":
+        return DisFlow()
+    if name == "farneback_half":
+        return DownscaledFarnebackFlow(scale=2)
+    raise ValueError(f"unsupported flow backend: {name} (choose from {', '.join(FLOW_BACKENDS)})")
@@ -1,9 +1,12 @@
+import copy
 import cv2
 import numpy as np
 from collections import deque
 import logging
 
 from app.util.gcs_utils import load_latest_model
+from app.util.preprocessing.optical_flow import make_flow_backend
+from app.util.preprocessing.violence_features import RollingFlowFeatures, extract_features_full
 
 # 로깅 설정
 logging.basicConfig(
@@ -18,16 +21,24 @@ GCS_PREFIX = 'cctv_'
 
 class ViolenceClassification:
 
-    def __init__(self, buffer_size=10, threshold=0.4, vote_threshold=4):
-        logging.info("GCS에서 최신 모델 로딩 중...")
-        self.classifier = load_latest_model(GCS_BUCKET, GCS_PREFIX, 'violence_classifier')
-        self.scaler = load_latest_model(GCS_BUCKET, GCS_PREFIX, 'violence_scaler')
-        logging.info("모델 로딩 완료")
+    def __init__(self, buffer_size=10, threshold=0.4, vote_threshold=4, incremental=True,
+                 flow_backend="farneback", classifier=None, scaler=None):
+        if classifier is None or scaler is None:
+            logging.info("GCS에서 최신 모델 로딩 중...")
+            classifier = load_latest_model(GCS_BUCKET, GCS_PREFIX, 'violence_classifier')
+            scaler = load_latest_model(GCS_BUCKET, GCS_PREFIX, 'violence_scaler')
+            logging.info("모델 로딩 완료")
+        self.classifier = classifier
+        self.scaler = scaler
 
         self.buffer_size = buffer_size
         self.threshold = threshold
         self.vote_threshold = vote_threshold
 
+        # incremental=True: 프레임별 통계만 윈도우에 push/pop (플로우 배열 보관/재연결 없음)
+        # incremental=False: 기존 방식 (flow/diff 배열 보관 후 매번 전체 재계산)
+        self.incremental = incremental
+        self.rolling = RollingFlowFeatures(maxlen=buffer_size)
         self.flow_history = deque(maxlen=buffer_size)
         self.diff_history = deque(maxlen=buffer_size)
         self.violence_history = deque(maxlen=10)
@@ -35,106 +46,38 @@ class ViolenceClassification:
         self.prev_gray = None
         self.frame_size = (320, 240)
 
+        # 옵티컬 플로우 backend (farneback / dis_ultrafast / farneback_half)
+        self.flow_backend = flow_backend
+        self._flow = make_flow_backend(flow_backend)
+
     def _reset(self):
         """버퍼 초기화"""
+        self.rolling.clear()
         self.flow_history.clear()
         self.diff_history.clear()
         self.violence_history.clear()
         self.prev_gray = None
 
+    def fork(self, flow_backend=None):
+        """모델/스케일러는 공유하고 플로우 히스토리만 새로 가진 인스턴스 (카메라별 상태용)
+
+        flow_backend: 지정 시 해당 backend 사용 (store별 CPU 예산에 맞춰 선택)
+        """
+        other = copy.copy(self)
+        other.flow_backend = flow_backend or self.flow_backend
+        other._flow = make_flow_backend(other.flow_backend)
+        other.rolling = RollingFlowFeatures(maxlen=self.buffer_size)
+        other.flow_history = deque(maxlen=self.flow_history.maxlen)
+        other.diff_history = deque(maxlen=self.diff_history.maxlen)
+        other.violence_history = deque(maxlen=self.violence_history.maxlen)
+        other.prev_gray = None
+        return other
+
     def _extract_features(self):
         """옵티컬 플로우 히스토리에서 특징 추출"""
-        if len(self.flow_history) < 5:
-            return None
-
-        features = {}
-
-        # 모든 프레임의 magnitude와 angle
-        all_mags = np.concatenate([f[0].flatten() for f in self.flow_history])
-        all_angles = np.concatenate([f[1].flatten() for f in self.flow_history])
-
-        # 1. 옵티컬 플로우 크기 통계
-        features['flow_mag_mean'] = np.mean(all_mags)
-        features['flow_mag_std'] = np.std(all_mags)
-        features['flow_mag_max'] = np.max(all_mags)
-        features['flow_mag_median'] = np.median(all_mags)
-        features['flow_mag_q75'] = np.percentile(all_mags, 75)
-        features['flow_mag_q90'] = np.percentile(all_mags, 90)
-        features['flow_mag_q95'] = np.percentile(all_mags, 95)
-
-        # 2. 프레임별 움직임 통계
-        frame_mean_mags = [np.mean(f[0]) for f in self.flow_history]
-        features['frame_mag_mean'] = np.mean(frame_mean_mags)
-        features['frame_mag_std'] = np.std(frame_mean_mags)
-        features['frame_mag_max'] = np.max(frame_mean_mags)
-        features['frame_mag_range'] = np.max(frame_mean_mags) - np.min(frame_mean_mags)
-
-        # 3. 움직임 변화율
-        if len(frame_mean_mags) > 1:
-            mag_diff = np.diff(frame_mean_mags)
-            features['mag_acc_mean'] = np.mean(np.abs(mag_diff))
-            features['mag_acc_std'] = np.std(mag_diff)
-            features['mag_acc_max'] = np.max(np.abs(mag_diff))
-        else:
-            features['mag_acc_mean'] = 0
-            features['mag_acc_std'] = 0
-            features['mag_acc_max'] = 0
-
-        # 4. 높은 움직임 비율
-        features['high_motion_ratio'] = np.mean(all_mags > 5.0)
-        features['very_high_motion_ratio'] = np.mean(all_mags > 10.0)
-
-        # 5. 프레임 차이 통계
-        if self.diff_history:
-            all_diffs = np.concatenate([d.flatten() for d in self.diff_history])
-            features['diff_mean'] = np.mean(all_diffs)
-            features['diff_std'] = np.std(all_diffs)
-            features['diff_max'] = np.max(all_diffs)
-        else:
-            features['diff_mean'] = 0
-            features['diff_std'] = 0
-            features['diff_max'] = 0
-
-        # 6. 영역별 움직임
-        h, w = self.flow_history[0][0].shape
-        regions = [
-            (0, h//2, 0, w//2),
-            (0, h//2, w//2, w),
-            (h//2, h, 0, w//2),
-            (h//2, h, w//2, w)
-        ]
-        region_names = ['top_left', 'top_right', 'bottom_left', 'bottom_right']
-
-        for (y1, y2, x1, x2), name in zip(regions, region_names):
-            region_mags = np.concatenate([f[0][y1:y2, x1:x2].flatten() for f in self.flow_history])
-            features[f'{name}_mag_mean'] = np.mean(region_mags)
-            features[f'{name}_mag_std'] = np.std(region_mags)
-
-        # 7. 방향 히스토그램
-        angle_hist, _ = np.histogram(all_angles, bins=8, range=(0, 2*np.pi))
-        angle_hist = angle_hist / (np.sum(angle_hist) + 1e-6)
-        for i, h in enumerate(angle_hist):
-            features[f'angle_hist_{i}'] = h
-
-        # 8. 움직임 엔트로피
-        mag_hist, _ = np.histogram(all_mags, bins=20, range=(0, 20))
-        mag_hist = mag_hist / (np.sum(mag_hist) + 1e-6)
-        entropy = -np.sum(mag_hist * np.log(mag_hist + 1e-10))
-        features['motion_entropy'] = entropy
-
-        # 9. 움직임 피크
-        if len(frame_mean_mags) >= 3:
-            peaks = 0
-            for i in range(1, len(frame_mean_mags) - 1):
-                if frame_mean_mags[i] > frame_mean_mags[i-1] and frame_mean_mags[i] > frame_mean_mags[i+1]:
-                    peaks += 1
-            features['motion_peaks'] = peaks
-            features['motion_peaks_ratio'] = peaks / len(frame_mean_mags)
-        else:
-            features['motion_peaks'] = 0
-            features['motion_peaks_ratio'] = 0
-
-        return features
+        if self.incremental:
+            return self.rolling.features()
+        return extract_features_full(self.flow_history, self.diff_history)
 
     def process_frame(self, frame):
         """프레임 처리 및 폭력 여부 판정"""
@@ -157,23 +100,25 @@ class ViolenceClassification:
             return result
 
         # 옵티컬 플로우 계산
-        flow = cv2.calcOpticalFlowFarneback(
-            self.prev_gray, gray, None,
-            pyr_scale=0.5, levels=3, winsize=15,
-            iterations=3, poly_n=5, poly_sigma=1.2, flags=0
-        )
+        flow = self._flow(self.prev_gray, gray)
 
         mag, ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
-        self.flow_history.append((mag, ang))
 
         # 프레임 차이
         diff = cv2.absdiff(gray, self.prev_gray)
-        self.diff_history.append(diff)
+
+        if self.incremental:
+            self.rolling.push(mag, ang, diff)
+            history_len = len(self.rolling)
+        else:
+            self.flow_history.append((mag, ang))
+            self.diff_history.append(diff)
+            history_len = len(self.flow_history)
 
         self.prev_gray = gray.copy()
 
         # 예측
-        if len(self.flow_history) >= 5:
+        if history_len >= 5:
             result['ready'] = True
             features = self._extract_features()
 
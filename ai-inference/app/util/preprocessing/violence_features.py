@@ -0,0 +1,293 @@
+import numpy as np
+from collections import deque
+
+
+# 분위수 계산용 고해상도 magnitude 히스토그램 (0 ~ _Q_MAX 균등, 초과분은 마지막 bin)
+_Q_BIN_WIDTH = 0.01
+_Q_MAX = 40.0
+_Q_BINS = int(_Q_MAX / _Q_BIN_WIDTH) + 1
+
+_REGION_NAMES = ['top_left', 'top_right', 'bottom_left', 'bottom_right']
+
+
+def _regions(h, w):
+    return [
+        (0, h//2, 0, w//2),
+        (0, h//2, w//2, w),
+        (h//2, h, 0, w//2),
+        (h//2, h, w//2, w)
+    ]
+
+
+def extract_features_full(flow_history, diff_history):
+    """옵티컬 플로우 히스토리에서 특징 추출 (기존 구현: 매 프레임 전체 윈도우 재계산)"""
+    if len(flow_history) < 5:
+        return None
+
+    features = {}
+
+    # 모든 프레임의 magnitude와 angle
+    all_mags = np.concatenate([f[0].flatten() for f in flow_history])
+    all_angles = np.concatenate([f[1].flatten() for f in flow_history])
+
+    # 1. 옵티컬 플로우 크기 통계
+    features['flow_mag_mean'] = np.mean(all_mags)
+    features['flow_mag_std'] = np.std(all_mags)
+    features['flow_mag_max'] = np.max(all_mags)
+    features['flow_mag_median'] = np.median(all_mags)
+    features['flow_mag_q75'] = np.percentile(all_mags, 75)
+    features['flow_mag_q90'] = np.percentile(all_mags, 90)
+    features['flow_mag_q95'] = np.percentile(all_mags, 95)
+
+    # 2. 프레임별 움직임 통계
+    frame_mean_mags = [np.mean(f[0]) for f in flow_history]
+    features['frame_mag_mean'] = np.mean(frame_mean_mags)
+    features['frame_mag_std'] = np.std(frame_mean_mags)
+    features['frame_mag_max'] = np.max(frame_mean_mags)
+    features['frame_mag_range'] = np.max(frame_mean_mags) - np.min(frame_mean_mags)
+
+    # 3. 움직임 변화율
+    if len(frame_mean_mags) > 1:
+        mag_diff = np.diff(frame_mean_mags)
+        features['mag_acc_mean'] = np.mean(np.abs(mag_diff))
+        features['mag_acc_std'] = np.std(mag_diff)
+        features['mag_acc_max'] = np.max(np.abs(mag_diff))
+    else:
+        features['mag_acc_mean'] = 0
+        features['mag_acc_std'] = 0
+        features['mag_acc_max'] = 0
+
+    # 4. 높은 움직임 비율
+    features['high_motion_ratio'] = np.mean(all_mags > 5.0)
+    features['very_high_motion_ratio'] = np.mean(all_mags > 10.0)
+
+    # 5. 프레임 차이 통계
+    if diff_history:
+        all_diffs = np.concatenate([d.flatten() for d in diff_history])
+        features['diff_mean'] = np.mean(all_diffs)
+        features['diff_std'] = np.std(all_diffs)
+        features['diff_max'] = np.max(all_diffs)
+    else:
+        features['diff_mean'] = 0
+        features['diff_std'] = 0
+        features['diff_max'] = 0
+
+    # 6. 영역별 움직임
+    h, w = flow_history[0][0].shape
+    for (y1, y2, x1, x2), name in zip(_regions(h, w), _REGION_NAMES):
+        region_mags = np.concatenate([f[0][y1:y2, x1:x2].flatten() for f in flow_history])
+        features[f'{name}_mag_mean'] = np.mean(region_mags)
+        features[f'{name}_mag_std'] = np.std(region_mags)
+
+    # 7. 방향 히스토그램
+    angle_hist, _ = np.histogram(all_angles, bins=8, range=(0, 2*np.pi))
+    angle_hist = angle_hist / (np.sum(angle_hist) + 1e-6)
+    for i, h in enumerate(angle_hist):
+        features[f'angle_hist_{i}'] = h
+
+    # 8. 움직임 엔트로피
+    mag_hist, _ = np.histogram(all_mags, bins=20, range=(0, 20))
+    mag_hist = mag_hist / (np.sum(mag_hist) + 1e-6)
+    entropy = -np.sum(mag_hist * np.log(mag_hist + 1e-10))
+    features['motion_entropy'] = entropy
+
+    # 9. 움직임 피크
+    _add_peak_features(features, frame_mean_mags)
+
+    return features
+
+
+def _add_peak_features(features, frame_mean_mags):
+    if len(frame_mean_mags) >= 3:
+        peaks = 0
+        for i in range(1, len(frame_mean_mags) - 1):
+            if frame_mean_mags[i] > frame_mean_mags[i-1] and frame_mean_mags[i] > frame_mean_mags[i+1]:
+                peaks += 1
+        features['motion_peaks'] = peaks
+        features['motion_peaks_ratio'] = peaks / len(frame_mean_mags)
+    else:
+        features['motion_peaks'] = 0
+        features['motion_peaks_ratio'] = 0
+
+
+def _moments(a):
+    """(합, 제곱합) float64"""
+    a = a.astype(np.float64, copy=False)
+    return float(a.sum()), float(np.dot(a.ravel(), a.ravel()))
+
+
+def _std(n, s, ss):
+    mean = s / n
+    return float(np.sqrt(max(ss / n - mean * mean, 0.0)))
+
+
+class _FrameStats:
+    """프레임 1장의 (mag, ang, diff) 요약 통계 (윈도우 push/pop 단위)"""
+
+    __slots__ = (
+        'n', 'mag_sum', 'mag_sq', 'mag_max', 'q_hist', 'high', 'very_high',
+        'mag_hist', 'angle_hist', 'diff_n', 'diff_sum', 'diff_sq', 'diff_max',
+        'region_n', 'region_sum', 'region_sq',
+    )
+
+    def __init__(self, mag, ang, diff):
+        h, w = mag.shape
+        self.n = mag.size
+        self.mag_sum, self.mag_sq = _moments(mag)
+        self.mag_max = float(mag.max())
+
+        q_idx = np.minimum((mag * (1.0 / _Q_BIN_WIDTH)).astype(np.int32), _Q_BINS - 1)
+        self.q_hist = np.bincount(q_idx.ravel(), minlength=_Q_BINS).astype(np.int64)
+        self.high = int(np.count_nonzero(mag > 5.0))
+        self.very_high = int(np.count_nonzero(mag > 10.0))
+
+        self.mag_hist = np.histogram(mag, bins=20, range=(0, 20))[0].astype(np.int64)
+        self.angle_hist = np.histogram(ang, bins=8, range=(0, 2*np.pi))[0].astype(np.int64)
+
+        self.diff_n = diff.size
+        self.diff_sum, self.diff_sq = _moments(diff)
+        self.diff_max = float(diff.max())
+
+        self.region_n = np.zeros(4, dtype=np.int64)
+        self.region_sum = np.zeros(4, dtype=np.float64)
+        self.region_sq = np.zeros(4, dtype=np.float64)
+        for k, (y1, y2, x1, x2) in enumerate(_regions(h, w)):
+            r = mag[y1:y2, x1:x2]
+            self.region_n[k] = r.size
+            self.region_sum[k], self.region_sq[k] = _moments(r)
+
+    @property
+    def mean(self):
+        return self.mag_sum / self.n
+
+
+class RollingFlowFeatures:
+    """extract_features_full과 같은 특징을 윈도우 통계의 push/pop으로 계산.
+
+    - 프레임마다 합/제곱합/히스토그램/영역합만 계산해 누적 (윈도우 전체 재연결/정렬 없음)
+    - 분위수(median/q75/q90/q95)는 합친 고해상도 히스토그램(bin 폭 _Q_BIN_WIDTH)에서 보간
+    - 그 외 특징은 부동소수 오차 범위 내에서 기존 구현과 동일
+    """
+
+    def __init__(self, maxlen):
+        self._window = deque(maxlen=maxlen)
+        self._clear_totals()
+
+    def _clear_totals(self):
+        self.n = 0
+        self.mag_sum = 0.0
+        self.mag_sq = 0.0
+        self.q_hist = np.zeros(_Q_BINS, dtype=np.int64)
+        self.high = 0
+        self.very_high = 0
+        self.mag_hist = np.zeros(20, dtype=np.int64)
+        self.angle_hist = np.zeros(8, dtype=np.int64)
+        self.diff_n = 0
+        self.diff_sum = 0.0
+        self.diff_sq = 0.0
+        self.region_n = np.zeros(4, dtype=np.int64)
+        self.region_sum = np.zeros(4, dtype=np.float64)
+        self.region_sq = np.zeros(4, dtype=np.float64)
+
+    def __len__(self):
+        return len(self._window)
+
+    def clear(self):
+        self._window.clear()
+        self._clear_totals()
+
+    def _apply(self, st, sign):
+        self.n += sign * st.n
+        self.mag_sum += sign * st.mag_sum
+        self.mag_sq += sign * st.mag_sq
+        self.q_hist += sign * st.q_hist
+        self.high += sign * st.high
+        self.very_high += sign * st.very_high
+        self.mag_hist += sign * st.mag_hist
+        self.angle_hist += sign * st.angle_hist
+        self.diff_n += sign * st.diff_n
+        self.diff_sum += sign * st.diff_sum
+        self.diff_sq += sign * st.diff_sq
+        self.region_n += sign * st.region_n
+        self.region_sum += sign * st.region_sum
+        self.region_sq += sign * st.region_sq
+
+    def push(self, mag, ang, diff):
+        st = _FrameStats(mag, ang, diff)
+        if len(self._window) == self._window.maxlen:
+            self._apply(self._window[0], -1)
+        self._window.append(st)
+        self._apply(st, +1)
+
+    def _quantile(self, q, mag_max):
+        """np.percentile(linear)과 같은 rank를 히스토그램 누적분포에서 찾아 bin 내부 선형 보간"""
+        rank = q * (self.n - 1)
+        cum = np.cumsum(self.q_hist)
+        b = int(np.searchsorted(cum, rank, side='right'))
+        b = min(b, _Q_BINS - 1)
+        before = cum[b - 1] if b > 0 else 0
+        count = self.q_hist[b]
+        lo = b * _Q_BIN_WIDTH
+        hi = mag_max if b == _Q_BINS - 1 else min((b + 1) * _Q_BIN_WIDTH, mag_max)
+        if count <= 0 or hi <= lo:
+            return float(min(lo, mag_max))
+        return float(lo + (rank - before + 0.5) / count * (hi - lo))
+
+    def features(self):
+        if len(self._window) < 5:
+            return None
+
+        features = {}
+        window = self._window
+        mag_max = max(st.mag_max for st in window)
+
+        # 1. 옵티컬 플로우 크기 통계
+        features['flow_mag_mean'] = self.mag_sum / self.n
+        features['flow_mag_std'] = _std(self.n, self.mag_sum, self.mag_sq)
+        features['flow_mag_max'] = mag_max
+        features['flow_mag_median'] = self._quantile(0.5, mag_max)
+        features['flow_mag_q75'] = self._quantile(0.75, mag_max)
+        features['flow_mag_q90'] = self._quantile(0.90, mag_max)
+        features['flow_mag_q95'] = self._quantile(0.95, mag_max)
+
+        # 2. 프레임별 움직임 통계 (윈도우 길이 <= buffer_size라 직접 계산)
+        frame_mean_mags = np.array([st.mean for st in window])
+        features['frame_mag_mean'] = np.mean(frame_mean_mags)
+        features['frame_mag_std'] = np.std(frame_mean_mags)
+        features['frame_mag_max'] = np.max(frame_mean_mags)
+        features['frame_mag_range'] = np.max(frame_mean_mags) - np.min(frame_mean_mags)
+
+        # 3. 움직임 변화율
+        mag_diff = np.diff(frame_mean_mags)
+        features['mag_acc_mean'] = np.mean(np.abs(mag_diff))
+        features['mag_acc_std'] = np.std(mag_diff)
+        features['mag_acc_max'] = np.max(np.abs(mag_diff))
+
+        # 4. 높은 움직임 비율
+        features['high_motion_ratio'] = self.high / self.n
+        features['very_high_motion_ratio'] = self.very_high / self.n
+
+        # 5. 프레임 차이 통계
+        features['diff_mean'] = self.diff_sum / self.diff_n
+        features['diff_std'] = _std(self.diff_n, self.diff_sum, self.diff_sq)
+        features['diff_max'] = max(st.diff_max for st in window)
+
+        # 6. 영역별 움직임
+        for k, name in enumerate(_REGION_NAMES):
+            n = int(self.region_n[k])
+            features[f'{name}_mag_mean'] = self.region_sum[k] / n
+            features[f'{name}_mag_std'] = _std(n, self.region_sum[k], self.region_sq[k])
+
+        # 7. 방향 히스토그램
+        angle_hist = self.angle_hist / (np.sum(self.angle_hist) + 1e-6)
+        for i, h in enumerate(angle_hist):
+            features[f'angle_hist_{i}'] = h
+
+        # 8. 움직임 엔트로피
+        mag_hist = self.mag_hist / (np.sum(self.mag_hist) + 1e-6)
+        features['motion_entropy'] = -np.sum(mag_hist * np.log(mag_hist + 1e-10))
+
+        # 9. 움직임 피크
+        _add_peak_features(features, list(frame_mean_mags))
+
+        return features
@@ -2,13 +2,20 @@ from __future__ import annotations
 
 import base64
 import os
+import queue
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
 from datetime import datetime, timezone
 from typing import Any
 
 from app.core.config import settings
-from app.services.central_client import CentralClient, CentralClientError
-from app.util.gcs_utils import download_to
+from app.services.central_client import CentralClient, CentralClientError, get_central_client
+from app.util.gcs_utils import download_bytes, download_to
+
+
+# 종료 시 이미 claim한 job을 마무리하는 최대 시간 (넘으면 error로 complete)
+_SHUTDOWN_GRACE_S = 10.0
 
 
 def _utcnow() -> datetime:
@@ -30,15 +37,9 @@ def _strip_data_url_prefix(b64: str) -> str:
     return base64.b64encode(raw).decode("utf-8")
 
 
-def _download_frame_as_base64(frame_gcs_uri: str) -> str:
-    """gs://... URI를 로컬에 다운로드 후 base64로 변환."""
-    _ensure_cache_dir()
-    ts = int(datetime.now(timezone.utc).timestamp() * 1000)
-    local = f"{settings.CACHE_DIR}/tray_{ts}.jpg"
-    download_to(frame_gcs_uri, local)
-    with open(local, "rb") as f:
-        raw = f.read()
-    return base64.b64encode(raw).decode("utf-8")
+def _download_frame_bytes(frame_gcs_uri: str) -> bytes:
+    """gs://... URI를 메모리로 다운로드 (임시 파일/base64 변환 없음)."""
+    return download_bytes(frame_gcs_uri)
 
 
 def _resolve_store_code(
@@ -113,15 +114,117 @@ def _best_session_uuid(job: dict[str, Any]) -> str:
     return f"job-{jid}" if jid is not None else "unknown-session"
 
 
-def run_worker_loop(engine, *, once: bool = False) -> None:
+def _claim_next_job(client: CentralClient, worker_id: str) -> tuple[dict[str, Any] | None, bool]:
+    """다음 job claim. (job, waited) 반환.
+
+    waited=True면 서버에서 이미 대기했으므로 job이 없어도 sleep 없이 바로 재요청.
+    Central에 long-poll 엔드포인트가 없으면 client가 /claim으로 전환하므로 waited=False.
+    """
+    if settings.WORKER_LONG_POLL_S > 0 and client.long_poll_supported:
+        job = client.claim_tray_job_wait(worker_id=worker_id, wait_s=settings.WORKER_LONG_POLL_S)
+        return job, client.long_poll_supported
+    return client.claim_tray_job(worker_id=worker_id), False
+
+
+def _claim_next_jobs(client: CentralClient, worker_id: str, max_jobs: int) -> tuple[list[dict[str, Any]], bool]:
+    """최대 max_jobs건 claim (Central SKIP LOCKED 기반, 다중 워커 안전). (jobs, waited) 반환."""
+    wait_s = settings.WORKER_LONG_POLL_S if settings.WORKER_LONG_POLL_S > 0 and client.long_poll_supported else None
+    jobs = client.claim_tray_jobs(worker_id=worker_id, max_jobs=max_jobs, wait_s=wait_s)
+    return jobs, wait_s is not None and client.long_poll_supported
+
+
+def _build_job_payload(
+    client: CentralClient,
+    job: dict[str, Any],
+    store_id_to_code: dict[int, str],
+    device_id_to_code: dict[int, str],
+) -> dict[str, Any]:
+    """claim된 job -> engine.infer_tray payload (프레임 다운로드 포함)."""
+    frame_gcs_uri = str(job.get("frame_gcs_uri") or "").strip()
+    if not frame_gcs_uri:
+        raise ValueError("frame_gcs_uri is missing")
+
+    # engine이 요구하는 필드(session_uuid/store_code/device_code)를 확보
+    session_uuid = _best_session_uuid(job)
+
+    store_id = job.get("store_id")
+    device_id = job.get("device_id")
+    store_code = _resolve_store_code(client, int(store_id) if store_id is not None else None, store_id_to_code)
+    device_code = _resolve_device_code(
+        client,
+        store_code,
+        int(device_id) if device_id is not None else None,
+        device_id_to_code,
+    )
+
+    # 데모 안전망: 빈 문자열이면 engine에서 ValueError가 나므로 placeholder 사용
+    store_code = (store_code or "UNKNOWN")
+    device_code = (device_code or "UNKNOWN")
+
+    attempt_no = int(job.get("attempt_no") or 1)
+
+    frame_bytes = _download_frame_bytes(frame_gcs_uri)
+    return {
+        "session_uuid": session_uuid,
+        "attempt_no": attempt_no,
+        "store_code": store_code,
+        "device_code": device_code,
+        "frame_bytes": frame_bytes,
+    }
+
+
+def _prefetch_job(
+    engine,
+    client: CentralClient,
+    job: dict[str, Any],
+    store_id_to_code: dict[int, str],
+    device_id_to_code: dict[int, str],
+) -> dict[str, Any]:
+    """pipeline prefetch 단계: 다운로드 + decode (compute 스레드는 decode된 프레임으로 추론만)."""
+    return engine.decode_tray_frame(_build_job_payload(client, job, store_id_to_code, device_id_to_code))
+
+
+def _complete_job(client: CentralClient, job_id: int, ai_resp: dict[str, Any]) -> None:
+    client.complete_tray_job(
+        job_id=job_id,
+        decision=str(ai_resp.get("decision") or "UNKNOWN"),
+        overlap_score=ai_resp.get("overlap_score"),
+        result_json=ai_resp.get("result_json") or {},
+        error=None,
+    )
+
+
+def _fail_job(client: CentralClient, job_id: int, e: Exception) -> None:
+    # 실패 시: job을 FAILED로 마킹하고 error 저장
+    try:
+        client.complete_tray_job(
+            job_id=job_id,
+            decision="UNKNOWN",
+            overlap_score=None,
+            result_json={"error": "worker_exception"},
+            error=str(e),
+        )
+    except Exception:
+        pass
+
+
+def _complete_job_or_fail(client: CentralClient, job_id: int, ai_resp: dict[str, Any]) -> None:
+    try:
+        _complete_job(client, job_id, ai_resp)
+    except Exception as e:
+        _fail_job(client, job_id, e)
+
+
+def run_worker_loop(engine, *, once: bool = False, batcher=None) -> None:
     """Central Inference Job polling 루프.
 
     - Central에서 job claim
     - GCS에서 프레임 다운로드
-    - engine.infer_tray 수행
+    - engine.infer_tray 수행 (batcher가 있으면 /infer/tray 요청과 함께 batch 처리)
     - Central로 complete
     """
-    client = CentralClient()
+    client = get_central_client()
+    infer_tray = batcher.infer_tray if batcher is not None else engine.infer_tray
     worker_id = settings.WORKER_ID
 
     # store/device code 캐시(요청 비용 절감)
@@ -130,7 +233,7 @@ def run_worker_loop(engine, *, once: bool = False) -> None:
 
     while True:
         try:
-            job = client.claim_tray_job(worker_id=worker_id)
+            job, waited = _claim_next_job(client, worker_id)
         except CentralClientError:
             time.sleep(settings.POLL_INTERVAL_S)
             if once:
@@ -138,81 +241,140 @@ def run_worker_loop(engine, *, once: bool = False) -> None:
             continue
 
         if not job:
-            time.sleep(settings.POLL_INTERVAL_S)
+            if not waited:
+                time.sleep(settings.POLL_INTERVAL_S)
             if once:
                 return
             continue
 
         job_id = int(job.get("job_id") or 0)
         try:
-            frame_gcs_uri = str(job.get("frame_gcs_uri") or "").strip()
-            if not frame_gcs_uri:
-                raise ValueError("frame_gcs_uri is missing")
-
-            # engine이 요구하는 필드(session_uuid/store_code/device_code)를 확보
-            session_uuid = _best_session_uuid(job)
-
-            store_id = job.get("store_id")
-            device_id = job.get("device_id")
-            store_code = _resolve_store_code(client, int(store_id) if store_id is not None else None, store_id_to_code)
-            device_code = _resolve_device_code(
-                client,
-                store_code,
-                int(device_id) if device_id is not None else None,
-                device_id_to_code,
-            )
-
-            # 데모 안전망: 빈 문자열이면 engine에서 ValueError가 나므로 placeholder 사용
-            store_code = (store_code or "UNKNOWN")
-            device_code = (device_code or "UNKNOWN")
-
-            attempt_no = int(job.get("attempt_no") or 1)
-
-            frame_b64 = _download_frame_as_base64(frame_gcs_uri)
-            payload: dict[str, Any] = {
-                "session_uuid": session_uuid,
-                "attempt_no": attempt_no,
-                "store_code": store_code,
-                "device_code": device_code,
-                "frame_b64": frame_b64,
-            }
-
-            ai_resp = engine.infer_tray(payload)
-            decision = str(ai_resp.get("decision") or "UNKNOWN")
-            overlap_score = ai_resp.get("overlap_score")
-            result_json = ai_resp.get("result_json") or {}
-
-            client.complete_tray_job(
-                job_id=job_id,
-                decision=decision,
-                overlap_score=overlap_score,
-                result_json=result_json,
-                error=None,
-            )
+            payload = _build_job_payload(client, job, store_id_to_code, device_id_to_code)
+            ai_resp = infer_tray(payload)
+            _complete_job(client, job_id, ai_resp)
         except Exception as e:
-            # 실패 시: job을 FAILED로 마킹하고 error 저장
-            try:
-                client.complete_tray_job(
-                    job_id=job_id,
-                    decision="UNKNOWN",
-                    overlap_score=None,
-                    result_json={"error": "worker_exception"},
-                    error=str(e),
-                )
-            except Exception:
-                pass
+            _fail_job(client, job_id, e)
 
         if once:
             return
 
 
+def run_worker_pipeline(engine, *, batcher=None, stop: threading.Event | None = None) -> None:
+    """파이프라인 worker (AI_WORKER_PIPELINE=1).
+
+    claim -> (prefetch pool) 다운로드/디코드(engine.decode_tray_frame) -> bounded queue -> (compute threads) 추론
+          -> (complete pool) Central complete 비동기 전송
+
+    - 네트워크 I/O(claim/GCS/complete)가 모델 연산과 겹쳐서 진행됨
+    - prefetch queue가 가득 차면 claim이 멈추므로(backpressure) 과도한 job 선점이 없음
+    - 단계별 동시성: WORKER_PREFETCH_THREADS / WORKER_PREFETCH_QUEUE /
+      WORKER_COMPUTE_THREADS / WORKER_COMPLETE_THREADS
+    - stop 시 이미 claim한 job(queue 대기/prefetch 중)은 _SHUTDOWN_GRACE_S 안에 추론해서 complete,
+      못 끝낸 job은 error로 complete (Central에 RUNNING으로 남지 않음)
+    """
+    client = get_central_client()
+    infer_tray = batcher.infer_tray if batcher is not None else engine.infer_tray
+    worker_id = settings.WORKER_ID
+    stop = stop or threading.Event()
+
+    store_id_to_code: dict[int, str] = {}
+    device_id_to_code: dict[int, str] = {}
+
+    prefetch_pool = ThreadPoolExecutor(
+        max_workers=max(1, settings.WORKER_PREFETCH_THREADS), thread_name_prefix="worker-prefetch"
+    )
+    complete_pool = ThreadPoolExecutor(
+        max_workers=max(1, settings.WORKER_COMPLETE_THREADS), thread_name_prefix="worker-complete"
+    )
+    # (job_id, payload future) — claim 순서 유지
+    ready: queue.Queue[tuple[int, Future]] = queue.Queue(maxsize=max(1, settings.WORKER_PREFETCH_QUEUE))
+    # stop 이후 queue에 넣지 못한 claim job
+    leftover: list[tuple[int, Future]] = []
+
+    def _compute() -> None:
+        while not stop.is_set():
+            try:
+                job_id, fut = ready.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                ai_resp = infer_tray(fut.result())
+                complete_pool.submit(_complete_job_or_fail, client, job_id, ai_resp)
+            except Exception as e:
+                complete_pool.submit(_fail_job, client, job_id, e)
+
+    compute_threads = [
+        threading.Thread(target=_compute, name=f"worker-compute-{i}", daemon=True)
+        for i in range(max(1, settings.WORKER_COMPUTE_THREADS))
+    ]
+    for t in compute_threads:
+        t.start()
+
+    try:
+        while not stop.is_set():
+            # queue 여유분만큼만 claim (claim된 job이 오래 대기하지 않도록)
+            max_jobs = max(1, min(settings.WORKER_CLAIM_BATCH, ready.maxsize - ready.qsize()))
+            try:
+                jobs, waited = _claim_next_jobs(client, worker_id, max_jobs)
+            except CentralClientError:
+                stop.wait(settings.POLL_INTERVAL_S)
+                continue
+
+            if not jobs:
+                if not waited:
+                    stop.wait(settings.POLL_INTERVAL_S)
+                continue
+
+            for job in jobs:
+                job_id = int(job.get("job_id") or 0)
+                fut = prefetch_pool.submit(_prefetch_job, engine, client, job, store_id_to_code, device_id_to_code)
+                # queue가 가득 찬 채로 stop되면 막히지 않도록 timeout으로 넣음
+                while True:
+                    try:
+                        ready.put((job_id, fut), timeout=0.5)
+                        break
+                    except queue.Full:
+                        if stop.is_set():
+                            leftover.append((job_id, fut))
+                            break
+    finally:
+        stop.set()
+        for t in compute_threads:
+            t.join(timeout=5.0)
+
+        # 이미 claim한 job 마무리 (남은 시간 안에 추론, 아니면 error로 complete)
+        while True:
+            try:
+                leftover.append(ready.get_nowait())
+            except queue.Empty:
+                break
+        deadline = time.monotonic() + _SHUTDOWN_GRACE_S
+        for job_id, fut in leftover:
+            try:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise FutureTimeout()
+                ai_resp = infer_tray(fut.result(timeout=remaining))
+                complete_pool.submit(_complete_job_or_fail, client, job_id, ai_resp)
+            except FutureTimeout:
+                complete_pool.submit(_fail_job, client, job_id, RuntimeError("worker shutdown before job finished"))
+            except Exception as e:
+                complete_pool.submit(_fail_job, client, job_id, e)
+
+        prefetch_pool.shutdown(wait=False)
+        complete_pool.shutdown(wait=True)
+
+
 def main() -> None:
     # 별도 프로세스로 worker만 띄우는 용도
     from app.services.engine import InferenceEngine
 
     eng = InferenceEngine()
     eng.startup_load()
-    run_worker_loop(eng)
+    if settings.AI_WORKER_PIPELINE:
+        run_worker_pipeline(eng)
+    else:
+        run_worker_loop(eng)
 
 
 if __name__ == "__main__":
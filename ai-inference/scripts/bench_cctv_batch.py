@@ -0,0 +1,72 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from app.services.cctv_batch import process_frames_batch
+
+
+def load_frames(video: str | None, n: int, size: tuple[int, int]) -> list[np.ndarray]:
+    """비디오에서 n장 (없으면 랜덤 노이즈 프레임)."""
+    w, h = size
+    if not video:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 255, (h, w, 3), dtype=np.uint8) for _ in range(n)]
+    cap = cv2.VideoCapture(video)
+    frames = []
+    while len(frames) < n:
+        ok, frame = cap.read()
+        if not ok:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            if not frames:
+                raise SystemExit(f"cannot read {video}")
+            continue
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def build_detector(kind: str, pt_path: str | None):
+    if kind == "fall":
+        from app.util.preprocessing.fall_down_detection import FallDownDetection
+        return FallDownDetection(pt_path=pt_path)
+    from app.util.preprocessing.auxiliary_tools import AuxiliaryTools
+    return AuxiliaryTools(pt_path=pt_path)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="낙상/Auxiliary YOLO 다중 카메라 batch 처리량 (frames/sec)")
+    ap.add_argument("--kind", choices=["fall", "aux"], default="fall")
+    ap.add_argument("--model", default=None, help="로컬 .pt (없으면 GCS 최신 모델)")
+    ap.add_argument("--video", default=None, help="샘플 영상 (없으면 랜덤 프레임)")
+    ap.add_argument("--size", default="1280x720")
+    ap.add_argument("--batches", default="1,2,4,8,16")
+    ap.add_argument("--frames", type=int, default=128, help="batch 크기별 측정 프레임 수")
+    args = ap.parse_args()
+
+    w, h = (int(v) for v in args.size.split("x"))
+    base = build_detector(args.kind, args.model)
+    batches = [int(b) for b in args.batches.split(",")]
+    frames = load_frames(args.video, max(batches), (w, h))
+
+    # warm-up (CUDA context / 첫 predict)
+    process_frames_batch([(base, frames[0])], 1)
+
+    print(f"kind={args.kind}  size={w}x{h}  frames/batch-size={args.frames}")
+    for bs in batches:
+        # 카메라 bs대: detector 상태는 카메라별 fork, 모델은 공유
+        cams = [base.fork(buffer_len=1) for _ in range(bs)]
+        rounds = max(1, args.frames // bs)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            out = process_frames_batch([(c, frames[i]) for i, c in enumerate(cams)], bs)
+            errs = [o for o in out if isinstance(o, Exception)]
+            if errs:
+                raise errs[0]
+        dt = time.perf_counter() - t0
+        n = rounds * bs
+        print(f"batch={bs:<3} frames={n:<5} {n / dt:8.1f} frames/s  {dt / rounds * 1000:8.1f} ms/batch")
@@ -0,0 +1,54 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import statistics
+import time
+
+import cv2
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="infer_cctv detector 실행 방식 비교 (thread vs process)")
+    ap.add_argument("--clips", nargs="+", required=True, help="CCTV 샘플 클립 (mp4)")
+    ap.add_argument("--modes", default="thread,process")
+    ap.add_argument("--repeat", type=int, default=3, help="모드별 클립 반복 횟수")
+    ap.add_argument("--motion_gate", action="store_true", help="움직임 게이트 사용 (기본: 끔, 모든 프레임 추론)")
+    args = ap.parse_args()
+
+    # 업로드/Central 저장 없이 추론만 측정
+    os.environ["AI_MOCK_MODE"] = "0"
+    os.environ.pop("GCS_BUCKET_CCTV", None)
+    os.environ["CCTV_MOTION_GATE"] = "1" if args.motion_gate else "0"
+
+    from app.services.engine import InferenceEngine
+
+    engine = InferenceEngine()
+    engine.startup_load()
+
+    total_frames = 0
+    for clip in args.clips:
+        cap = cv2.VideoCapture(clip)
+        total_frames += int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+    print(f"cores={os.cpu_count()}  clips={len(args.clips)}  frames/pass={total_frames}  repeat={args.repeat}")
+    print(f"{'mode':<8} {'mean s':>8} {'p50 s':>8} {'frames/s':>9}  events")
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        engine.cctv_exec_mode = mode
+        # 워커 프로세스 시작/모델 로딩은 측정에서 제외 (warm-up 1회)
+        engine.infer_cctv({"clip_local_path": args.clips[0], "store_code": "", "device_code": ""})
+
+        times, events = [], []
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            for clip in args.clips:
+                out = engine.infer_cctv({"clip_local_path": clip, "store_code": "", "device_code": ""})
+                events.extend(e["event_type"] for e in out["events"])
+            times.append(time.perf_counter() - t0)
+
+        mean_s = statistics.mean(times)
+        counts = {t: events.count(t) // args.repeat for t in sorted(set(events))}
+        print(f"{mode:<8} {mean_s:8.2f} {statistics.median(times):8.2f} {total_frames / mean_s:9.1f}  {counts}")
+
+    if engine._cctv_proc_pool is not None:
+        engine._cctv_proc_pool.close()
@@ -0,0 +1,54 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import statistics
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services.central_client import CentralClient
+
+
+def _report(name: str, samples_ms: list[float]) -> None:
+    s = sorted(samples_ms)
+    p95 = s[min(len(s) - 1, int(len(s) * 0.95))]
+    print(f"{name:<28} n={len(s):<4} mean={statistics.mean(s):7.1f}ms  p50={statistics.median(s):7.1f}ms  p95={p95:7.1f}ms")
+
+
+def bench_per_call_client(url: str, headers: dict[str, str], n: int) -> list[float]:
+    """기존 방식: 호출마다 httpx.Client 생성 (매번 TCP/TLS handshake)."""
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        with httpx.Client(timeout=10.0) as c:
+            r = c.get(url, headers=headers)
+        r.raise_for_status()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def bench_pooled_client(cc: CentralClient, n: int) -> list[float]:
+    """풀링 방식: CentralClient 1개 재사용 (keep-alive / HTTP/2)."""
+    cc.list_stores()  # warm-up (최초 연결)
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        cc.list_stores()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="CentralClient 호출 지연 비교 (per-call client vs pooled)")
+    ap.add_argument("-n", type=int, default=50)
+    args = ap.parse_args()
+
+    cc = CentralClient()
+    url = f"{cc.base}/api/v1/stores"
+    print(f"target: {url}  CENTRAL_HTTP2={settings.CENTRAL_HTTP2}")
+
+    _report("per-call httpx.Client", bench_per_call_client(url, cc._headers(), args.n))
+    _report("pooled CentralClient", bench_pooled_client(cc, args.n))
+    cc.close()
@@ -0,0 +1,44 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from app.util.image_decode import DECODE_MODES, decode_rgb
+
+
+def list_images(d: str) -> list[Path]:
+    exts = (".jpg", ".jpeg", ".png")
+    return sorted(p for p in Path(d).iterdir() if p.suffix.lower() in exts)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="트레이 프레임 디코드 모드별 시간/메모리 비교")
+    ap.add_argument("--img_dir", required=True, help="샘플 트레이 이미지 디렉토리")
+    ap.add_argument("--min_side", type=int, default=1280, help="TRAY_DECODE_MIN_SIDE")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    paths = list_images(args.img_dir)
+    if not paths:
+        raise SystemExit(f"no images in {args.img_dir}")
+    raws = [p.read_bytes() for p in paths]
+    print(f"images={len(raws)}  min_side={args.min_side}")
+
+    for mode in DECODE_MODES:
+        times_ms = []
+        mem = []
+        shape = None
+        for _ in range(args.repeat):
+            for raw in raws:
+                t0 = time.perf_counter()
+                img, orig, sx, sy = decode_rgb(raw, mode=mode, min_side=args.min_side)
+                times_ms.append((time.perf_counter() - t0) * 1000)
+                mem.append(img.nbytes)
+                shape = (img.shape, orig, round(sx, 2))
+        print(
+            f"{mode:<12} mean={statistics.mean(times_ms):7.2f}ms  p50={statistics.median(times_ms):7.2f}ms"
+            f"  mem/frame={statistics.mean(mem) / 1e6:6.1f}MB  last={shape}"
+        )
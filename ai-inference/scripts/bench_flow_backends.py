@@ -0,0 +1,143 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from app.util.preprocessing.optical_flow import FLOW_BACKENDS, make_flow_backend
+from app.util.preprocessing.violence_features import RollingFlowFeatures
+
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def list_labeled_clips(clips_dir: str, positive: set[str]) -> list[tuple[Path, int]]:
+    """clips_dir/<label>/*.mp4 -> (path, 1 if label in positive else 0)"""
+    out = []
+    for label_dir in sorted(p for p in Path(clips_dir).iterdir() if p.is_dir()):
+        y = 1 if label_dir.name.lower() in positive else 0
+        out.extend((p, y) for p in sorted(label_dir.iterdir()) if p.suffix.lower() in VIDEO_EXTS)
+    return out
+
+
+def sampled_grays(path: Path, frame_interval: int, max_frames: int, size=(320, 240)) -> list[np.ndarray]:
+    """infer_cctv와 동일하게 frame_interval마다 1장, 320x240 gray."""
+    cap = cv2.VideoCapture(str(path))
+    grays = []
+    i = 0
+    while len(grays) < max_frames:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        if i % frame_interval == 0:
+            grays.append(cv2.cvtColor(cv2.resize(frame, size), cv2.COLOR_BGR2GRAY))
+        i += 1
+    cap.release()
+    return grays
+
+
+def run_backend(name: str, grays: list[np.ndarray], buffer_size: int) -> tuple[list[float], np.ndarray]:
+    """backend로 flow 계산 -> (flow ms 목록, 특징 벡터 (N, D))"""
+    flow_fn = make_flow_backend(name)
+    rolling = RollingFlowFeatures(maxlen=buffer_size)
+    times_ms, feats = [], []
+    for prev, gray in zip(grays, grays[1:]):
+        t0 = time.perf_counter()
+        flow = flow_fn(prev, gray)
+        times_ms.append((time.perf_counter() - t0) * 1000)
+        mag, ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+        rolling.push(mag, ang, cv2.absdiff(gray, prev))
+        f = rolling.features()
+        if f is not None:
+            feats.append(np.array(list(f.values()), dtype=np.float64))
+    return times_ms, np.stack(feats) if feats else np.zeros((0, 0))
+
+
+def load_model(classifier_path: str | None, scaler_path: str | None):
+    if classifier_path and scaler_path:
+        import joblib
+        return joblib.load(classifier_path), joblib.load(scaler_path)
+    from app.util.gcs_utils import load_latest_model
+    from app.util.preprocessing.violence_classification import GCS_BUCKET, GCS_PREFIX
+    return (
+        load_latest_model(GCS_BUCKET, GCS_PREFIX, "violence_classifier"),
+        load_latest_model(GCS_BUCKET, GCS_PREFIX, "violence_scaler"),
+    )
+
+
+def scores(y_true: list[int], y_pred: list[int]) -> dict[str, float]:
+    tp = sum(1 for t, p in zip(y_true, y_pred) if t and p)
+    fp = sum(1 for t, p in zip(y_true, y_pred) if not t and p)
+    fn = sum(1 for t, p in zip(y_true, y_pred) if t and not p)
+    acc = sum(1 for t, p in zip(y_true, y_pred) if t == p) / max(1, len(y_true))
+    prec = tp / max(1, tp + fp)
+    rec = tp / max(1, tp + fn)
+    f1 = 2 * prec * rec / max(1e-9, prec + rec)
+    return {"acc": acc, "prec": prec, "rec": rec, "f1": f1}
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="폭력 감지 optical flow backend별 속도/정확도 비교 (기준: farneback)")
+    ap.add_argument("--clips_dir", required=True, help="라벨 디렉토리 구조: <clips_dir>/<label>/*.mp4")
+    ap.add_argument("--positive", default="violence,fight", help="양성 라벨 디렉토리 이름 (콤마)")
+    ap.add_argument("--backends", default=",".join(FLOW_BACKENDS))
+    ap.add_argument("--frame_interval", type=int, default=3)
+    ap.add_argument("--max_frames", type=int, default=150, help="클립당 샘플 프레임 상한")
+    ap.add_argument("--buffer_size", type=int, default=10)
+    ap.add_argument("--threshold", type=float, default=0.4)
+    ap.add_argument("--classifier", default=None, help="로컬 violence_classifier joblib (없으면 GCS)")
+    ap.add_argument("--scaler", default=None, help="로컬 violence_scaler joblib (없으면 GCS)")
+    ap.add_argument("--no_model", action="store_true", help="분류기 없이 속도/특징 차이만 측정")
+    args = ap.parse_args()
+
+    clips = list_labeled_clips(args.clips_dir, {p.strip().lower() for p in args.positive.split(",")})
+    if not clips:
+        raise SystemExit(f"no labeled clips in {args.clips_dir}")
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if "farneback" not in backends:
+        backends.insert(0, "farneback")
+    model = None if args.no_model else load_model(args.classifier, args.scaler)
+
+    print(f"clips={len(clips)}  positives={sum(y for _, y in clips)}  cores={os.cpu_count()}  cv2 threads={cv2.getNumThreads()}")
+
+    y_true = [y for _, y in clips]
+    results: dict[str, dict] = {b: {"ms": [], "pred": [], "maxprob": [], "feats": []} for b in backends}
+    for path, _ in clips:
+        grays = sampled_grays(path, args.frame_interval, args.max_frames)
+        for b in backends:
+            ms, feats = run_backend(b, grays, args.buffer_size)
+            r = results[b]
+            r["ms"].extend(ms)
+            r["feats"].append(feats)
+            if model is not None:
+                clf, scaler = model
+                probs = clf.predict_proba(scaler.transform(feats))[:, 1] if len(feats) else np.zeros(0)
+                # infer_cctv와 동일: 한 번이라도 threshold 이상이면 폭력
+                r["maxprob"].append(float(probs.max()) if len(probs) else 0.0)
+                r["pred"].append(int(len(probs) > 0 and probs.max() >= args.threshold))
+
+    base = results["farneback"]
+    print(f"{'backend':<16} {'flow ms':>8} {'p50':>7} {'speedup':>8} {'feat drift':>11}", end="")
+    print(f" {'acc':>6} {'prec':>6} {'rec':>6} {'f1':>6} {'agree':>6} {'|dprob|':>8}" if model is not None else "")
+    base_ms = statistics.mean(base["ms"])
+    for b in backends:
+        r = results[b]
+        mean_ms = statistics.mean(r["ms"])
+        # 특징 벡터 상대 차이 (farneback 기준, 특징별 스케일 정규화)
+        drifts = []
+        for fb, fx in zip(base["feats"], r["feats"]):
+            if len(fb) and len(fx):
+                denom = np.abs(fb).mean(axis=0) + 1e-6
+                drifts.append(float(np.mean(np.abs(fx - fb) / denom)))
+        drift = statistics.mean(drifts) if drifts else 0.0
+        line = f"{b:<16} {mean_ms:8.2f} {statistics.median(r['ms']):7.2f} {base_ms / mean_ms:7.2f}x {drift:11.4f}"
+        if model is not None:
+            s = scores(y_true, r["pred"])
+            agree = sum(1 for p, q in zip(r["pred"], base["pred"]) if p == q) / len(y_true)
+            dprob = statistics.mean(abs(p - q) for p, q in zip(r["maxprob"], base["maxprob"]))
+            line += f" {s['acc']:6.3f} {s['prec']:6.3f} {s['rec']:6.3f} {s['f1']:6.3f} {agree:6.3f} {dprob:8.4f}"
+        print(line)
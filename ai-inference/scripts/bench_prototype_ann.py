@@ -0,0 +1,100 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.prototype_index import IvfBackend, load_index, save_index
+
+
+def synthetic_catalog(n_items: int, per_item: int, dim: int, seed: int) -> tuple[np.ndarray, list[int]]:
+    """SKU별 중심 주변에 prototype이 모인 카탈로그 (실제 ResNet50 임베딩 분포와 비슷하게 군집)"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(n_items, dim)).astype(np.float32)
+    vecs = np.repeat(centers, per_item, axis=0) + 0.6 * rng.normal(size=(n_items * per_item, dim)).astype(np.float32)
+    ids = np.repeat(np.arange(1, n_items + 1), per_item).tolist()
+    return vecs, ids
+
+
+def make_queries(index_vectors: np.ndarray, n: int, noise: float, seed: int) -> np.ndarray:
+    """prototype에 노이즈를 더한 쿼리 (트레이 crop 임베딩 대용)"""
+    rng = np.random.default_rng(seed + 1)
+    base = np.asarray(index_vectors[rng.choice(index_vectors.shape[0], size=n, replace=False)], dtype=np.float32)
+    return base + noise * rng.normal(size=base.shape).astype(np.float32) / np.sqrt(base.shape[1])
+
+
+def timed(index, Q: np.ndarray, k: int, batch: int) -> tuple[list, list[float]]:
+    res, times_ms = [], []
+    for i in range(0, Q.shape[0], batch):
+        t0 = time.perf_counter()
+        res.extend(index.knn_batch(Q[i:i + batch], k=k))
+        times_ms.append((time.perf_counter() - t0) * 1000)
+    return res, times_ms
+
+
+def p95(xs: list[float]) -> float:
+    return sorted(xs)[int(0.95 * (len(xs) - 1))]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="prototype 인덱스 exact vs IVF 근사 검색 recall@k / 지연 비교")
+    ap.add_argument("--npy", help="기존 인덱스 .npy (없으면 합성 카탈로그)")
+    ap.add_argument("--meta", help="기존 인덱스 meta .json")
+    ap.add_argument("--items", type=int, default=1000, help="합성: SKU 수")
+    ap.add_argument("--per_item", type=int, default=50, help="합성: SKU당 prototype 수")
+    ap.add_argument("--dim", type=int, default=2048)
+    ap.add_argument("--queries", type=int, default=512)
+    ap.add_argument("--noise", type=float, default=8.0, help="쿼리 노이즈 (합성/실제 공통)")
+    ap.add_argument("--k", type=int, default=5)
+    ap.add_argument("--batch", type=int, default=16, help="knn_batch 1회당 쿼리 수 (트레이 1장 crop 수)")
+    ap.add_argument("--nlist", type=int, default=0, help="0이면 4*sqrt(N)")
+    ap.add_argument("--nprobes", default="1,4,8,16,32")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    if args.npy and args.meta:
+        vecs = np.load(args.npy)
+        with open(args.meta, "r", encoding="utf-8") as f:
+            ids = json.load(f)["item_ids"]
+    else:
+        vecs, ids = synthetic_catalog(args.items, args.per_item, args.dim, args.seed)
+
+    with tempfile.TemporaryDirectory() as d:
+        t0 = time.perf_counter()
+        save_index(f"{d}/ivf.npy", f"{d}/ivf.json", vecs, {"item_ids": ids}, ann="ivf", nlist=args.nlist or None)
+        build_s = time.perf_counter() - t0
+        index = load_index(f"{d}/ivf.npy", f"{d}/ivf.json")
+        nlist = index.ann.nlist
+
+        Q = make_queries(index.vectors, args.queries, args.noise, args.seed)
+
+        # 같은 (재배열된) vectors에서 exact 검색을 정답으로 사용
+        ann = index.ann
+        index.ann = None
+        exact, exact_ms = timed(index, Q, args.k, args.batch)
+        exact_rows = [
+            set(r.tolist()) for r in
+            np.argsort(1.0 - (Q / np.linalg.norm(Q, axis=1, keepdims=True)) @ np.asarray(index.vectors).T, axis=1)[:, :args.k]
+        ]
+
+        print(f"N={len(index)}  D={index.dim}  nlist={nlist}  queries={Q.shape[0]}  batch={args.batch}  k={args.k}  build={build_s:.1f}s")
+        print(f"{'backend':<12} {'recall@k':>9} {'top1 item':>10} {'p50 ms':>8} {'p95 ms':>8} {'speedup':>8}")
+        print(f"{'exact':<12} {1.0:9.3f} {1.0:10.3f} {statistics.median(exact_ms):8.2f} {p95(exact_ms):8.2f} {1.0:8.2f}")
+
+        for nprobe in [int(x) for x in args.nprobes.split(",") if x.strip()]:
+            index.ann = IvfBackend(ann.centroids, ann.offsets, nprobe=nprobe)
+            approx, ms = timed(index, Q, args.k, args.batch)
+
+            # recall@k: exact 상위 k개 row 중 IVF가 찾은 비율 (row 단위)
+            rows = [set(r.tolist()) for r, _ in index.ann.search(
+                (Q / np.linalg.norm(Q, axis=1, keepdims=True)).astype(index.vectors.dtype), index.vectors, args.k,
+            )]
+            recall = float(np.mean([len(a & b) / len(b) for a, b in zip(rows, exact_rows)]))
+            top1 = float(np.mean([bool(a) and a[0][0] == e[0][0] for a, e in zip(approx, exact)]))
+            speedup = statistics.median(exact_ms) / statistics.median(ms)
+            print(f"{'ivf/' + str(index.ann.nprobe):<12} {recall:9.3f} {top1:10.3f} {statistics.median(ms):8.2f} {p95(ms):8.2f} {speedup:8.2f}")
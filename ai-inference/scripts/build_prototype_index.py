@@ -1,4 +1,6 @@
-import os
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
 import json
 import argparse
 from datetime import datetime
@@ -11,6 +13,8 @@ import torch.nn as nn
 from torchvision import models, transforms
 from torchvision.models import ResNet50_Weights
 
+from app.services.prototype_index import save_index
+
 
 def l2norm(x: torch.Tensor, eps: float = 1e-12) -> torch.Tensor:
     return x / (x.norm(dim=1, keepdim=True) + eps)
@@ -45,7 +49,7 @@ def list_images(d):
 
 
 @torch.no_grad()
-def main(proto_dir: str, out_dir: str, device: str, batch: int):
+def main(proto_dir: str, out_dir: str, device: str, batch: int, ann_kw: dict):
     os.makedirs(out_dir, exist_ok=True)
 
     model = get_model(device)
@@ -98,28 +102,52 @@ def main(proto_dir: str, out_dir: str, device: str, batch: int):
     npy_path = os.path.join(out_dir, f"prototype_index_{ts}.npy")
     js_path = os.path.join(out_dir, f"prototype_index_{ts}.json")
 
-    np.save(npy_path, mat)
-
+    # 정규화 + page-aligned 저장 -> AI 서버는 mmap으로 복사 없이 로드
     meta = {
         "item_ids": ids,
         "model": "resnet50_imagenet1k_v2_fc_identity",
-        "dim": int(mat.shape[1]),
-        "count": int(mat.shape[0]),
         "created_at": datetime.now().isoformat()
     }
-    with open(js_path, "w", encoding="utf-8") as f:
-        json.dump(meta, f, ensure_ascii=False)
+    save_index(npy_path, js_path, mat, meta, **ann_kw)
 
     print("saved:", npy_path)
     print("saved:", js_path)
     print("N,D:", mat.shape)
 
 
+def convert(npy_path: str, meta_path: str, out_dir: str, ann_kw: dict):
+    """기존 인덱스(np.save)를 mmap용 정규화 + page-aligned 포맷으로 변환"""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+
+    out_npy = os.path.join(out_dir, os.path.basename(npy_path))
+    out_js = os.path.join(out_dir, os.path.basename(meta_path))
+    save_index(out_npy, out_js, np.load(npy_path), meta, **ann_kw)
+
+    print("saved:", out_npy)
+    print("saved:", out_js)
+
+
 if __name__ == "__main__":
     ap = argparse.ArgumentParser()
-    ap.add_argument("--proto_dir", required=True)
+    ap.add_argument("--proto_dir")
     ap.add_argument("--out_dir", required=True)
     ap.add_argument("--device", default="cpu")
     ap.add_argument("--batch", type=int, default=32)
+    ap.add_argument("--convert", nargs=2, metavar=("NPY", "META_JSON"), help="기존 인덱스를 mmap 포맷으로 변환")
+    ap.add_argument("--ann", choices=["none", "ivf"], default="none", help="근사 검색 인덱스 (대형 카탈로그용)")
+    ap.add_argument("--nlist", type=int, default=0, help="IVF list 수 (0이면 4*sqrt(N))")
+    ap.add_argument("--nprobe", type=int, default=8, help="검색 시 기본 probe list 수 (PROTOTYPE_ANN_NPROBE로 덮어쓰기)")
     args = ap.parse_args()
-    main(args.proto_dir, args.out_dir, args.device, args.batch)
+    ann_kw = {
+        "ann": None if args.ann == "none" else args.ann,
+        "nlist": args.nlist or None,
+        "nprobe": args.nprobe,
+    }
+    if args.convert:
+        convert(args.convert[0], args.convert[1], args.out_dir, ann_kw)
+    elif args.proto_dir:
+        main(args.proto_dir, args.out_dir, args.device, args.batch, ann_kw)
+    else:
+        ap.error("--proto_dir 또는 --convert 필요")
@@ -0,0 +1,115 @@
+import os, sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+
+import cv2
+import numpy as np
+import torch
+
+from app.services.model_registry import InputSpec, letterbox_tensor, results_to_frame
+
+
+def load_frames(video: str | None, n: int, size: tuple[int, int]) -> list[np.ndarray]:
+    """비디오에서 n장 (없으면 도형을 그린 합성 프레임, 가로/세로 비율을 섞음)."""
+    if video:
+        cap = cv2.VideoCapture(video)
+        frames = []
+        while len(frames) < n:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            raise SystemExit(f"cannot read {video}")
+        return frames
+
+    w, h = size
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(n):
+        fw, fh = (w, h) if i % 2 == 0 else (h, w)
+        f = rng.integers(0, 60, (fh, fw, 3), dtype=np.uint8)
+        for _ in range(4):
+            x, y = int(rng.integers(0, fw - 80)), int(rng.integers(0, fh - 160))
+            cv2.rectangle(f, (x, y), (x + 80, y + 160), tuple(int(c) for c in rng.integers(80, 255, 3)), -1)
+        frames.append(f)
+    return frames
+
+
+def iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """(N,4) x (M,4) xyxy -> (N,M) IoU"""
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.prod(np.clip(rb - lt, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(
+        description="YOLO predict(frame) vs letterbox_tensor + results_to_frame 결과 좌표 parity (낙상/Auxiliary 공유 전처리)"
+    )
+    ap.add_argument("--pt", required=True, help="YOLO 가중치 (.pt) 또는 모델 yaml")
+    ap.add_argument("--video", default=None, help="샘플 영상 (없으면 합성 프레임)")
+    ap.add_argument("--frames", type=int, default=8)
+    ap.add_argument("--size", default="1280x720", help="합성 프레임 크기 WxH")
+    ap.add_argument("--imgsz", type=int, default=640)
+    ap.add_argument("--conf", type=float, default=0.25)
+    ap.add_argument("--min_iou", type=float, default=0.9, help="매칭된 box의 최소 IoU")
+    ap.add_argument("--max_unmatched", type=float, default=0.1, help="매칭 안 된 box 비율 허용치")
+    args = ap.parse_args()
+
+    from ultralytics import YOLO
+
+    w, h = (int(x) for x in args.size.lower().split("x"))
+    frames = load_frames(args.video, args.frames, (w, h))
+    model = YOLO(args.pt)
+    spec = InputSpec(imgsz=args.imgsz)
+
+    ious: list[float] = []
+    kpt_err: list[float] = []
+    n_ref = n_got = unmatched = 0
+    for frame in frames:
+        ref = model.predict(frame, imgsz=args.imgsz, conf=args.conf, verbose=False)[0]
+        got = model.predict(torch.stack([letterbox_tensor(frame, spec)]), imgsz=args.imgsz, conf=args.conf, verbose=False)
+        got = results_to_frame(got, [frame], spec)[0]
+
+        a = ref.boxes.xyxy.cpu().numpy() if ref.boxes is not None else np.zeros((0, 4))
+        b = got.boxes.xyxy.cpu().numpy() if got.boxes is not None else np.zeros((0, 4))
+        n_ref += len(a)
+        n_got += len(b)
+        if len(a) == 0 or len(b) == 0:
+            unmatched += max(len(a), len(b))
+            continue
+
+        # IoU 큰 쌍부터 1:1 매칭
+        m = iou(a, b)
+        used_a: set[int] = set()
+        used_b: set[int] = set()
+        for i, j in sorted(zip(*np.nonzero(m > 0)), key=lambda ij: -m[ij]):
+            if i in used_a or j in used_b:
+                continue
+            used_a.add(i)
+            used_b.add(j)
+            ious.append(float(m[i, j]))
+            if ref.keypoints is not None and got.keypoints is not None:
+                ka, kb = ref.keypoints.xy[i].cpu().numpy(), got.keypoints.xy[j].cpu().numpy()
+                visible = (ka.sum(axis=1) > 0) & (kb.sum(axis=1) > 0)
+                if visible.any():
+                    kpt_err.append(float(np.abs(ka[visible] - kb[visible]).max()))
+        unmatched += (len(a) - len(used_a)) + (len(b) - len(used_b))
+
+    print(f"frames={len(frames)}  imgsz={args.imgsz}  boxes predict(frame)={n_ref}  tensor={n_got}  unmatched={unmatched}")
+    if ious:
+        print(f"matched IoU: mean={np.mean(ious):.3f}  min={np.min(ious):.3f}")
+    if kpt_err:
+        print(f"keypoint max |diff| px: mean={np.mean(kpt_err):.1f}  max={np.max(kpt_err):.1f}")
+
+    total = max(1, max(n_ref, n_got))
+    if (ious and min(ious) < args.min_iou) or unmatched / total > args.max_unmatched:
+        print("MISMATCH")
+        raise SystemExit(1)
+    print("OK")
@@ -0,0 +1,70 @@
+import threading
+import time
+import types
+
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+pytest.importorskip("google.cloud.storage")
+
+from app.services.cctv_batch import process_frames_batch
+from app.services.detector_state import DetectorStatePool
+from app.util.preprocessing import fall_down_detection
+from app.util.preprocessing.fall_down_detection import FallDownDetection
+
+
+class _SharedModel:
+    """YOLO 대용: predict 동시 진입 수를 기록"""
+
+    def __init__(self, pt_path) -> None:
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self._guard = threading.Lock()
+
+    def predict(self, frames, **kwargs):
+        with self._guard:
+            self.active += 1
+            self.calls += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.005)
+        with self._guard:
+            self.active -= 1
+        return [types.SimpleNamespace(boxes=None, keypoints=None) for _ in frames]
+
+
+def test_two_cameras_share_model_without_concurrent_predict(monkeypatch):
+    monkeypatch.setattr(fall_down_detection, "YOLO", _SharedModel)
+    base = FallDownDetection(pt_path="shared.pt", buffer_len=0)
+    pool = DetectorStatePool()
+    frames = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(6)]
+    n_rounds = 20
+    start = threading.Barrier(2)
+    errors: list[BaseException] = []
+    seen: dict[str, list[int]] = {}
+
+    def run(camera: str) -> None:
+        try:
+            start.wait()
+            for _ in range(n_rounds):
+                with pool.acquire(camera, lambda key: base.fork(buffer_len=4)) as det:
+                    out = process_frames_batch([(det, f) for f in frames], max_batch=3)
+                    assert all(r == {"is_fall": False, "clip_path": None} for r in out)
+                    seen.setdefault(camera, []).append(id(det))
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(cam,)) for cam in ("cam-a", "cam-b")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert not errors
+    assert base.model.calls == 2 * n_rounds * 2
+    assert base.model.max_active == 1
+    # 카메라별 상태는 분리, 모델은 공유
+    assert len(set(seen["cam-a"])) == len(set(seen["cam-b"])) == 1
+    assert seen["cam-a"][0] != seen["cam-b"][0]
+    assert pool.stats()["created"] == 2
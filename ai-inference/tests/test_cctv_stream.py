@@ -0,0 +1,85 @@
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+pytest.importorskip("google.cloud.storage")
+
+from app.services.cctv_stream import ClipWriter, EventClips, FrameRing, fan_out
+from app.services.motion_gate import MotionGate, MotionGateConfig
+
+
+class _Out:
+    """ClipExporter.open 대용: 기록된 프레임 idx만 모음"""
+
+    def __init__(self) -> None:
+        self.idx: list[int] = []
+        self.encoded: Future = Future()
+
+    def write(self, frame) -> None:
+        self.idx.append(int(frame[0, 0, 0]) + 256 * int(frame[0, 0, 1]))
+
+    def close(self) -> None:
+        self.encoded.set_result("clip.mp4")
+
+
+class _Sink:
+    def __init__(self) -> None:
+        self.outs: list[_Out] = []
+
+    def open(self, path, fps, size) -> _Out:
+        self.outs.append(_Out())
+        return self.outs[-1]
+
+
+def _frames(n: int, moving: range):
+    """프레임 idx를 (0,0) 픽셀에 기록, moving 구간만 움직임"""
+    for i in range(n):
+        f = np.zeros((48, 64, 3), dtype=np.uint8)
+        f[0, 0, 0], f[0, 0, 1] = i % 256, i // 256
+        if i in moving:
+            f[10:30, 10:30] = 255 * (i % 2)
+        yield f
+
+
+def test_clip_gets_every_frame_when_motion_gate_skips_detector_frames():
+    ring = FrameRing(40)
+    clips = EventClips(ring)
+    sink = _Sink()
+    gate = MotionGate(MotionGateConfig(enabled=True, hold_s=0.1, warmup_frames=4), fps=30)
+
+    def detector(stream):
+        seen = []
+        for i, _ in stream:
+            seen.append(i)
+            if i == 105:
+                clips.start(lambda r, i=i: ClipWriter("clip.mp4", 30, (64, 48), r, i, 20, 60, sink=sink))
+        return seen
+
+    try:
+        seen = fan_out(_frames(300, range(100, 110)), [("D", detector)], ring, queue_size=4, gate=gate, clips=clips)["D"]
+    finally:
+        clips.close()
+
+    # detector는 움직임 구간 근처만 받지만 클립은 감지 ±구간 전체가 빠짐없이 기록됨
+    assert len(seen) < 60
+    assert sink.outs[0].idx == list(range(85, 165))
+
+
+def test_fan_out_keeps_decoding_until_clip_post_event_is_complete():
+    ring = FrameRing(40)
+    clips = EventClips(ring)
+    sink = _Sink()
+
+    def detector(stream):
+        for i, _ in stream:
+            if i == 10:
+                clips.start(lambda r, i=i: ClipWriter("clip.mp4", 30, (64, 48), r, i, 5, 30, sink=sink))
+                return True
+
+    try:
+        fan_out(_frames(100, range(0)), [("D", detector)], ring, queue_size=2, clips=clips)
+    finally:
+        clips.close()
+
+    assert sink.outs[0].idx == list(range(5, 40))
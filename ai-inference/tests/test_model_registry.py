@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("ultralytics")
+
+from ultralytics.engine.results import Results
+from ultralytics.utils import ops
+
+from app.services.model_registry import InputSpec, letterbox_params, letterbox_tensor, results_to_frame
+
+SPEC = InputSpec(imgsz=640)
+
+
+def _letterbox_result(boxes: list[list[float]], keypoints: np.ndarray | None = None) -> Results:
+    """letterbox 입력(640x640) 기준 좌표의 Results (텐서 입력 predict 결과와 같은 형태)"""
+    kw = {"keypoints": torch.tensor(keypoints, dtype=torch.float32)} if keypoints is not None else {}
+    return Results(
+        np.zeros((640, 640, 3), dtype=np.uint8), path="", names={0: "person"},
+        boxes=torch.tensor(boxes, dtype=torch.float32), **kw,
+    )
+
+
+@pytest.mark.parametrize("hw", [(720, 1280), (1280, 720), (480, 640), (640, 640)])
+def test_results_to_frame_matches_ultralytics_scale_boxes(hw):
+    frame = np.zeros((*hw, 3), dtype=np.uint8)
+    r, left, top, _ = letterbox_params(hw, SPEC)
+    # 원본 영역 안쪽의 box (letterbox 좌표)
+    box = [left + 10.0, top + 20.0, left + 200.0 * r, top + 300.0 * r, 0.9, 0.0]
+    res = results_to_frame([_letterbox_result([box])], [frame], SPEC)[0]
+
+    expected = ops.scale_boxes((640, 640), torch.tensor([box[:4]]), hw)
+    assert res.orig_shape == hw
+    assert torch.allclose(res.boxes.xyxy, expected, atol=1.0)
+    assert res.boxes.conf.item() == pytest.approx(0.9)
+
+
+def test_results_to_frame_maps_keypoints_and_keeps_hidden_points_zero():
+    hw = (720, 1280)
+    frame = np.zeros((*hw, 3), dtype=np.uint8)
+    r, left, top, _ = letterbox_params(hw, SPEC)
+    kpts = np.array([[[left + 100.0, top + 50.0, 0.9], [0.0, 0.0, 0.1]]], dtype=np.float32)
+    res = results_to_frame([_letterbox_result([[0, 0, 10, 10, 0.9, 0]], kpts)], [frame], SPEC)[0]
+
+    xy = res.keypoints.xy[0].numpy()
+    np.testing.assert_allclose(xy[0], [100.0 / r, 50.0 / r], atol=1e-3)
+    np.testing.assert_allclose(xy[1], [0.0, 0.0])
+
+
+def test_tensor_path_matches_predict_on_square_frame():
+    # 정사각 프레임은 ultralytics LetterBox와 입력이 같으므로 결과 좌표가 같아야 함 (가중치 무관)
+    from ultralytics import YOLO
+
+    model = YOLO("yolov8n-pose.yaml")
+    frame = np.random.default_rng(0).integers(0, 255, (1280, 1280, 3), dtype=np.uint8)
+    ref = model.predict(frame, imgsz=640, conf=0.001, verbose=False)[0]
+    got = model.predict(torch.stack([letterbox_tensor(frame, SPEC)]), imgsz=640, conf=0.001, verbose=False)
+    got = results_to_frame(got, [frame], SPEC)[0]
+
+    assert len(ref.boxes) == len(got.boxes) > 0
+    assert torch.allclose(ref.boxes.xyxy, got.boxes.xyxy, atol=1e-2)
+    assert torch.allclose(ref.keypoints.xy, got.keypoints.xy, atol=1e-2)
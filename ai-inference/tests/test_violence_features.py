@@ -0,0 +1,70 @@
+from collections import deque
+
+import cv2
+import numpy as np
+import pytest
+
+from app.util.preprocessing.violence_features import _Q_BIN_WIDTH, RollingFlowFeatures, extract_features_full
+
+# 분위수는 히스토그램 보간이라 bin 폭만큼, 나머지는 부동소수 오차만 허용
+QUANTILE_KEYS = {"flow_mag_median", "flow_mag_q75", "flow_mag_q90", "flow_mag_q95"}
+RTOL = 1e-4
+
+
+def synthetic_frames(n: int, size=(320, 240)) -> list[np.ndarray]:
+    """움직이는 사각형/노이즈 프레임."""
+    w, h = size
+    rng = np.random.default_rng(0)
+    frames = []
+    for i in range(n):
+        f = rng.integers(0, 40, (h, w, 3), dtype=np.uint8)
+        for k in range(3):
+            x = int((i * (3 + 4 * k)) % (w - 40))
+            y = int((h // 4) * (k + 1) - 20 + 10 * np.sin(i / (2 + k)))
+            cv2.rectangle(f, (x, y), (x + 40, y + 40), (255, 200 - 60 * k, 50 * k), -1)
+        frames.append(f)
+    return frames
+
+
+def flows(frames: list[np.ndarray], frame_size=(320, 240)):
+    """ViolenceClassification.process_frame과 같은 전처리/옵티컬 플로우."""
+    prev = None
+    for frame in frames:
+        gray = cv2.cvtColor(cv2.resize(frame, frame_size), cv2.COLOR_BGR2GRAY)
+        if prev is not None:
+            flow = cv2.calcOpticalFlowFarneback(
+                prev, gray, None,
+                pyr_scale=0.5, levels=3, winsize=15,
+                iterations=3, poly_n=5, poly_sigma=1.2, flags=0
+            )
+            mag, ang = cv2.cartToPolar(flow[..., 0], flow[..., 1])
+            yield mag, ang, cv2.absdiff(gray, prev)
+        prev = gray
+
+
+@pytest.mark.parametrize("buffer_size", [5, 10])
+def test_incremental_features_match_full_recompute(buffer_size):
+    flow_history = deque(maxlen=buffer_size)
+    diff_history = deque(maxlen=buffer_size)
+    rolling = RollingFlowFeatures(maxlen=buffer_size)
+
+    compared = 0
+    for n, (mag, ang, diff) in enumerate(flows(synthetic_frames(40))):
+        flow_history.append((mag, ang))
+        diff_history.append(diff)
+        ref = extract_features_full(flow_history, diff_history)
+        rolling.push(mag, ang, diff)
+        got = rolling.features()
+
+        assert (ref is None) == (got is None), f"frame {n}: ready state differs"
+        if ref is None:
+            continue
+        assert list(ref) == list(got), f"frame {n}: feature order differs"
+
+        compared += 1
+        for k, r in ref.items():
+            atol = _Q_BIN_WIDTH if k in QUANTILE_KEYS else 1e-6
+            assert float(got[k]) == pytest.approx(float(r), rel=RTOL, abs=atol), f"frame {n}: {k}"
+
+    # 윈도우가 가득 찬 뒤(오래된 프레임이 빠지는 구간)까지 비교했는지
+    assert compared > buffer_size
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import base64
+import time
 import uuid
 from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
 
@@ -35,11 +37,13 @@ from app.schemas.inference import (
     TrayJobCreate,
     TrayJobOut,
     TrayJobClaimRequest,
+    TrayJobClaimWaitRequest,
     TrayJobClaimResponse,
     TrayJobCompleteRequest,
 )
 
 from app.services.gcs import upload_bytes
+from app.services.job_notifier import tray_job_notifier
 
 
 router = APIRouter(dependencies=[Depends(require_admin_key)])
@@ -386,29 +390,80 @@ def create_tray_job(body: TrayJobCreate, db: Session = Depends(get_db)):
     db.add(j)
     db.commit()
     db.refresh(j)
+
+    # long-poll 중인 워커 깨우기
+    tray_job_notifier.notify()
     return j
 
 
-@router.post("/inference/tray/jobs/claim", response_model=TrayJobClaimResponse)
-def claim_next_tray_job(body: TrayJobClaimRequest, db: Session = Depends(get_db)):
-    """AI Worker가 가장 오래된 PENDING job을 클레임."""
-    # NOTE: 데모 단일 워커 기준. 다중 워커면 for_update(skip_locked=True) 권장.
-    j = (
+def _claim_jobs(db: Session, worker_id: str, max_jobs: int = 1) -> list[InferenceJob]:
+    """가장 오래된 PENDING TRAY job을 최대 max_jobs건 원자적으로 클레임.
+
+    - SELECT ... FOR UPDATE SKIP LOCKED: 다른 워커가 잠근 행은 건너뛰므로
+      여러 워커가 동시에 claim해도 같은 job을 중복으로 가져가지 않음
+    - ix_job_type_status_created 인덱스로 정렬 없이 앞에서부터 읽음
+    """
+    jobs = (
         db.query(InferenceJob)
         .filter(InferenceJob.job_type == InferenceJobType.TRAY)
         .filter(InferenceJob.status == InferenceJobStatus.PENDING)
         .order_by(InferenceJob.created_at.asc())
-        .first()
+        .limit(max_jobs)
+        .with_for_update(skip_locked=True)
+        .all()
     )
-    if not j:
-        return TrayJobClaimResponse(job=None)
-
-    j.status = InferenceJobStatus.CLAIMED
-    j.worker_id = body.worker_id
-    j.claimed_at = utcnow_naive()
+    if not jobs:
+        # 잠금 없이 끝난 트랜잭션도 종료
+        db.rollback()
+        return []
+
+    now = utcnow_naive()
+    for j in jobs:
+        j.status = InferenceJobStatus.CLAIMED
+        j.worker_id = worker_id
+        j.claimed_at = now
     db.commit()
-    db.refresh(j)
-    return TrayJobClaimResponse(job=j)
+    for j in jobs:
+        db.refresh(j)
+    return jobs
+
+
+def _claim_response(jobs: list[InferenceJob]) -> TrayJobClaimResponse:
+    return TrayJobClaimResponse(job=jobs[0] if jobs else None, jobs=jobs)
+
+
+@router.post("/inference/tray/jobs/claim", response_model=TrayJobClaimResponse)
+def claim_next_tray_job(body: TrayJobClaimRequest, db: Session = Depends(get_db)):
+    """AI Worker가 가장 오래된 PENDING job을 클레임 (max_jobs건까지)."""
+    return _claim_response(_claim_jobs(db, body.worker_id, body.max_jobs))
+
+
+@router.post("/inference/tray/jobs/claim/wait", response_model=TrayJobClaimResponse)
+async def claim_next_tray_job_wait(body: TrayJobClaimWaitRequest, db: Session = Depends(get_db)):
+    """Long-poll claim: PENDING job이 생길 때까지(최대 wait_s) 대기 후 클레임.
+
+    - async route: 대기 중에는 이벤트 루프에서 notifier를 기다리므로 threadpool 스레드를 점유하지 않음
+      (DB claim/close만 threadpool에서 짧게 실행 -> 대기 워커 수가 늘어도 다른 sync 엔드포인트가 밀리지 않음)
+    - 같은 인스턴스의 create_tray_job은 notifier로 즉시 깨움
+    - 다른 인스턴스에서 생성된 job은 JOB_LONG_POLL_RECHECK_S 주기로 재확인
+    - 대기 중에는 DB 커넥션을 풀에 반납(db.close)
+    """
+    deadline = time.monotonic() + min(body.wait_s, settings.JOB_LONG_POLL_MAX_S)
+    recheck_s = max(0.1, settings.JOB_LONG_POLL_RECHECK_S)
+
+    while True:
+        seq = tray_job_notifier.seq
+        jobs = await run_in_threadpool(_claim_jobs, db, body.worker_id, body.max_jobs)
+        if jobs:
+            return _claim_response(jobs)
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return _claim_response([])
+
+        # 트랜잭션 종료 + 커넥션 반납 (재조회 시 새 스냅샷)
+        await run_in_threadpool(db.close)
+        await tray_job_notifier.wait_async(seq, min(remaining, recheck_s))
 
 
 @router.get("/inference/tray/jobs/{job_id}", response_model=TrayJobOut)
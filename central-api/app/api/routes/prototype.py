@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import hashlib
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 
 from app.api.deps import get_db
@@ -23,6 +24,12 @@ def utcnow() -> datetime:
     return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
+def _active_set_etag(s: PrototypeSet) -> str:
+    # ACTIVE set 또는 인덱스 URI가 바뀌면 달라짐 (AI 서버 polling용)
+    key = f"{s.prototype_set_id}|{s.index_npy_gcs_uri}|{s.index_meta_gcs_uri}"
+    return '"' + hashlib.md5(key.encode("utf-8")).hexdigest() + '"'
+
+
 @router.get("/prototype-sets", response_model=list[PrototypeSetOut])
 def list_sets(db: Session = Depends(get_db)):
     return db.query(PrototypeSet).order_by(PrototypeSet.prototype_set_id.desc()).all()
@@ -62,7 +69,7 @@ def activate_set(body: ActivatePrototypeSetIn, db: Session = Depends(get_db)):
 
 
 @router.get("/prototype-sets/active", response_model=ActivePrototypeSetOut)
-def get_active_set(db: Session = Depends(get_db)):
+def get_active_set(request: Request, response: Response, db: Session = Depends(get_db)):
     active = (
         db.query(PrototypeSet)
         .filter(PrototypeSet.status == PrototypeSetStatus.ACTIVE)
@@ -71,4 +78,10 @@ def get_active_set(db: Session = Depends(get_db)):
     )
     if not active:
         raise HTTPException(status_code=404, detail="active prototype_set not found")
+
+    # 조건부 요청: 변경 없으면 304 (본문 없음)
+    etag = _active_set_etag(active)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return active
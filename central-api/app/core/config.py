@@ -18,7 +18,12 @@ class Settings(BaseSettings):
     GCS_BUCKET_CCTV: str | None = None
     GCS_BUCKET_MODELS: str | None = None
 
+    # Inference job long-poll claim
+    JOB_LONG_POLL_MAX_S: float = 25.0       # 요청당 최대 대기 시간 (Cloud Run timeout보다 작게)
+    JOB_LONG_POLL_RECHECK_S: float = 2.0    # 알림이 없어도 DB 재확인 주기 (다중 인스턴스 대비)
+
     # Demo convenience
     CREATE_TABLES: int = 0  # 1이면 startup에서 create_all
+    DB_ENSURE_INDEXES: int = 1  # 1이면 startup에서 models에 있고 DB에 없는 인덱스 생성 (app.db.migrate)
 
 settings = Settings()
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import logging
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+from app.db.base import Base
+import app.db.models  # noqa: F401  (모든 테이블을 Base.metadata에 등록)
+
+migrate_logger = logging.getLogger("migrate")
+
+
+def ensure_indexes(engine: Engine) -> list[str]:
+    """models에 선언됐지만 기존 DB 테이블에 없는 인덱스를 생성. 생성한 인덱스 이름 목록 반환.
+
+    - create_all은 이미 있는 테이블의 인덱스를 추가하지 않으므로 기존 배포는 이 함수로 보강
+      (예: inference_job.ix_job_type_status_created — SKIP LOCKED claim 쿼리 전용)
+    - 테이블이 없으면 건너뜀 (테이블 생성은 create_all 담당)
+    - 여러 인스턴스가 동시에 기동해 같은 인덱스를 만들다 실패하면 경고만 남김
+    """
+    insp = inspect(engine)
+    tables = set(insp.get_table_names())
+    created: list[str] = []
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {ix["name"] for ix in insp.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name or ""):
+            if index.name in existing:
+                continue
+            try:
+                index.create(bind=engine, checkfirst=True)
+                created.append(index.name)
+                migrate_logger.info(f"index 생성: {table.name}.{index.name}")
+            except Exception as e:
+                migrate_logger.warning(f"index 생성 실패: {table.name}.{index.name} ({e})")
+    return created
+
+
+if __name__ == "__main__":
+    # 배포 전 수동 실행: python -m app.db.migrate (대형 테이블은 기동 전에 미리 생성 권장)
+    from app.db.session import engine
+
+    logging.basicConfig(level=logging.INFO)
+    print(f"created: {ensure_indexes(engine)}")
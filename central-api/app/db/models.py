@@ -220,6 +220,9 @@ class InferenceJob(Base):
 
     __table_args__ = (
         Index("ix_job_status_created", "status", "created_at"),
+        # claim 쿼리(job_type+status 필터, created_at 정렬) 전용 covering index
+        # 기존 DB는 기동 시 app.db.migrate.ensure_indexes가 생성 (수동: python -m app.db.migrate)
+        Index("ix_job_type_status_created", "job_type", "status", "created_at"),
         Index("ix_job_session", "session_id"),
         Index("ix_job_store_created", "store_id", "created_at"),
     )
@@ -1,3 +1,4 @@
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
@@ -49,6 +50,17 @@ def create_app() -> FastAPI:
 
         return {"ready": db_ok}
 
+    @app.on_event("startup")
+    def _ensure_indexes():
+        # 기존 DB에 새로 추가된 인덱스(예: claim용 ix_job_type_status_created) 보강
+        if settings.DB_ENSURE_INDEXES:
+            from app.db.migrate import ensure_indexes
+
+            try:
+                ensure_indexes(engine)
+            except Exception as e:
+                logging.getLogger("migrate").warning(f"index 확인 실패: {e}")
+
     app.include_router(api_router, prefix="/api/v1")
     return app
 
@@ -128,9 +128,18 @@ class TrayJobOut(ORMBase):
 
 class TrayJobClaimRequest(BaseModel):
     worker_id: str = Field(..., min_length=1, max_length=64)
+    # 한 번에 클레임할 최대 job 수 (batch 추론용)
+    max_jobs: int = Field(1, ge=1, le=32)
+
+class TrayJobClaimWaitRequest(TrayJobClaimRequest):
+    # PENDING job이 없을 때 최대 대기 시간(초). 서버 설정 JOB_LONG_POLL_MAX_S로 상한 적용
+    wait_s: float = Field(20.0, ge=0.0, le=60.0)
 
 class TrayJobClaimResponse(BaseModel):
+    # 하위호환: 첫 번째 job (없으면 None)
     job: TrayJobOut | None = None
+    # max_jobs > 1 요청 시 클레임된 전체 job (created_at 오름차순)
+    jobs: list[TrayJobOut] = Field(default_factory=list)
 
 class TrayJobCompleteRequest(BaseModel):
     # AI 결과
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+
+def _resolve(fut: asyncio.Future) -> None:
+    if not fut.done():
+        fut.set_result(None)
+
+
+class JobNotifier:
+    """Job 생성 알림 (프로세스 내부 전용).
+
+    - create_tray_job이 commit 후 notify() (threadpool 스레드에서 호출)
+    - long-poll claim은 seq가 바뀔 때까지 wait_async() (이벤트 루프에서 대기, threadpool 스레드를 점유하지 않음)
+    - Cloud Run 다중 인스턴스에서는 다른 인스턴스의 생성 알림을 받지 못하므로
+      호출 측에서 주기적으로 DB를 재확인해야 한다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._async_waiters: set[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = set()
+
+    @property
+    def seq(self) -> int:
+        with self._lock:
+            return self._seq
+
+    def notify(self) -> None:
+        with self._lock:
+            self._seq += 1
+            waiters = list(self._async_waiters)
+        for loop, fut in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, fut)
+            except RuntimeError:
+                # 이미 닫힌 loop
+                pass
+
+    async def wait_async(self, last_seq: int, timeout_s: float) -> int:
+        """seq가 last_seq와 달라지거나 timeout까지 대기. 현재 seq 반환."""
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        waiter = (loop, fut)
+        with self._lock:
+            if self._seq != last_seq:
+                return self._seq
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait({fut}, timeout=max(0.0, timeout_s))
+        finally:
+            with self._lock:
+                self._async_waiters.discard(waiter)
+        return self.seq
+
+
+tray_job_notifier = JobNotifier()